@@ -3,6 +3,8 @@ Script para análise completa do banco de dados
 """
 import sys
 import os
+import time
+import argparse
 
 # Adiciona o diretório raiz ao path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -11,8 +13,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from src.utils.encoding import setup_encoding
 setup_encoding()
 
-from src.database import Database
-from src.analysis import PatternAnalyzer
+from src.database import DatabaseSnapshot, AnalyticalDatabase
+from src.analysis import PatternAnalyzer, SequenceWindows, ReportSummary, build_report_summary
 from collections import Counter
 from datetime import datetime, timedelta
 from rich.console import Console
@@ -23,80 +25,112 @@ from config import config
 
 console = Console()
 
-def analyze_database():
-    """Realiza análise completa do banco de dados"""
-    db = Database(config.DATABASE_PATH)
+def analyze_database(db_path: str = config.DATABASE_PATH, mode: str = 'auto',
+                     checkpoint_path: str = None, full: bool = False, archives: bool = True,
+                     engine: str = 'sqlite'):
+    """Realiza análise completa do banco de dados sobre um snapshot consistente
+    
+    O relatório nunca abre o banco para escrita: todas as seções leem o mesmo
+    ponto no tempo, sem disputar locks com o bot em execução. Com
+    ``checkpoint_path``, apenas as linhas novas desde a última execução são
+    lidas (``full=True`` força o recálculo completo). Com ``archives``, as
+    partições já arquivadas entram no relatório pelas views ``all_games``/``all_bets``.
+    Com ``engine='duckdb'``, o snapshot é copiado para o DuckDB e os agregados
+    são calculados lá (sem checkpoint).
+    """
+    start = time.perf_counter()
+    if engine == 'duckdb':
+        analyze_database_duckdb(db_path, archives=archives)
+        elapsed = time.perf_counter() - start
+        console.print(f"\n[bold green]✅ Análise concluída em {elapsed:.2f} s![/bold green]\n")
+        return
     
-    console.print("\n[bold cyan]📊 ANÁLISE DO BANCO DE DADOS BLAZE DOUBLE[/bold cyan]\n")
+    with DatabaseSnapshot(db_path, mode=mode, busy_timeout_ms=config.DB_BUSY_TIMEOUT_MS,
+                          archives=archives) as db:
+        console.print("\n[bold cyan]📊 ANÁLISE DO BANCO DE DADOS BLAZE DOUBLE[/bold cyan]")
+        taken_at = datetime.fromtimestamp(db.taken_at).strftime('%Y-%m-%d %H:%M:%S')
+        console.print(f"[dim]Snapshot {db.mode} de {db_path} em {taken_at}[/dim]")
+        if db.partitions:
+            console.print(f"[dim]Partições arquivadas incluídas: {', '.join(db.partitions)}[/dim]")
+        console.print()
+        
+        tables = ('all_games', 'all_bets') if archives else ('games', 'bets')
+        summary = build_report_summary(db.get_connection(), checkpoint_path=checkpoint_path, full=full,
+                                       games_table=tables[0], bets_table=tables[1])
+        show_report(db, summary)
+        origin = "incremental" if summary.incremental else "completo"
+        console.print(
+            f"[dim]⏱️ Agregados ({origin}) calculados em {summary.elapsed*1000:.1f} ms: "
+            f"{summary.new_games} jogos e {summary.new_bets} apostas lidos "
+            f"({summary.total_games} jogos, {summary.total_bets} apostas no total)[/dim]"
+        )
     
+    elapsed = time.perf_counter() - start
+    console.print(f"\n[bold green]✅ Análise concluída em {elapsed:.2f} s![/bold green]\n")
+
+def analyze_database_duckdb(db_path: str, archives: bool = True):
+    """Relatório com os agregados calculados pelo motor analítico (DuckDB)"""
+    load_start = time.perf_counter()
+    db = AnalyticalDatabase.from_sqlite(db_path, archives=archives,
+                                        busy_timeout_ms=config.DB_BUSY_TIMEOUT_MS)
+    try:
+        load_elapsed = time.perf_counter() - load_start
+        console.print("\n[bold cyan]📊 ANÁLISE DO BANCO DE DADOS BLAZE DOUBLE[/bold cyan]")
+        console.print(f"[dim]Cópia DuckDB de {db_path} carregada em {load_elapsed:.2f} s[/dim]")
+        if db.partitions:
+            console.print(f"[dim]Partições arquivadas incluídas: {', '.join(db.partitions)}[/dim]")
+        console.print()
+        
+        summary = db.report_summary()
+        show_report(db, summary)
+        console.print(
+            f"[dim]⏱️ Agregados (DuckDB) calculados em {summary.elapsed*1000:.1f} ms: "
+            f"{summary.total_games} jogos e {summary.total_bets} apostas[/dim]"
+        )
+    finally:
+        db.close()
+
+def show_report(db, summary: ReportSummary):
+    """Renderiza as seções do relatório a partir dos agregados"""
     # 1. Estatísticas Gerais
-    show_general_stats(db)
+    show_general_stats(summary)
     
     # 2. Distribuição de Cores
-    show_color_distribution(db)
+    show_color_distribution(summary)
     
     # 3. Análise de Números
-    show_number_analysis(db)
+    show_number_analysis(summary)
     
     # 4. Histórico de Apostas
-    show_bets_history(db)
+    show_bets_history(summary)
     
     # 5. Análise de Padrões
-    show_patterns_analysis(db)
+    show_patterns_analysis(summary)
     
     # 6. Taxa de Acerto por Cor
-    show_accuracy_by_color(db)
+    show_accuracy_by_color(summary)
     
     # 7. Análise Temporal
-    show_temporal_analysis(db)
+    show_temporal_analysis(summary)
     
     # 8. Últimos Jogos
-    show_recent_games(db)
+    show_recent_games(summary)
     
     # 9. Análise de Sequências Coletadas
-    show_sequences_analysis(db)
-    
-    console.print("\n[bold green]✅ Análise concluída![/bold green]\n")
+    show_sequences_analysis(db, summary)
 
-def show_general_stats(db):
+def show_general_stats(summary: ReportSummary):
     """Mostra estatísticas gerais"""
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    # Total de jogos
-    cursor.execute('SELECT COUNT(*) FROM games')
-    total_games = cursor.fetchone()[0]
-    
-    # Total de apostas
-    cursor.execute('SELECT COUNT(*) FROM bets')
-    total_bets = cursor.fetchone()[0]
-    
-    # Vitórias e derrotas
-    cursor.execute('SELECT COUNT(*) FROM bets WHERE result = "WIN"')
-    wins = cursor.fetchone()[0]
-    
-    cursor.execute('SELECT COUNT(*) FROM bets WHERE result = "LOSS"')
-    losses = cursor.fetchone()[0]
-    
-    # Taxa de acerto
-    win_rate = (wins / total_bets * 100) if total_bets > 0 else 0.0
-    
-    # Lucro
-    cursor.execute('SELECT SUM(bet_amount * 2) FROM bets WHERE result = "WIN"')
-    total_winnings = cursor.fetchone()[0] or 0.0
-    
-    cursor.execute('SELECT SUM(bet_amount) FROM bets')
-    total_bet_amount = cursor.fetchone()[0] or 0.0
-    
-    total_profit = total_winnings - total_bet_amount
-    
-    # Primeiro e último jogo
-    cursor.execute('SELECT MIN(timestamp), MAX(timestamp) FROM games')
-    first_last = cursor.fetchone()
-    first_game = first_last[0] if first_last[0] else "N/A"
-    last_game = first_last[1] if first_last[1] else "N/A"
-    
-    conn.close()
+    total_games = summary.total_games
+    total_bets = summary.total_bets
+    wins = summary.wins
+    losses = summary.losses
+    win_rate = summary.win_rate
+    total_winnings = summary.total_winnings
+    total_bet_amount = summary.total_bet_amount
+    total_profit = summary.total_profit
+    first_game = summary.first_game or "N/A"
+    last_game = summary.last_game or "N/A"
     
     table = Table(title="📈 Estatísticas Gerais", box=box.ROUNDED)
     table.add_column("Métrica", style="cyan", width=30)
@@ -116,20 +150,9 @@ def show_general_stats(db):
     console.print(table)
     console.print()
 
-def show_color_distribution(db):
+def show_color_distribution(summary: ReportSummary):
     """Mostra distribuição de cores"""
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT color, COUNT(*) as count 
-        FROM games 
-        GROUP BY color 
-        ORDER BY count DESC
-    ''')
-    
-    results = cursor.fetchall()
-    conn.close()
+    results = summary.color_distribution()
     
     if not results:
         console.print("[yellow]Nenhum jogo encontrado no banco de dados[/yellow]\n")
@@ -156,27 +179,12 @@ def show_color_distribution(db):
     console.print(table)
     console.print()
 
-def show_number_analysis(db):
+def show_number_analysis(summary: ReportSummary):
     """Mostra análise de números"""
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT number, COUNT(*) as count 
-        FROM games 
-        WHERE number IS NOT NULL
-        GROUP BY number 
-        ORDER BY count DESC
-        LIMIT 10
-    ''')
-    
-    results = cursor.fetchall()
+    results = summary.top_numbers(10)
     
     if results:
-        cursor.execute('SELECT AVG(number), MIN(number), MAX(number) FROM games WHERE number IS NOT NULL')
-        stats = cursor.fetchone()
-        
-        conn.close()
+        stats = (summary.number_average, summary.number_min, summary.number_max)
         
         table = Table(title="🔢 Análise de Números (Top 10 mais frequentes)", box=box.ROUNDED)
         table.add_column("Número", style="cyan", width=10, justify="center")
@@ -197,25 +205,13 @@ def show_number_analysis(db):
             )
             console.print(panel)
     else:
-        conn.close()
         console.print("[yellow]Nenhum número encontrado no banco de dados[/yellow]\n")
     
     console.print()
 
-def show_bets_history(db):
+def show_bets_history(summary: ReportSummary):
     """Mostra histórico de apostas"""
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT predicted_color, actual_color, result, confidence, bet_amount, timestamp
-        FROM bets
-        ORDER BY timestamp DESC
-        LIMIT 20
-    ''')
-    
-    results = cursor.fetchall()
-    conn.close()
+    results = summary.last_bets()
     
     if not results:
         console.print("[yellow]Nenhuma aposta encontrada no banco de dados[/yellow]\n")
@@ -253,20 +249,9 @@ def show_bets_history(db):
     console.print(table)
     console.print()
 
-def show_patterns_analysis(db):
+def show_patterns_analysis(summary: ReportSummary):
     """Mostra análise de padrões"""
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT pattern_type, COUNT(*) as count, AVG(success_rate) as avg_success
-        FROM patterns
-        GROUP BY pattern_type
-        ORDER BY count DESC
-    ''')
-    
-    results = cursor.fetchall()
-    conn.close()
+    results = summary.patterns
     
     if not results:
         console.print("[yellow]Nenhum padrão identificado ainda[/yellow]\n")
@@ -284,24 +269,9 @@ def show_patterns_analysis(db):
     console.print(table)
     console.print()
 
-def show_accuracy_by_color(db):
+def show_accuracy_by_color(summary: ReportSummary):
     """Mostra taxa de acerto por cor prevista"""
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT 
-            predicted_color,
-            COUNT(*) as total,
-            SUM(CASE WHEN result = 'WIN' THEN 1 ELSE 0 END) as wins,
-            AVG(confidence) as avg_confidence
-        FROM bets
-        WHERE result IS NOT NULL
-        GROUP BY predicted_color
-    ''')
-    
-    results = cursor.fetchall()
-    conn.close()
+    results = summary.accuracy_by_color()
     
     if not results:
         console.print("[yellow]Dados insuficientes para análise por cor[/yellow]\n")
@@ -339,22 +309,10 @@ def show_accuracy_by_color(db):
     console.print(table)
     console.print()
 
-def show_temporal_analysis(db):
+def show_temporal_analysis(summary: ReportSummary):
     """Mostra análise temporal"""
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
     # Jogos por hora do dia
-    cursor.execute('''
-        SELECT 
-            strftime('%H', timestamp) as hour,
-            COUNT(*) as count
-        FROM games
-        GROUP BY hour
-        ORDER BY hour
-    ''')
-    
-    hourly = cursor.fetchall()
+    hourly = summary.hourly_distribution()
     
     if hourly:
         table = Table(title="⏰ Distribuição de Jogos por Hora", box=box.ROUNDED)
@@ -366,23 +324,10 @@ def show_temporal_analysis(db):
         
         console.print(table)
         console.print()
-    
-    conn.close()
 
-def show_recent_games(db):
+def show_recent_games(summary: ReportSummary):
     """Mostra os últimos jogos"""
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT color, number, timestamp
-        FROM games
-        ORDER BY timestamp DESC
-        LIMIT 30
-    ''')
-    
-    results = cursor.fetchall()
-    conn.close()
+    results = summary.last_games()
     
     if not results:
         console.print("[yellow]Nenhum jogo encontrado[/yellow]\n")
@@ -414,12 +359,13 @@ def show_recent_games(db):
     console.print(table)
     console.print()
 
-def show_sequences_analysis(db):
-    """Mostra análise de sequências coletadas"""
+def show_sequences_analysis(db, summary: ReportSummary):
+    """Mostra análise das sequências (janelas derivadas do histórico de jogos)"""
     analyzer = PatternAnalyzer(db)
     
-    # Estatísticas gerais
-    stats = db.get_sequence_statistics()
+    # Janelas sobre os giros já lidos na passada por games
+    windows = SequenceWindows(summary.spin_codes)
+    stats = windows.statistics(config.SEQUENCE_SIZES)
     
     if stats['total_sequences'] == 0:
         console.print("[yellow]Nenhuma sequência coletada ainda[/yellow]\n")
@@ -440,7 +386,7 @@ def show_sequences_analysis(db):
     
     # Análise de padrões por tamanho
     for length in sorted(stats['by_length'].keys())[:5]:  # Top 5 tamanhos
-        analysis = analyzer.analyze_sequences_collection(sequence_length=length)
+        analysis = analyzer.analyze_sequences_collection(sequence_length=length, windows=windows)
         
         if analysis.get('patterns_found', 0) > 0:
             panel = Panel(
@@ -468,9 +414,34 @@ def show_sequences_analysis(db):
                 console.print(table)
                 console.print()
 
+def main():
+    parser = argparse.ArgumentParser(description="Análise do banco de dados Blaze Double")
+    parser.add_argument('--db', default=config.DATABASE_PATH, help="Caminho do banco SQLite")
+    parser.add_argument('--mode', choices=DatabaseSnapshot.MODES, default='auto',
+                        help="readonly: transação de leitura em WAL; backup: cópia em memória; "
+                             "auto: readonly se o banco estiver em WAL")
+    parser.add_argument('--checkpoint', default=None,
+                        help="Arquivo de agregados incrementais (padrão: config.REPORT_CHECKPOINT_PATH "
+                             "ou <db>.report.json com --db)")
+    parser.add_argument('--no-checkpoint', action='store_true', help="Não lê nem grava checkpoint")
+    parser.add_argument('--full', action='store_true', help="Ignora o checkpoint e recalcula tudo")
+    parser.add_argument('--hot-only', action='store_true',
+                        help="Lê apenas o banco principal (ignora as partições arquivadas)")
+    parser.add_argument('--engine', choices=('sqlite', 'duckdb'), default='sqlite',
+                        help="Motor dos agregados: sqlite (incremental, padrão) ou duckdb "
+                             "(cópia analítica em memória; requer o pacote duckdb)")
+    args = parser.parse_args()
+    
+    checkpoint_path = args.checkpoint
+    if checkpoint_path is None and not args.no_checkpoint:
+        checkpoint_path = (config.REPORT_CHECKPOINT_PATH if args.db == config.DATABASE_PATH
+                           else args.db + '.report.json')
+    analyze_database(args.db, args.mode, checkpoint_path=checkpoint_path, full=args.full,
+                     archives=not args.hot_only, engine=args.engine)
+
 if __name__ == "__main__":
     try:
-        analyze_database()
+        main()
     except Exception as e:
         console.print(f"[bold red]Erro ao analisar banco de dados: {e}[/bold red]")
         import traceback
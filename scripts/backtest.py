@@ -0,0 +1,135 @@
+"""
+Backtest das estratégias do PatternAnalyzer sobre o histórico de games
+
+Percorre o histórico em ordem cronológica (snapshot somente leitura, com as
+partições arquivadas) e, após cada giro, toma a mesma decisão que o bot
+tomaria. Mostra por estratégia: sinais, cobertura, taxa de acerto, erro de
+calibração e lucro simulado com aposta fixa.
+
+Uso:
+    python scripts/backtest.py [--db blaze_data.db] [--min-confidence 0.6] [--history-size 50]
+    python scripts/backtest.py --no-exact --no-markov --json backtest.json
+    python scripts/backtest.py --exact-priority   # bot com EXACT_MATCH_ENABLED=true
+    python scripts/backtest.py --synthetic 1000000   # histórico aleatório (mede a vazão)
+"""
+import sys
+import os
+import json
+import random
+import argparse
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Configura encoding UTF-8 para Windows
+from src.utils.encoding import setup_encoding
+setup_encoding()
+
+from src.analysis import NUMPY_AVAILABLE, Backtester, BacktestReport
+from src.analysis.backtest import stream_spin_codes
+from src.database import DatabaseSnapshot
+from rich.console import Console
+from rich.table import Table
+from rich import box
+from config import config
+
+console = Console()
+
+
+def _percent(value) -> str:
+    return f"{value * 100:.1f}%" if value is not None else "-"
+
+
+def show_report(report: BacktestReport, calibration: list):
+    console.print(f"\n[bold cyan]📈 Backtest: {report.spins:,} giros, {report.positions:,} posições "
+                  f"em {report.elapsed:.1f} s ({report.rounds_per_minute:,.0f} rodadas/min)[/bold cyan]")
+
+    table = Table(box=box.ROUNDED)
+    table.add_column("Estratégia", style="cyan")
+    table.add_column("Sinais", justify="right")
+    table.add_column("Cobertura", justify="right")
+    table.add_column("Acerto", style="green", justify="right")
+    table.add_column("Erro calib.", justify="right")
+    table.add_column("Lucro", justify="right")
+    for stats in report.strategies.values():
+        summary = stats.summary(report.positions)
+        profit = summary['profit']
+        table.add_row(summary['strategy'], f"{summary['signals']:,}", _percent(summary['coverage']),
+                      _percent(summary['hit_rate']), _percent(summary['calibration_error']),
+                      f"[{'green' if profit >= 0 else 'red'}]{profit:+,.2f}[/]")
+    console.print(table)
+
+    for name in calibration:
+        stats = report.strategies.get(name)
+        if stats is None or not stats.total_signals:
+            continue
+        table = Table(title=f"Calibração: {name}", box=box.SIMPLE)
+        table.add_column("Confiança", style="cyan")
+        table.add_column("Sinais", justify="right")
+        table.add_column("Confiança média", justify="right")
+        table.add_column("Acerto", style="green", justify="right")
+        for row in stats.calibration():
+            low, high = row['bin']
+            table.add_row(f"{low:.1f}-{high:.1f}", f"{row['signals']:,}",
+                          _percent(row['confidence']), _percent(row['hit_rate']))
+        console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest das estratégias do PatternAnalyzer")
+    parser.add_argument('--db', default=config.DATABASE_PATH, help="Banco de dados (padrão: config)")
+    parser.add_argument('--no-archives', action='store_true', help="Ignora as partições arquivadas")
+    parser.add_argument('--synthetic', type=int, help="Usa N giros aleatórios em vez do banco")
+    parser.add_argument('--min-confidence', type=float, default=config.MIN_CONFIDENCE)
+    parser.add_argument('--history-size', type=int, default=config.HISTORY_SIZE)
+    parser.add_argument('--no-exact', action='store_true', help="Sem a busca exata de sequências")
+    parser.add_argument('--exact-priority', action='store_true', default=config.EXACT_MATCH_ENABLED,
+                        help="Simula o bot com a busca exata como previsão principal (EXACT_MATCH_ENABLED)")
+    parser.add_argument('--no-markov', action='store_true', help="Sem as tabelas de transição")
+    parser.add_argument('--bet', type=float, default=config.DEFAULT_BET_AMOUNT, help="Aposta fixa por sinal")
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="Giros analisados por bloco")
+    parser.add_argument('--calibration', nargs='*', default=['bot', 'analyzer'],
+                        help="Estratégias com tabela de calibração")
+    parser.add_argument('--json', help="Grava o resultado completo neste arquivo")
+    args = parser.parse_args()
+
+    if not NUMPY_AVAILABLE:
+        console.print("[bold red]numpy não está instalado. Execute: pip install numpy[/bold red]")
+        sys.exit(1)
+
+    backtester = Backtester(min_confidence=args.min_confidence, history_size=args.history_size,
+                            exact_match=not args.no_exact, exact_priority=args.exact_priority,
+                            markov=not args.no_markov, bet_amount=args.bet)
+
+    def progress(spins):
+        console.print(f"[dim]{spins:,} giros processados[/dim]")
+
+    if args.synthetic:
+        rng = random.Random(42)
+        codes = bytes(rng.choices(range(15), k=args.synthetic))
+        report = backtester.run((codes[i:i + args.chunk_size] for i in range(0, len(codes), args.chunk_size)),
+                                progress=progress)
+    else:
+        if not os.path.exists(args.db):
+            console.print(f"[bold red]❌ Banco não encontrado: {args.db}[/bold red]")
+            sys.exit(1)
+        archives = not args.no_archives
+        with DatabaseSnapshot(args.db, busy_timeout_ms=config.DB_BUSY_TIMEOUT_MS, archives=archives) as db:
+            if db.partitions:
+                console.print(f"[dim]Partições arquivadas incluídas: {', '.join(db.partitions)}[/dim]")
+            chunks = stream_spin_codes(db.get_connection(), 'all_games' if archives else 'games',
+                                       chunk_size=args.chunk_size)
+            report = backtester.run(chunks, progress=progress)
+
+    if not report.positions:
+        console.print("[yellow]⚠️ Histórico insuficiente para o backtest[/yellow]")
+        return
+    show_report(report, args.calibration)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, indent=2, ensure_ascii=False)
+        console.print(f"[dim]Resultado gravado em {args.json}[/dim]")
+
+
+if __name__ == "__main__":
+    main()
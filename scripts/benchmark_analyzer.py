@@ -0,0 +1,137 @@
+"""
+Benchmark do PatternAnalyzer: estratégias em Python x núcleo vetorizado (NumPy)
+
+Para históricos sintéticos de 50, 1k e 1M giros mede:
+    - uma análise sobre o histórico inteiro (``analyze_history``, em Python
+      puro, x ``analyze_arrays`` com o histórico já codificado)
+    - a análise de todas as posições, como em um backtest (cada posição vê
+      os últimos ``config.HISTORY_SIZE`` giros): laço em Python x
+      ``rolling_analysis``. Acima de ``--python-limit`` posições o tempo do
+      laço em Python é estimado pela taxa medida nas primeiras posições.
+
+As previsões e confianças das duas implementações são comparadas nas
+posições medidas.
+
+Uso:
+    python scripts/benchmark_analyzer.py [--sizes 50 1000 1000000] [--repeat 200]
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import statistics
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Configura encoding UTF-8 para Windows
+from src.utils.encoding import setup_encoding
+setup_encoding()
+
+from src.analysis import PatternAnalyzer, NUMPY_AVAILABLE, analyze_arrays, rolling_analysis, spin_arrays
+from src.utils.roulette import COLOR_CODES, number_to_color
+from rich.console import Console
+from rich.table import Table
+from rich import box
+from config import config
+
+console = Console()
+
+
+def synthetic_history(size: int, seed: int = 42):
+    """(cores, números) em ordem cronológica, como listas e como arrays"""
+    rng = random.Random(seed)
+    numbers = [rng.randint(0, 14) for _ in range(size)]
+    colors = [number_to_color(number) for number in numbers]
+    return colors, numbers, spin_arrays(bytes(numbers))
+
+
+def median_us(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def python_rolling(analyzer: PatternAnalyzer, colors, numbers, positions: int, history_size: int):
+    """Laço de referência: uma chamada de ``analyze_history`` (Python) por posição"""
+    results = []
+    for t in range(positions):
+        start = max(0, t - history_size + 1)
+        history = colors[start:t + 1][::-1]
+        recent_numbers = numbers[start:t + 1][::-1]
+        results.append(analyzer.analyze_history(history, numbers=recent_numbers)
+                       if len(history) >= 3 else {'prediction': None, 'confidence': 0.0})
+    return results
+
+
+def run_benchmark(sizes, repeat: int, python_limit: int):
+    analyzer = PatternAnalyzer(None)
+    history_size = config.HISTORY_SIZE
+    table = Table(title="⏱️ PatternAnalyzer: Python x NumPy", box=box.ROUNDED)
+    table.add_column("Giros", style="cyan", justify="right")
+    table.add_column("Operação", style="bold")
+    table.add_column("Python", style="red", justify="right")
+    table.add_column("NumPy", style="green", justify="right")
+    table.add_column("Ganho", style="yellow", justify="right")
+
+    for size in sizes:
+        colors, numbers, (color_codes, number_codes) = synthetic_history(size)
+        newest_first = colors[::-1]
+        numbers_newest_first = numbers[::-1]
+
+        # Uma análise sobre o histórico inteiro
+        single_repeat = repeat if size <= 100_000 else max(3, repeat // 20)
+        python_us = median_us(lambda: analyzer.analyze_history(newest_first, numbers=numbers_newest_first),
+                              single_repeat)
+        numpy_us = median_us(lambda: analyze_arrays(color_codes, number_codes), single_repeat)
+        expected = analyzer.analyze_history(newest_first, numbers=numbers_newest_first)
+        if analyze_arrays(color_codes, number_codes) != expected:
+            console.print(f"[bold red]❌ Resultado divergente na análise única ({size} giros)[/bold red]")
+        table.add_row(f"{size:,}", "1 análise (histórico inteiro)", f"{python_us:,.1f} µs", f"{numpy_us:,.1f} µs",
+                      f"{python_us / numpy_us:.1f}x")
+
+        # Todas as posições (backtest)
+        positions = min(size, python_limit)
+        start = time.perf_counter()
+        reference = python_rolling(analyzer, colors, numbers, positions, history_size)
+        python_s = (time.perf_counter() - start) * size / positions
+        start = time.perf_counter()
+        rolling = rolling_analysis(color_codes, number_codes, history_size=history_size)
+        numpy_s = time.perf_counter() - start
+
+        mismatches = sum(
+            1 for t, result in enumerate(reference)
+            if (COLOR_CODES[result['prediction']] if result['prediction'] else -1) != rolling.prediction[t]
+            or result['confidence'] != rolling.confidence[t]
+        )
+        if mismatches:
+            console.print(f"[bold red]❌ {mismatches} posições divergentes ({size} giros)[/bold red]")
+        estimated = " (estimado)" if positions < size else ""
+        table.add_row(f"{size:,}", f"todas as posições (janela {history_size})",
+                      f"{python_s * 1000:,.1f} ms{estimated}", f"{numpy_s * 1000:,.1f} ms",
+                      f"{python_s / numpy_s:.1f}x")
+
+    console.print(table)
+    console.print(f"[dim]Previsões conferidas com a implementação em Python nas primeiras "
+                  f"{python_limit:,} posições de cada histórico[/dim]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do PatternAnalyzer (Python x NumPy)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 1_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=200, help="Execuções da análise única")
+    parser.add_argument('--python-limit', type=int, default=50_000,
+                        help="Posições medidas no laço em Python (acima disso, o tempo é estimado)")
+    args = parser.parse_args()
+    if not NUMPY_AVAILABLE:
+        console.print("[bold red]numpy não está instalado. Execute: pip install numpy[/bold red]")
+        sys.exit(1)
+    run_benchmark(args.sizes, args.repeat, args.python_limit)
+
+
+if __name__ == "__main__":
+    main()
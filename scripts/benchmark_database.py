@@ -0,0 +1,311 @@
+"""
+Benchmark das consultas quentes do banco de dados
+
+Popula bancos temporários com 10k, 100k e 1M jogos sintéticos e mede a
+latência das consultas executadas pelo bot, sem e com os índices da
+migração de consultas quentes. Com ``--backends``, compara os mesmos
+métodos públicos nos motores de armazenamento (SQLite, memória e, se o
+pacote estiver instalado, DuckDB). Com ``--writer``, confere o
+``WriteBehindWorker`` em cada motor: todas as escritas enfileiradas precisam
+ser resolvidas (com resultado ou erro), sem travar quem espera o ``Future``.
+
+Uso:
+    python scripts/benchmark_database.py [--sizes 10000 100000 1000000] [--repeat 200]
+    python scripts/benchmark_database.py --backends [--sizes 100000]
+    python scripts/benchmark_database.py --writer [--sizes 10000]
+"""
+import sys
+import os
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Configura encoding UTF-8 para Windows
+from src.utils.encoding import setup_encoding
+setup_encoding()
+
+from src.database import Database, MemoryDatabase, AnalyticalDatabase, WriteBehindWorker
+from src.database.analytical import DUCKDB_AVAILABLE
+from src.database.migrations import HOT_PATH_INDEXES
+from src.utils.roulette import number_to_color
+from src.utils.timestamps import US_PER_HOUR, US_PER_SECOND, timestamp_to_us
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+console = Console()
+
+
+def populate(db: Database, total_games: int):
+    """Insere jogos/apostas sintéticos em uma única transação"""
+    rng = random.Random(42)
+    start = timestamp_to_us(datetime(2024, 1, 1))
+    games = []
+    bets = []
+    for i in range(total_games):
+        number = rng.randint(0, 14)
+        ts = start + 30 * i * US_PER_SECOND
+        game_id = f"game_{i}"
+        games.append((game_id, number_to_color(number), number, ts))
+        # Uma aposta a cada 10 jogos
+        if i % 10 == 0:
+            result = rng.choice(['WIN', 'LOSS'])
+            bets.append((game_id, 'red', number_to_color(number), 1.0, 0.7, result, ts))
+
+    with db.pool.write() as conn:
+        conn.executemany('INSERT INTO games (game_id, color, number, timestamp) VALUES (?, ?, ?, ?)', games)
+        conn.executemany('''
+            INSERT INTO bets (game_id, predicted_color, actual_color, bet_amount, confidence, result, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', bets)
+
+
+def hot_queries(total_games: int):
+    """Consultas do caminho quente: (nome, sql, gerador de parâmetros)"""
+    rng = random.Random(7)
+    start = timestamp_to_us(datetime(2024, 1, 1))
+    span = 30 * total_games * US_PER_SECOND
+    day = 24 * US_PER_HOUR
+
+    def day_range():
+        first = start + rng.randrange(max(1, span - day))
+        return (US_PER_HOUR, first, first + day)
+
+    return [
+        ('get_recent_games(50)',
+         'SELECT game_id, color, number, timestamp, result FROM games ORDER BY timestamp DESC LIMIT 50',
+         lambda: ()),
+        ('update_bet_result (lookup)',
+         'SELECT id FROM bets WHERE game_id = ?',
+         lambda: (f"game_{rng.randrange(0, total_games, 10)}",)),
+        ("COUNT result = 'WIN'",
+         "SELECT COUNT(*) FROM bets WHERE result = 'WIN'",
+         lambda: ()),
+        ("SUM bet_amount WIN",
+         "SELECT SUM(bet_amount * 2) FROM bets WHERE result = 'WIN'",
+         lambda: ()),
+        ('save_game (game_id)',
+         'SELECT id FROM games WHERE game_id = ?',
+         lambda: (f"game_{rng.randrange(total_games)}",)),
+        ('get_hourly_counts (1 dia)',
+         'SELECT timestamp / ?1 AS hour, COUNT(*) FROM games WHERE timestamp >= ?2 AND timestamp < ?3 GROUP BY hour',
+         day_range),
+        ('get_statistics',
+         'SELECT total_games, total_bets, wins, losses, win_rate, total_profit FROM statistics WHERE id = 1',
+         lambda: ()),
+    ]
+
+
+def measure(db: Database, sql: str, params, repeat: int) -> float:
+    """Retorna a latência mediana (ms) de uma consulta"""
+    samples = []
+    with db.pool.read() as conn:
+        for _ in range(repeat):
+            args = params()
+            start = time.perf_counter()
+            conn.execute(sql, args).fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run_benchmark(sizes, repeat: int):
+    workdir = tempfile.mkdtemp(prefix='blaze_bench_')
+    table = Table(title="⏱️ Latência mediana das consultas quentes (ms)", box=box.ROUNDED)
+    table.add_column("Jogos", style="cyan", justify="right")
+    table.add_column("Consulta", style="bold")
+    table.add_column("Sem índices", style="red", justify="right")
+    table.add_column("Com índices", style="green", justify="right")
+    table.add_column("Ganho", style="yellow", justify="right")
+
+    try:
+        for size in sizes:
+            db = Database(os.path.join(workdir, f'bench_{size}.db'))
+            console.print(f"[dim]Populando {size:,} jogos...[/dim]")
+            populate(db, size)
+
+            with db.pool.write() as conn:
+                for name in HOT_PATH_INDEXES:
+                    conn.execute(f'DROP INDEX IF EXISTS {name}')
+            without = {name: measure(db, sql, params, repeat) for name, sql, params in hot_queries(size)}
+
+            with db.pool.write() as conn:
+                for sql in HOT_PATH_INDEXES.values():
+                    conn.execute(sql)
+                conn.execute('ANALYZE')
+            with_idx = {name: measure(db, sql, params, repeat) for name, sql, params in hot_queries(size)}
+
+            for name in without:
+                speedup = without[name] / with_idx[name] if with_idx[name] > 0 else float('inf')
+                table.add_row(f"{size:,}", name, f"{without[name]:.3f}", f"{with_idx[name]:.3f}", f"{speedup:.1f}x")
+            db.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    console.print(table)
+
+
+def backend_calls(total_games: int):
+    """Métodos da interface de armazenamento: (nome, função(db))"""
+    rng = random.Random(11)
+    start = timestamp_to_us(datetime(2024, 1, 1))
+    span = 30 * total_games * US_PER_SECOND
+    day = 24 * US_PER_HOUR
+
+    def day_range():
+        first = start + rng.randrange(max(1, span - day))
+        return first, first + day
+
+    return [
+        ('get_recent_games(2000)', lambda db: db.get_recent_games(2000)),
+        ('get_games_between (1 dia)', lambda db: db.get_games_between(*day_range())),
+        ('get_hourly_counts (1 dia)', lambda db: db.get_hourly_counts(*day_range())),
+        ('get_spin_codes(10000)', lambda db: db.get_spin_codes(10_000)),
+        ('get_spin_codes (tudo)', lambda db: db.get_spin_codes()),
+        ('get_statistics', lambda db: db.get_statistics()),
+    ]
+
+
+def measure_calls(db, call, repeat: int) -> float:
+    """Retorna a latência mediana (ms) de um método do motor"""
+    samples = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        call(db)
+        samples.append((time.perf_counter() - begin) * 1000)
+    return statistics.median(samples)
+
+
+def run_backend_benchmark(sizes, repeat: int):
+    workdir = tempfile.mkdtemp(prefix='blaze_bench_')
+    engines = ['sqlite', 'memory'] + (['duckdb'] if DUCKDB_AVAILABLE else [])
+    table = Table(title="⏱️ Latência mediana por motor de armazenamento (ms)", box=box.ROUNDED)
+    table.add_column("Jogos", style="cyan", justify="right")
+    table.add_column("Método", style="bold")
+    for engine in engines:
+        table.add_column(engine, style="green", justify="right")
+    if not DUCKDB_AVAILABLE:
+        console.print("[dim]duckdb não instalado: motor analítico fora da comparação[/dim]")
+
+    try:
+        for size in sizes:
+            path = os.path.join(workdir, f'bench_{size}.db')
+            db = Database(path)
+            console.print(f"[dim]Populando {size:,} jogos...[/dim]")
+            populate(db, size)
+            db.rebuild_statistics()
+            backends = {'sqlite': db}
+            load_start = time.perf_counter()
+            backends['memory'] = MemoryDatabase.from_sqlite(path)
+            console.print(f"[dim]memory carregado em {time.perf_counter() - load_start:.2f} s[/dim]")
+            if DUCKDB_AVAILABLE:
+                load_start = time.perf_counter()
+                backends['duckdb'] = AnalyticalDatabase.from_sqlite(path)
+                console.print(f"[dim]duckdb carregado em {time.perf_counter() - load_start:.2f} s[/dim]")
+
+            for name, call in backend_calls(size):
+                table.add_row(f"{size:,}", name,
+                              *(f"{measure_calls(backends[engine], call, repeat):.3f}" for engine in engines))
+            for backend in backends.values():
+                backend.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    console.print(table)
+
+
+def writer_commands(rounds: int):
+    """Comandos do bot em ordem: janela DOM, aposta e resultado a cada rodada"""
+    rng = random.Random(5)
+    window = []
+    for i in range(rounds):
+        number = rng.randrange(15)
+        window.insert(0, {'color': number_to_color(number), 'number': number})
+        del window[10:]
+        yield 'save_games_bulk', (list(window),)
+        yield 'save_bet', (f'bet_{i}', 'red', 1.0, 0.7)
+        yield 'update_bet_result', (f'bet_{i}', window[0]['color'],
+                                    'WIN' if window[0]['color'] == 'red' else 'LOSS')
+
+
+def run_writer_check(sizes, timeout: float = 30.0):
+    workdir = tempfile.mkdtemp(prefix='blaze_writer_')
+    table = Table(title="✍️ WriteBehindWorker por motor de armazenamento", box=box.ROUNDED)
+    table.add_column("Rodadas", style="cyan", justify="right")
+    table.add_column("Motor", style="bold")
+    table.add_column("Comandos", justify="right")
+    table.add_column("Erros", justify="right")
+    table.add_column("Jogos gravados", justify="right")
+    table.add_column("Tempo (ms)", style="green", justify="right")
+    table.add_column("Resultado")
+    failed = False
+
+    try:
+        for size in sizes:
+            path = os.path.join(workdir, f'writer_{size}.db')
+            backends = {'sqlite': Database(path), 'memory': MemoryDatabase()}
+            if DUCKDB_AVAILABLE:
+                # Somente leitura: as escritas devem falhar, nunca ficar pendentes
+                backends['duckdb'] = AnalyticalDatabase.from_sqlite(path)
+
+            for engine, db in backends.items():
+                worker = WriteBehindWorker(db)
+                worker.start()
+                begin = time.perf_counter()
+                futures = [worker.submit(method, *args) for method, args in writer_commands(size)]
+                flushed = worker.flush(timeout=timeout)
+                errors = 0
+                pending = 0
+                for future in futures:
+                    try:
+                        future.result(timeout=0 if flushed else timeout)
+                    except FutureTimeoutError:
+                        pending += 1
+                    except Exception:
+                        errors += 1
+                elapsed = (time.perf_counter() - begin) * 1000
+                worker.stop()
+                games = db.get_statistics()['total_games']
+
+                expected_errors = len(futures) if engine == 'duckdb' else 0
+                ok = flushed and not pending and errors == expected_errors
+                failed |= not ok
+                status = "[green]ok[/green]" if ok else f"[red]falhou ({pending} pendentes)[/red]"
+                table.add_row(f"{size:,}", engine, f"{len(futures):,}", f"{errors:,}", f"{games:,}",
+                              f"{elapsed:.1f}", status)
+            for backend in backends.values():
+                backend.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    console.print(table)
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das consultas quentes do banco")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=200, help="Execuções por consulta")
+    parser.add_argument('--backends', action='store_true',
+                        help="Compara os motores de armazenamento em vez dos índices")
+    parser.add_argument('--writer', action='store_true',
+                        help="Confere o WriteBehindWorker em cada motor de armazenamento")
+    args = parser.parse_args()
+    if args.writer:
+        run_writer_check(args.sizes)
+    elif args.backends:
+        run_backend_benchmark(args.sizes, args.repeat)
+    else:
+        run_benchmark(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
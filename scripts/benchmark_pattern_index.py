@@ -0,0 +1,126 @@
+"""
+Benchmark da busca exata de sequências (PatternIndex)
+
+Para históricos sintéticos (ou o ``games`` de um banco, com ``--db``) mede:
+    - a construção do índice (giros/s)
+    - o acréscimo de um giro novo (como no bot, a cada rodada)
+    - a busca dos últimos k giros (ocorrências + distribuição do giro
+      seguinte) x uma varredura linear do histórico com ``bytes.find``
+    - a listagem de todas as ocorrências
+
+Uso:
+    python scripts/benchmark_pattern_index.py [--sizes 100000 1000000] [--lengths 3 5 7 10 24]
+    python scripts/benchmark_pattern_index.py --db blaze_data.db
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import statistics
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Configura encoding UTF-8 para Windows
+from src.utils.encoding import setup_encoding
+setup_encoding()
+
+from src.analysis import PatternIndex
+from src.database import Database
+from src.utils.roulette import spin_colors
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+console = Console()
+
+
+def median_us(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def linear_scan(colors: bytes, pattern: bytes):
+    """Referência: percorre o histórico inteiro procurando o padrão"""
+    following = [0, 0, 0]
+    occurrences = 0
+    position = colors.find(pattern)
+    while position != -1:
+        occurrences += 1
+        after = position + len(pattern)
+        if after < len(colors):
+            following[colors[after]] += 1
+        position = colors.find(pattern, position + 1)
+    return occurrences, tuple(following)
+
+
+def run_benchmark(label: str, codes: bytes, lengths, repeat: int):
+    start = time.perf_counter()
+    index = PatternIndex(codes[:-1])
+    build_s = time.perf_counter() - start
+    start = time.perf_counter()
+    index.append(codes[-1:])
+    append_us = (time.perf_counter() - start) * 1e6
+    colors = spin_colors(codes)
+
+    console.print(f"\n[bold cyan]{label}: {len(codes):,} giros[/bold cyan] — índice com "
+                  f"{index.colors.states:,} estados em {build_s:.1f} s "
+                  f"({len(codes) / build_s:,.0f} giros/s); giro novo: {append_us:.1f} µs")
+
+    table = Table(box=box.ROUNDED)
+    table.add_column("k", style="cyan", justify="right")
+    table.add_column("Ocorrências", justify="right")
+    table.add_column("Próxima cor (w/r/b)", justify="right")
+    table.add_column("Índice", style="green", justify="right")
+    table.add_column("Varredura", style="red", justify="right")
+    table.add_column("Listar posições", justify="right")
+
+    for length in lengths:
+        match = index.latest(length)
+        if match is None:
+            continue
+        if (match.occurrences, match.following) != linear_scan(colors, match.pattern):
+            console.print(f"[bold red]❌ Resultado divergente da varredura para k={length}[/bold red]")
+        index_us = median_us(lambda: index.latest(length), repeat)
+        scan_us = median_us(lambda: linear_scan(colors, match.pattern), max(1, repeat // 100))
+        positions_us = median_us(lambda: index.positions(match.pattern), max(1, repeat // 100))
+        table.add_row(str(length), f"{match.occurrences:,}", '/'.join(str(c) for c in match.following),
+                      f"{index_us:,.1f} µs", f"{scan_us / 1000:,.1f} ms", f"{positions_us / 1000:,.2f} ms")
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da busca exata de sequências")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[3, 5, 7, 10, 24])
+    parser.add_argument('--repeat', type=int, default=1000, help="Execuções de cada busca no índice")
+    parser.add_argument('--db', help="Usa o histórico de games deste banco em vez de dados sintéticos")
+    args = parser.parse_args()
+
+    if args.db:
+        if not os.path.exists(args.db):
+            console.print(f"[bold red]❌ Banco não encontrado: {args.db}[/bold red]")
+            sys.exit(1)
+        db = Database(args.db)
+        try:
+            codes = db.get_spin_codes()
+        finally:
+            db.close()
+        if len(codes) < 2:
+            console.print("[yellow]⚠️ Histórico insuficiente[/yellow]")
+            return
+        run_benchmark(args.db, codes, args.lengths, args.repeat)
+        return
+
+    rng = random.Random(42)
+    for size in args.sizes:
+        run_benchmark("Sintético", bytes(rng.choices(range(15), k=size)), args.lengths, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
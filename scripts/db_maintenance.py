@@ -0,0 +1,267 @@
+"""
+Comandos de manutenção do banco de dados
+
+Uso:
+    python scripts/db_maintenance.py rebuild-stats
+    python scripts/db_maintenance.py export --out exports/ [--format arrow|parquet]
+    python scripts/db_maintenance.py archive [--granularity day|month] [--hot-days 30] [--dry-run]
+    python scripts/db_maintenance.py backfill --file historico.json [--format auto|json|csv]
+    python scripts/db_maintenance.py backfill --analytics [--rounds 3000]
+    python scripts/db_maintenance.py metrics [--log blaze_data.db.metrics.jsonl] [--last 12]
+    python scripts/db_maintenance.py backup [--dest backups/copia.db] [--pages-per-step 256]
+    python scripts/db_maintenance.py check
+    python scripts/db_maintenance.py vacuum [--pages 512] [--enable]
+"""
+import sys
+import os
+import time
+import argparse
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Configura encoding UTF-8 para Windows
+from src.utils.encoding import setup_encoding
+setup_encoding()
+
+from src.database import Database, ColumnarExporter, Archiver, Backfiller, DatabaseMetrics, DatabaseMaintenance
+from src.database.instrumentation import read_metrics_log
+from src.database.maintenance import format_result
+from src.utils.timestamps import format_us
+from rich.console import Console
+from config import config
+
+console = Console()
+
+
+def cmd_rebuild_stats(db: Database, args):
+    """Recalcula os contadores de estatísticas a partir das tabelas"""
+    start = time.perf_counter()
+    db.rebuild_statistics()
+    elapsed = time.perf_counter() - start
+    stats = db.get_statistics()
+    console.print(f"[bold green]✅ Estatísticas recalculadas em {elapsed*1000:.1f} ms[/bold green]")
+    for key, value in stats.items():
+        console.print(f"  [cyan]{key}[/cyan]: {value}")
+
+
+def cmd_export(db: Database, args):
+    """Acrescenta as linhas novas de games/bets (e o snapshot de patterns) em arquivos colunares"""
+    exporter = ColumnarExporter(db, args.out, fmt=args.format, chunk_rows=args.chunk_rows,
+                                pending_bet_max_age=config.PENDING_BET_MAX_AGE)
+    start = time.perf_counter()
+    exported = exporter.export(tables=args.tables)
+    elapsed = time.perf_counter() - start
+    console.print(f"[bold green]✅ Exportação ({args.format}) concluída em {elapsed:.2f} s[/bold green]")
+    for table, rows in exported.items():
+        console.print(f"  [cyan]{table}[/cyan]: {rows} linhas")
+
+
+def cmd_archive(db: Database, args):
+    """Move as partições encerradas para arquivos e aplica a retenção"""
+    archiver = Archiver(db, args.dir, granularity=args.granularity, hot_days=args.hot_days,
+                        retention_days=args.retention_days)
+    if args.dry_run:
+        pending = archiver.pending_partitions()
+        console.print(f"[bold cyan]{len(pending)} partição(ões) a arquivar[/bold cyan]")
+        for key, start, end in pending:
+            console.print(f"  [cyan]{key}[/cyan]: {format_us(start)} → {format_us(end)}")
+        return
+
+    start = time.perf_counter()
+    result = archiver.run()
+    elapsed = time.perf_counter() - start
+    console.print(f"[bold green]✅ Arquivamento concluído em {elapsed:.2f} s[/bold green]")
+    for partition in result['archived']:
+        console.print(f"  [cyan]{partition['partition']}[/cyan]: {partition['games']} jogos, "
+                      f"{partition['bets']} apostas → {partition['path']}")
+    for key in result['expired']:
+        console.print(f"  [yellow]{key}[/yellow]: removida pela retenção")
+
+
+def _collect_analytics_history(rounds: int, page_size: int) -> list:
+    """Lê o Histórico do modal de analytics (mais recentes primeiro)"""
+    from src.automation import BlazeAutomation
+
+    automation = BlazeAutomation(headless=config.HEADLESS)
+    if not hasattr(automation, 'iter_history_pages'):
+        raise RuntimeError("Backfill pelo modal de analytics requer a automação Playwright (USE_PLAYWRIGHT=true)")
+    records = []
+    try:
+        automation.init_driver()
+        for page in automation.iter_history_pages(rounds=rounds, page_size=page_size):
+            records.extend(page)
+            console.print(f"  [dim]{len(records)} rodadas lidas do modal[/dim]")
+    finally:
+        automation.close()
+    return records
+
+
+def cmd_backfill(db: Database, args):
+    """Importa histórico (modal de analytics ou arquivo) deduplicando contra o banco"""
+    backfiller = Backfiller(db, batch_size=args.batch_size)
+    if args.file:
+        stats = backfiller.import_file(args.file, fmt=args.format)
+    else:
+        records = _collect_analytics_history(args.rounds, args.page_size)
+        stats = backfiller.import_records(records, newest_first=True)
+
+    console.print(f"[bold green]✅ Backfill concluído em {stats.elapsed:.2f} s "
+                  f"({stats.rate:,.0f} registros/s)[/bold green]")
+    console.print(f"  [cyan]lidos[/cyan]: {stats.read}")
+    console.print(f"  [cyan]inseridos[/cyan]: {stats.inserted}")
+    console.print(f"  [cyan]duplicados[/cyan]: {stats.duplicates}")
+    console.print(f"  [cyan]identificados[/cyan]: {stats.identified} (round_id associado a jogo existente)")
+    if stats.invalid:
+        console.print(f"  [yellow]inválidos[/yellow]: {stats.invalid}")
+
+
+def cmd_metrics(db: Database, args):
+    """Resumo do log de métricas: último intervalo e tendência do p95 por método"""
+    if not os.path.exists(args.log):
+        console.print(f"[yellow]Log de métricas não encontrado: {args.log} (habilite DB_METRICS_ENABLED)[/yellow]")
+        return
+    records = read_metrics_log(args.log)[-args.last:]
+    if not records:
+        console.print("[yellow]Log de métricas vazio[/yellow]")
+        return
+    console.print(DatabaseMetrics().format_report(records[-1]), markup=False, highlight=False,
+                  soft_wrap=True)
+
+    console.print(f"\n[bold cyan]p95 (ms) nos últimos {len(records)} intervalos[/bold cyan]")
+    names = sorted({name for record in records for name in record['methods']})
+    for name in names:
+        values = [record['methods'][name]['p95_ms'] for record in records if name in record['methods']]
+        trend = ' '.join(f"{value:.2f}" for value in values)
+        console.print(f"  [cyan]{name}[/cyan]: {trend}")
+    for name in sorted({name for record in records for name in record['locks']}):
+        values = [record['locks'][name]['p95_ms'] for record in records if name in record['locks']]
+        console.print(f"  [magenta]espera {name}[/magenta]: {' '.join(f'{value:.2f}' for value in values)}")
+
+
+def _maintenance(db: Database, args) -> DatabaseMaintenance:
+    return DatabaseMaintenance(db, getattr(args, 'dir', config.DB_BACKUP_DIR),
+                               backup_keep=getattr(args, 'keep', config.DB_BACKUP_KEEP),
+                               pages_per_step=getattr(args, 'pages_per_step', config.DB_BACKUP_PAGES_PER_STEP),
+                               step_sleep=getattr(args, 'sleep', config.DB_BACKUP_STEP_SLEEP),
+                               vacuum_pages=getattr(args, 'pages', config.DB_VACUUM_PAGES))
+
+
+def cmd_backup(db: Database, args):
+    """Backup online em passos (pode rodar com o bot ligado)"""
+    maintenance = _maintenance(db, args)
+    result = maintenance.backup(args.dest, verify=not args.no_verify)
+    color = 'green' if result['ok'] else 'red'
+    console.print(f"[bold {color}]{'✅' if result['ok'] else '❌'} {format_result('backup', result)}[/bold {color}]")
+    if not args.dest:
+        for path in maintenance.prune_backups():
+            console.print(f"  [dim]backup antigo removido: {path}[/dim]")
+
+
+def cmd_check(db: Database, args):
+    """Verificação de integridade (quick_check) sem bloquear o escritor"""
+    result = _maintenance(db, args).quick_check(max_errors=args.max_errors)
+    color = 'green' if result['ok'] else 'red'
+    console.print(f"[bold {color}]{'✅' if result['ok'] else '❌'} {format_result('quick_check', result)}[/bold {color}]")
+    if not result['ok']:
+        sys.exit(2)
+
+
+def cmd_vacuum(db: Database, args):
+    """Vacuum incremental (ou conversão única do banco para auto_vacuum incremental)"""
+    maintenance = _maintenance(db, args)
+    if args.enable:
+        result = maintenance.enable_incremental_vacuum()
+        status = "convertido para" if result['converted'] else "já estava em"
+        console.print(f"[bold green]✅ Banco {status} auto_vacuum INCREMENTAL "
+                      f"({result['pages']} páginas, {result['elapsed']:.2f} s)[/bold green]")
+    result = maintenance.incremental_vacuum()
+    color = 'green' if result['enabled'] else 'yellow'
+    console.print(f"[{color}]{format_result('vacuum', result)}[/{color}]")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Manutenção do banco de dados Blaze Double")
+    parser.add_argument('--db', default=config.DATABASE_PATH, help="Caminho do banco SQLite")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    rebuild = subparsers.add_parser('rebuild-stats', help="Recalcula a tabela statistics do zero")
+    rebuild.set_defaults(func=cmd_rebuild_stats)
+
+    export = subparsers.add_parser('export', help="Exporta o histórico em Arrow IPC/Parquet (incremental)")
+    export.add_argument('--out', default='exports', help="Diretório de saída (mantém _manifest.json)")
+    export.add_argument('--format', choices=('arrow', 'parquet'), default='arrow',
+                        help="arrow: IPC mapeável em memória; parquet: compactado (zstd)")
+    export.add_argument('--chunk-rows', type=int, default=65536, help="Linhas por lote lido/gravado")
+    export.add_argument('--tables', nargs='+', choices=('games', 'bets', 'patterns'),
+                        default=['games', 'bets', 'patterns'])
+    export.set_defaults(func=cmd_export)
+
+    archive = subparsers.add_parser('archive', help="Move dias/meses encerrados para arquivos anexáveis")
+    archive.add_argument('--dir', default=config.ARCHIVE_DIR, help="Diretório dos arquivos de partição")
+    archive.add_argument('--granularity', choices=('day', 'month'), default=config.ARCHIVE_GRANULARITY)
+    archive.add_argument('--hot-days', type=int, default=config.ARCHIVE_HOT_DAYS,
+                         help="Dias mantidos no banco principal")
+    archive.add_argument('--retention-days', type=int, default=config.ARCHIVE_RETENTION_DAYS,
+                         help="Apaga partições encerradas há mais dias que isso (0 = nunca)")
+    archive.add_argument('--dry-run', action='store_true', help="Apenas lista as partições pendentes")
+    archive.set_defaults(func=cmd_archive)
+
+    backfill = subparsers.add_parser('backfill', help="Importa histórico do modal de analytics ou de arquivos")
+    source = backfill.add_mutually_exclusive_group(required=True)
+    source.add_argument('--file', help="Arquivo JSON (lista ou JSON Lines) ou CSV")
+    source.add_argument('--analytics', action='store_true', help="Lê o Histórico do modal de analytics")
+    backfill.add_argument('--format', choices=('auto', 'json', 'csv'), default='auto')
+    backfill.add_argument('--rounds', type=int, choices=(25, 50, 100, 500, 3000), default=3000,
+                          help="Rodadas selecionadas no modal")
+    backfill.add_argument('--page-size', type=int, default=500, help="Itens lidos do modal por página")
+    backfill.add_argument('--batch-size', type=int, default=20000, help="Registros por transação")
+    backfill.set_defaults(func=cmd_backfill)
+
+    metrics = subparsers.add_parser('metrics', help="Resume o log de latência gravado com DB_METRICS_ENABLED")
+    metrics.add_argument('--log', default=config.DB_METRICS_LOG, help="Arquivo JSON Lines de métricas")
+    metrics.add_argument('--last', type=int, default=12, help="Intervalos considerados na tendência")
+    metrics.set_defaults(func=cmd_metrics)
+
+    backup = subparsers.add_parser('backup', help="Backup online pela API de backup do SQLite (bot pode estar rodando)")
+    backup.add_argument('--dest', default=None,
+                        help="Arquivo de destino (padrão: <dir>/<banco>.<AAAAMMDD-HHMMSS>.db, com rotação)")
+    backup.add_argument('--dir', default=config.DB_BACKUP_DIR, help="Diretório dos backups com rotação")
+    backup.add_argument('--keep', type=int, default=config.DB_BACKUP_KEEP, help="Backups mantidos no diretório")
+    backup.add_argument('--pages-per-step', type=int, default=config.DB_BACKUP_PAGES_PER_STEP,
+                        help="Páginas copiadas por passo")
+    backup.add_argument('--sleep', type=float, default=config.DB_BACKUP_STEP_SLEEP,
+                        help="Pausa entre passos (s)")
+    backup.add_argument('--no-verify', action='store_true', help="Não executa quick_check na cópia")
+    backup.set_defaults(func=cmd_backup)
+
+    check = subparsers.add_parser('check', help="PRAGMA quick_check (sai com código 2 se houver erros)")
+    check.add_argument('--max-errors', type=int, default=10, help="Erros listados no máximo")
+    check.set_defaults(func=cmd_check)
+
+    vacuum = subparsers.add_parser('vacuum', help="Vacuum incremental das páginas livres")
+    vacuum.add_argument('--pages', type=int, default=config.DB_VACUUM_PAGES, help="Máximo de páginas liberadas")
+    vacuum.add_argument('--enable', action='store_true',
+                        help="Converte o banco para auto_vacuum INCREMENTAL (VACUUM completo; pare o bot antes)")
+    vacuum.set_defaults(func=cmd_vacuum)
+
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    db = Database(args.db)
+    try:
+        args.func(db, args)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        console.print(f"[bold red]Erro na manutenção do banco de dados: {e}[/bold red]")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
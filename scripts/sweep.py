@@ -0,0 +1,143 @@
+"""
+Varredura de parâmetros do PatternAnalyzer (pesos, lookback e limites de confiança)
+
+Avalia uma grade ou uma busca aleatória de combinações em paralelo (um
+processo por núcleo) sobre o histórico de games, compartilhado entre os
+processos por memória compartilhada, e mostra as melhores combinações.
+
+Uso:
+    python scripts/sweep.py [--db blaze_data.db] --weight-grid 0.1 0.2 0.3 --lookback 5 10 15
+    python scripts/sweep.py --random 5000 --workers 16 --rank-by hit_rate --min-signals 500
+    python scripts/sweep.py --synthetic 1000000 --random 200   # histórico aleatório (mede a vazão)
+"""
+import sys
+import os
+import json
+import random
+import argparse
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Configura encoding UTF-8 para Windows
+from src.utils.encoding import setup_encoding
+setup_encoding()
+
+from src.analysis import NUMPY_AVAILABLE
+from src.analysis.backtest import stream_spin_codes
+from src.analysis.sweep import RANK_METRICS, parameter_grid, random_parameters, rank_results, timed_sweep
+from src.analysis.vectorized import STRATEGIES
+from src.database import DatabaseSnapshot
+from rich.console import Console
+from rich.table import Table
+from rich import box
+from config import config
+
+console = Console()
+
+
+def _percent(value) -> str:
+    return f"{value * 100:.1f}%" if value is not None else "-"
+
+
+def show_results(ranked: list, top: int, rank_by: str):
+    table = Table(title=f"Melhores combinações (por {rank_by})", box=box.ROUNDED)
+    table.add_column("#", style="dim", justify="right")
+    table.add_column("Lookback", justify="right")
+    table.add_column("Pesos (" + "/".join(name[:3] for name, _ in STRATEGIES) + ")")
+    table.add_column("Mín.", justify="right")
+    table.add_column("Sinais", justify="right")
+    table.add_column("Acerto", style="green", justify="right")
+    table.add_column("Lucro", justify="right")
+    table.add_column("Aviso (sinais/acerto)", justify="right")
+    table.add_column("Aposta (sinais/acerto)", justify="right")
+    for position, result in enumerate(ranked[:top], 1):
+        weights = "/".join(f"{result[f'w_{name}']:.2f}" for name, _ in STRATEGIES)
+        profit = result['profit']
+        table.add_row(str(position), str(result['lookback']), weights, f"{result['min_confidence']:.2f}",
+                      f"{result['signals']:,}", _percent(result['hit_rate']),
+                      f"[{'green' if profit >= 0 else 'red'}]{profit:+,.0f}[/]",
+                      f"≥{result['warning_confidence']:.2f}: {result['warning_signals']:,} / "
+                      f"{_percent(result['warning_hit_rate'])}",
+                      f"≥{result['bet_confidence']:.2f}: {result['bet_signals']:,} / "
+                      f"{_percent(result['bet_hit_rate'])}")
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Varredura de parâmetros do PatternAnalyzer")
+    parser.add_argument('--db', default=config.DATABASE_PATH, help="Banco de dados (padrão: config)")
+    parser.add_argument('--no-archives', action='store_true', help="Ignora as partições arquivadas")
+    parser.add_argument('--synthetic', type=int, help="Usa N giros aleatórios em vez do banco")
+    parser.add_argument('--history-size', type=int, default=config.HISTORY_SIZE)
+    parser.add_argument('--lookback', type=int, nargs='+', default=[5, 10, 15, 20])
+    parser.add_argument('--weight-grid', type=float, nargs='+', default=[0.1, 0.2, 0.3],
+                        help="Valores de peso testados para cada estratégia (grade)")
+    parser.add_argument('--min-confidence', type=float, nargs='+', default=[0.5, 0.6, 0.7])
+    parser.add_argument('--warning-confidence', type=float, nargs='+', default=[])
+    parser.add_argument('--bet-confidence', type=float, nargs='+', default=[])
+    parser.add_argument('--random', type=int, help="Busca aleatória com N combinações em vez da grade")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, help="Processos (padrão: todos os núcleos)")
+    parser.add_argument('--batch-size', type=int, default=32, help="Combinações por tarefa")
+    parser.add_argument('--rank-by', choices=RANK_METRICS, default='profit')
+    parser.add_argument('--min-signals', type=int, default=100, help="Descarta combinações com menos sinais")
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--json', help="Grava todas as combinações ordenadas neste arquivo")
+    args = parser.parse_args()
+
+    if not NUMPY_AVAILABLE:
+        console.print("[bold red]numpy não está instalado. Execute: pip install numpy[/bold red]")
+        sys.exit(1)
+
+    if args.synthetic:
+        rng = random.Random(42)
+        codes = bytes(rng.choices(range(15), k=args.synthetic))
+    else:
+        if not os.path.exists(args.db):
+            console.print(f"[bold red]❌ Banco não encontrado: {args.db}[/bold red]")
+            sys.exit(1)
+        archives = not args.no_archives
+        with DatabaseSnapshot(args.db, busy_timeout_ms=config.DB_BUSY_TIMEOUT_MS, archives=archives) as db:
+            if db.partitions:
+                console.print(f"[dim]Partições arquivadas incluídas: {', '.join(db.partitions)}[/dim]")
+            codes = b''.join(stream_spin_codes(db.get_connection(), 'all_games' if archives else 'games'))
+
+    if len(codes) < 2:
+        console.print("[yellow]⚠️ Histórico insuficiente para a varredura[/yellow]")
+        return
+
+    if args.random:
+        params_list = random_parameters(args.random, seed=args.seed, lookbacks=args.lookback)
+    else:
+        params_list = parameter_grid(args.weight_grid, args.lookback, args.min_confidence,
+                                     args.warning_confidence, args.bet_confidence)
+    workers = args.workers or os.cpu_count() or 1
+    console.print(f"[bold cyan]🔎 {len(params_list):,} combinações sobre {len(codes):,} giros "
+                  f"com {workers} processos[/bold cyan]")
+
+    last_reported = [0]
+
+    def progress(done, total):
+        if done - last_reported[0] >= max(1, total // 10) or done == total:
+            last_reported[0] = done
+            console.print(f"[dim]{done:,}/{total:,} combinações avaliadas[/dim]")
+
+    results, elapsed = timed_sweep(codes, params_list, workers=workers, history_size=args.history_size,
+                                   batch_size=args.batch_size, progress=progress)
+    console.print(f"[dim]{len(results):,} combinações em {elapsed:.1f} s "
+                  f"({len(results) / elapsed:,.1f} combinações/s)[/dim]")
+
+    ranked = rank_results(results, by=args.rank_by, min_signals=args.min_signals)
+    if not ranked:
+        console.print(f"[yellow]⚠️ Nenhuma combinação com pelo menos {args.min_signals} sinais[/yellow]")
+    else:
+        show_results(ranked, args.top, args.rank_by)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(ranked, f, indent=2, ensure_ascii=False)
+        console.print(f"[dim]Resultado gravado em {args.json}[/dim]")
+
+
+if __name__ == "__main__":
+    main()
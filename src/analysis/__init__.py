@@ -2,6 +2,17 @@
 Módulo de análise de padrões
 """
 from .pattern_analyzer import PatternAnalyzer
+from .sequence_windows import SequenceWindows
+from .pattern_index import PatternIndex, PatternMatch, SuffixAutomaton
+from .transitions import TransitionTables, load_or_build_tables
+from .backtest import Backtester, BacktestReport
+from .sweep import parameter_grid, random_parameters, rank_results, run_sweep
+from .report import ReportSummary, build_report_summary
+from .vectorized import NUMPY_AVAILABLE, RollingAnalysis, analyze_arrays, rolling_analysis, spin_arrays
 
-__all__ = ['PatternAnalyzer']
+__all__ = ['PatternAnalyzer', 'SequenceWindows', 'PatternIndex', 'PatternMatch', 'SuffixAutomaton',
+           'TransitionTables', 'load_or_build_tables', 'Backtester', 'BacktestReport',
+           'parameter_grid', 'random_parameters', 'rank_results', 'run_sweep',
+           'ReportSummary', 'build_report_summary',
+           'NUMPY_AVAILABLE', 'RollingAnalysis', 'analyze_arrays', 'rolling_analysis', 'spin_arrays']
 
@@ -0,0 +1,312 @@
+"""
+Backtest do ``PatternAnalyzer`` sobre o histórico gravado
+
+Reproduz, posição a posição e sem olhar o futuro, a decisão que o bot
+tomaria depois de cada giro (``BlazeBot.analyze_and_predict``):
+
+    - o analisador vê os últimos ``history_size`` giros (como
+      ``get_game_history_colors(config.HISTORY_SIZE)``) e a previsão só vale
+      com confiança >= ``min_confidence`` (``get_prediction``)
+    - com a busca exata ativa, um padrão exato que passe nos limites tem
+      prioridade, com o índice contendo apenas os giros já ocorridos
+
+O histórico chega em blocos (``stream_spin_codes``): cada bloco é analisado
+de uma vez com ``rolling_analysis`` (idêntico a ``analyze_history`` em cada
+posição), levando os últimos ``history_size`` giros do bloco anterior como
+contexto. Busca exata e tabelas de Markov são alimentadas giro a giro.
+
+Por estratégia são medidos: sinais e cobertura (posições com previsão),
+acertos, calibração da confiança (faixas de 0.1 e ECE) e lucro simulado com
+aposta fixa.
+
+Diferença conhecida: o bot descarta números ausentes antes da análise de
+números; aqui os números ficam alinhados às cores (-1 = desconhecido). Os
+resultados só coincidem quando todos os giros têm número (dados da API).
+"""
+import sqlite3
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from src.analysis.pattern_index import PatternIndex
+from src.analysis.transitions import TransitionTables
+from src.analysis.vectorized import NUMPY_AVAILABLE, STRATEGIES, rolling_analysis, spin_arrays
+from src.utils.roulette import COLOR_NAMES, encode_spin
+from config import config
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+# Multiplicador do Double por cor apostada (o retorno inclui a aposta)
+PAYOUTS = {'white': 14.0, 'red': 2.0, 'black': 2.0}
+CALIBRATION_BINS = 10
+_FETCH_SIZE = 4096
+
+
+def stream_spin_codes(conn: sqlite3.Connection, games_table: str = 'games',
+                      chunk_size: int = 100_000) -> Iterator[bytes]:
+    """Giros codificados de ``games_table`` em ordem cronológica, em blocos de até ``chunk_size``"""
+    cursor = conn.cursor()
+    cursor.arraysize = _FETCH_SIZE
+    cursor.execute(f'SELECT color, number FROM {games_table} ORDER BY timestamp')
+    chunk = bytearray()
+    for rows in iter(cursor.fetchmany, []):
+        for color, number in rows:
+            try:
+                chunk.append(encode_spin(color, number))
+            except ValueError:
+                continue
+        if len(chunk) >= chunk_size:
+            yield bytes(chunk)
+            chunk = bytearray()
+    cursor.close()
+    if chunk:
+        yield bytes(chunk)
+
+
+class StrategyStats:
+    """Sinais, acertos, calibração e lucro de uma estratégia"""
+
+    def __init__(self, name: str, bet_amount: float = 1.0):
+        self.name = name
+        self.bet_amount = bet_amount
+        self.signals = np.zeros(CALIBRATION_BINS, dtype=np.int64)
+        self.hits = np.zeros(CALIBRATION_BINS, dtype=np.int64)
+        self.confidence_sum = np.zeros(CALIBRATION_BINS)
+        self.by_color = np.zeros((3, 2), dtype=np.int64)  # cor prevista -> [sinais, acertos]
+
+    def add(self, prediction, confidence, outcome):
+        """Acumula as posições de um bloco (``prediction`` -1 = sem sinal)"""
+        fired = prediction >= 0
+        prediction = prediction[fired]
+        confidence = confidence[fired]
+        hit = prediction == outcome[fired]
+        bins = np.minimum((confidence * CALIBRATION_BINS).astype(np.int64), CALIBRATION_BINS - 1)
+        self.signals += np.bincount(bins, minlength=CALIBRATION_BINS)
+        self.hits += np.bincount(bins, weights=hit, minlength=CALIBRATION_BINS).astype(np.int64)
+        self.confidence_sum += np.bincount(bins, weights=confidence, minlength=CALIBRATION_BINS)
+        self.by_color[:, 0] += np.bincount(prediction, minlength=3)
+        self.by_color[:, 1] += np.bincount(prediction[hit], minlength=3)
+
+    @property
+    def total_signals(self) -> int:
+        return int(self.signals.sum())
+
+    @property
+    def total_hits(self) -> int:
+        return int(self.hits.sum())
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        return self.total_hits / self.total_signals if self.total_signals else None
+
+    @property
+    def profit(self) -> float:
+        """Lucro com ``bet_amount`` fixo em cada sinal (pagamento de ``PAYOUTS``)"""
+        returned = sum(int(self.by_color[code, 1]) * PAYOUTS[name] for code, name in enumerate(COLOR_NAMES))
+        return (returned - self.total_signals) * self.bet_amount
+
+    def calibration(self) -> List[Dict]:
+        """Por faixa de confiança com sinais: confiança média x taxa de acerto"""
+        return [
+            {'bin': (b / CALIBRATION_BINS, (b + 1) / CALIBRATION_BINS), 'signals': int(self.signals[b]),
+             'confidence': float(self.confidence_sum[b] / self.signals[b]),
+             'hit_rate': float(self.hits[b] / self.signals[b])}
+            for b in range(CALIBRATION_BINS) if self.signals[b]
+        ]
+
+    @property
+    def calibration_error(self) -> Optional[float]:
+        """ECE: média de |confiança média - taxa de acerto| ponderada pelos sinais de cada faixa"""
+        if not self.total_signals:
+            return None
+        return sum(row['signals'] * abs(row['confidence'] - row['hit_rate'])
+                   for row in self.calibration()) / self.total_signals
+
+    def summary(self, positions: int) -> Dict:
+        return {
+            'strategy': self.name,
+            'signals': self.total_signals,
+            'coverage': self.total_signals / positions if positions else 0.0,
+            'hits': self.total_hits,
+            'hit_rate': self.hit_rate,
+            'calibration_error': self.calibration_error,
+            'profit': self.profit,
+            'by_color': {name: {'signals': int(self.by_color[code, 0]), 'hits': int(self.by_color[code, 1])}
+                         for code, name in enumerate(COLOR_NAMES)},
+            'calibration': self.calibration(),
+        }
+
+
+class BacktestReport:
+    """Resultado de um backtest (uma ``StrategyStats`` por estratégia)"""
+
+    def __init__(self, strategies: Dict[str, StrategyStats], positions: int, spins: int, elapsed: float):
+        self.strategies = strategies
+        self.positions = positions
+        self.spins = spins
+        self.elapsed = elapsed
+
+    @property
+    def rounds_per_minute(self) -> float:
+        return self.spins / self.elapsed * 60 if self.elapsed else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'spins': self.spins,
+            'positions': self.positions,
+            'elapsed': self.elapsed,
+            'rounds_per_minute': self.rounds_per_minute,
+            'strategies': [stats.summary(self.positions) for stats in self.strategies.values()],
+        }
+
+
+class Backtester:
+    """Replay do histórico com as mesmas regras de decisão do bot
+
+    Estratégias medidas:
+        - ``bot``: a decisão de ``analyze_and_predict`` (busca exata com
+          prioridade se ``exact_priority``, senão o analisador acima de
+          ``min_confidence``)
+        - ``analyzer``: ``get_prediction`` (confiança combinada >= ``min_confidence``)
+        - ``exact_match``: ``exact_pattern_match`` sozinha
+        - ``markov``: cor mais provável nas tabelas de transição (sem limite de confiança)
+        - cada estratégia de ``analyze_history`` isolada (``sequence``, ``frequency``...)
+    """
+
+    def __init__(self, min_confidence: float = config.MIN_CONFIDENCE,
+                 history_size: int = config.HISTORY_SIZE, lookback: int = 10,
+                 exact_match: bool = True,
+                 exact_priority: bool = config.EXACT_MATCH_ENABLED,
+                 exact_sizes: Optional[List[int]] = None,
+                 exact_min_occurrences: int = config.EXACT_MATCH_MIN_OCCURRENCES,
+                 exact_min_confidence: float = config.EXACT_MATCH_MIN_CONFIDENCE,
+                 markov: bool = config.MARKOV_ENABLED,
+                 markov_min_observations: int = config.MARKOV_MIN_OBSERVATIONS,
+                 bet_amount: float = config.DEFAULT_BET_AMOUNT):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("numpy não está instalado. Execute: pip install numpy")
+        self.min_confidence = min_confidence
+        self.history_size = max(3, history_size)
+        self.lookback = lookback
+        self.exact_match = exact_match
+        self.exact_priority = exact_match and exact_priority
+        # O bot só busca tamanhos que cabem no histórico analisado
+        self.exact_sizes = sorted(size for size in (exact_sizes or config.EXACT_MATCH_SIZES)
+                                  if 0 < size <= self.history_size)
+        self.exact_min_occurrences = exact_min_occurrences
+        self.exact_min_confidence = exact_min_confidence
+        self.markov = markov
+        self.markov_min_observations = markov_min_observations
+        self.bet_amount = bet_amount
+
+    def _new_stats(self) -> Dict[str, StrategyStats]:
+        names = ['bot', 'analyzer']
+        if self.exact_match:
+            names.append('exact_match')
+        if self.markov:
+            names.append('markov')
+        names.extend(name for name, _ in STRATEGIES)
+        return {name: StrategyStats(name, self.bet_amount) for name in names}
+
+    def _exact_prediction(self, index: PatternIndex):
+        """Mesma regra de ``PatternAnalyzer.exact_pattern_match`` sobre o índice atual"""
+        best = None
+        for size in self.exact_sizes:
+            match = index.latest(size)
+            if match is None:
+                break
+            symbol, confidence = match.best()
+            if symbol is None or match.resolved < self.exact_min_occurrences or confidence < self.exact_min_confidence:
+                continue
+            key = (confidence, match.resolved, size)
+            if best is None or key > best[0]:
+                best = (key, symbol)
+        return (best[1], best[0][0]) if best else (-1, 0.0)
+
+    def run(self, chunks: Iterable[bytes], progress=None) -> BacktestReport:
+        """Processa os blocos de giros codificados (ordem cronológica)
+
+        Args:
+            progress: Recebe o total de giros processados após cada bloco
+        """
+        start = time.perf_counter()
+        stats = self._new_stats()
+        index = PatternIndex() if self.exact_match else None
+        tables = TransitionTables(config.MARKOV_COLOR_ORDER, config.MARKOV_NUMBER_ORDER) if self.markov else None
+        carry = b''
+        spins = 0
+        positions = 0
+
+        for chunk in chunks:
+            if not chunk:
+                continue
+            buffer = carry + bytes(chunk)
+            spins += len(chunk)
+            # Posição t prevê o giro t + 1; as do contexto herdado já foram avaliadas
+            first = len(carry) - 1 if carry else 0
+            last = len(buffer) - 2
+            carry = buffer[-self.history_size:]
+            if last < first:
+                continue
+
+            colors, numbers = spin_arrays(buffer)
+            rolling = rolling_analysis(colors, numbers, lookback=self.lookback, history_size=self.history_size)
+            window = slice(first, last + 1)
+            outcome = colors[first + 1:last + 2]
+            positions += len(outcome)
+
+            analyzer_prediction = rolling.prediction[window]
+            analyzer_confidence = rolling.confidence[window]
+            analyzer_prediction = np.where(analyzer_confidence >= self.min_confidence, analyzer_prediction, -1)
+            for name, _ in STRATEGIES:
+                if name in rolling.strategies:
+                    prediction, confidence = rolling.strategies[name]
+                    stats[name].add(prediction[window], confidence[window], outcome)
+            stats['analyzer'].add(analyzer_prediction, analyzer_confidence, outcome)
+
+            bot_prediction, bot_confidence = analyzer_prediction, analyzer_confidence
+            if index is not None or tables is not None:
+                exact, markov = self._replay_incremental(buffer, first, last, index, tables)
+                if exact is not None:
+                    stats['exact_match'].add(*exact, outcome)
+                if exact is not None and self.exact_priority:
+                    # Padrão exato acima de min_confidence tem prioridade (analyze_and_predict)
+                    use_exact = (exact[0] >= 0) & (exact[1] >= self.min_confidence)
+                    bot_prediction = np.where(use_exact, exact[0], bot_prediction)
+                    bot_confidence = np.where(use_exact, exact[1], bot_confidence)
+                if markov is not None:
+                    stats['markov'].add(*markov, outcome)
+            stats['bot'].add(bot_prediction, bot_confidence, outcome)
+            if progress:
+                progress(spins)
+
+        return BacktestReport(stats, positions, spins, time.perf_counter() - start)
+
+    def _replay_incremental(self, buffer: bytes, first: int, last: int,
+                            index: Optional[PatternIndex], tables: Optional[TransitionTables]):
+        """Busca exata e Markov posição a posição (cada giro entra antes de sua previsão)"""
+        count = last - first + 1
+        exact_prediction = np.full(count, -1, dtype=np.int8) if index is not None else None
+        exact_confidence = np.zeros(count) if index is not None else None
+        markov_prediction = np.full(count, -1, dtype=np.int8) if tables is not None else None
+        markov_confidence = np.zeros(count) if tables is not None else None
+        for i, t in enumerate(range(first, last + 1)):
+            code = buffer[t:t + 1]
+            if index is not None:
+                index.append(code)
+                exact_prediction[i], exact_confidence[i] = self._exact_prediction(index)
+            if tables is not None:
+                tables.append(code)
+                result = tables.probabilities('color', min_observations=self.markov_min_observations)
+                if result is not None:
+                    probabilities = result[1]
+                    color = max(range(3), key=probabilities.__getitem__)
+                    markov_prediction[i], markov_confidence[i] = color, probabilities[color]
+        exact = (exact_prediction, exact_confidence) if index is not None else None
+        markov = (markov_prediction, markov_confidence) if tables is not None else None
+        return exact, markov
+
+    def run_codes(self, codes: bytes, chunk_size: int = 100_000) -> BacktestReport:
+        """Backtest sobre giros já em memória (ex.: ``db.get_spin_codes()``)"""
+        return self.run(codes[i:i + chunk_size] for i in range(0, len(codes), chunk_size))
@@ -10,80 +10,75 @@ import os
 # Adiciona o diretório raiz ao path
 root_dir = os.path.join(os.path.dirname(__file__), '..', '..')
 sys.path.insert(0, os.path.abspath(root_dir))
-from src.database.database import Database
+from src.database.storage import StorageBackend
+from src.utils.roulette import COLOR_CODES, COLOR_NAMES
+from src.utils.patterns import pattern_signature
+from src.analysis.sequence_windows import SequenceWindows
+from src.analysis.pattern_index import PatternIndex
+from src.analysis.transitions import TransitionTables, load_or_build_tables, save_tables
+from src.analysis.vectorized import RollingAnalysis, analyze_arrays, rolling_analysis
+from config import config
 
 
 class PatternAnalyzer:
-    def __init__(self, db: Database):
+    def __init__(self, db: StorageBackend):
         self.db = db
+        # Índice de sequências exatas (construído sob demanda por ``build_pattern_index``)
+        self.pattern_index: Optional[PatternIndex] = None
+        # Tabelas de transição de Markov (ver ``load_transition_tables``)
+        self.transitions: Optional[TransitionTables] = None
     
-    def analyze_sequences_collection(self, sequence_length: int = None) -> Dict:
-        """Analisa as sequências coletadas para identificar padrões recorrentes"""
+    def analyze_sequences_collection(self, sequence_length: int = None,
+                                     windows: Optional[SequenceWindows] = None) -> Dict:
+        """Analisa as janelas de sequências do histórico para identificar padrões recorrentes
+        
+        Args:
+            sequence_length: Tamanho das janelas (None = todos de ``config.SEQUENCE_SIZES``)
+            windows: Janelas já carregadas (evita reler ``games`` a cada chamada)
+        """
         try:
-            # Obtém sequências do banco
-            if sequence_length:
-                sequences = self.db.get_sequences_by_length(sequence_length, limit=200)
-            else:
-                # Analisa todas as sequências
-                sequences = self.db.get_all_sequences(limit=500)
-            
-            if not sequences:
-                return {'patterns_found': 0, 'common_patterns': []}
+            lengths = [sequence_length] if sequence_length else list(config.SEQUENCE_SIZES)
+            # Mesmos limites da antiga tabela: 200 por tamanho ou 500 no total
+            per_length = 200 if sequence_length else max(1, 500 // len(lengths))
+            if windows is None:
+                windows = SequenceWindows.from_database(self.db, limit=per_length + max(lengths) - 1)
             
-            # Agrupa sequências por padrão
+            # Agrupa janelas por padrão de cores (bytes de códigos de cor)
             pattern_counts = Counter()
-            pattern_results = {}
+            for length in lengths:
+                pattern_counts.update(windows.pattern_counts(length, limit=per_length))
+            total_sequences = sum(pattern_counts.values())
             
-            for seq_data in sequences:
-                seq = seq_data['sequence']
-                colors = [s.get('color') for s in seq]
-                pattern_str = ''.join(colors)
-                
-                pattern_counts[pattern_str] += 1
-                
-                if pattern_str not in pattern_results:
-                    pattern_results[pattern_str] = {
-                        'pattern': pattern_str,
-                        'length': len(seq),
-                        'count': 0,
-                        'next_colors': []
-                    }
-                
-                pattern_results[pattern_str]['count'] += 1
+            if not total_sequences:
+                return {'patterns_found': 0, 'common_patterns': []}
             
             # Identifica padrões mais comuns
             common_patterns = []
-            for pattern_str, count in pattern_counts.most_common(10):
+            for color_codes, count in pattern_counts.most_common(10):
                 if count >= 2:  # Padrão aparece pelo menos 2 vezes
-                    pattern_info = pattern_results[pattern_str]
-                    
-                    # Analisa qual cor aparece após esse padrão
-                    next_color_counts = Counter()
-                    for seq_data in sequences:
-                        seq = seq_data['sequence']
-                        colors = [s.get('color') for s in seq]
-                        if ''.join(colors) == pattern_str:
-                            # Procura em outras sequências o que vem depois
-                            # (precisa buscar no histórico completo)
-                            pass
-                    
                     common_patterns.append({
-                        'pattern': pattern_str,
-                        'length': pattern_info['length'],
+                        'pattern': ''.join(COLOR_NAMES[c] for c in color_codes),
+                        'length': len(color_codes),
                         'occurrences': count,
-                        'frequency': count / len(sequences) * 100
+                        'frequency': count / total_sequences * 100
                     })
             
             return {
                 'patterns_found': len(common_patterns),
-                'total_sequences': len(sequences),
+                'total_sequences': total_sequences,
                 'common_patterns': common_patterns
             }
         except Exception as e:
             return {'patterns_found': 0, 'common_patterns': [], 'error': str(e)}
     
     def analyze_history(self, history: List[str], lookback: int = 10, numbers: List[int] = None) -> Dict:
-        """Analisa o histórico e identifica padrões (cores e números)"""
+        """Analisa o histórico e identifica padrões (cores e números)
+        
+        Listas curtas (o caso do bot) são analisadas em Python puro, que é mais
+        rápido que o NumPy para janelas de poucos giros. Para históricos já
+        codificados use ``analyze_codes``; para todas as posições de um
+        histórico, ``rolling_analysis`` (resultados idênticos).
+        """
         if len(history) < 3:
             return {'confidence': 0.0, 'prediction': None, 'patterns': []}
         
@@ -141,6 +136,129 @@ class PatternAnalyzer:
             'patterns': patterns
         }
     
+    def analyze_codes(self, colors, numbers=None, lookback: int = 10) -> Dict:
+        """``analyze_history`` sobre arrays cronológicos já codificados (ver ``spin_arrays``)"""
+        return analyze_arrays(colors, numbers, lookback=lookback)
+    
+    def rolling_analysis(self, colors, numbers=None, lookback: int = 10,
+                         history_size: Optional[int] = config.HISTORY_SIZE) -> RollingAnalysis:
+        """Previsão de cada posição de um histórico codificado (ver ``rolling_analysis``)"""
+        return rolling_analysis(colors, numbers, lookback=lookback, history_size=history_size)
+    
+    def build_pattern_index(self, limit: Optional[int] = None, numbers: bool = False) -> PatternIndex:
+        """Indexa os ``limit`` jogos mais recentes de ``games`` (todos se None) para ``exact_pattern_match``
+        
+        Depois de construído, o índice só recebe giros novos por ``observe``.
+        """
+        self.pattern_index = PatternIndex.from_database(self.db, limit or None, numbers=numbers)
+        return self.pattern_index
+    
+    def observe(self, new_rounds: List[Dict]):
+        """Acrescenta ao índice e às tabelas de transição as rodadas novas (da mais antiga para a mais recente)"""
+        if self.pattern_index is not None:
+            self.pattern_index.append_spins(new_rounds)
+        if self.transitions is not None:
+            self.transitions.append_spins(new_rounds)
+    
+    def load_transition_tables(self, path: Optional[str] = None) -> int:
+        """Carrega as tabelas de ``path`` e incorpora os jogos novos (ou recalcula do banco)
+        
+        Returns:
+            Jogos lidos do banco
+        """
+        self.transitions, read = load_or_build_tables(self.db, path, config.MARKOV_COLOR_ORDER,
+                                                      config.MARKOV_NUMBER_ORDER)
+        return read
+    
+    def save_transition_tables(self, path: str):
+        """Persiste as tabelas de transição (com a marca d'água do último jogo)"""
+        if self.transitions is not None:
+            save_tables(path, self.transitions)
+    
+    def _transition_probabilities(self, by: str, context, order: Optional[int],
+                                  min_observations: int, labels) -> Optional[Dict]:
+        if self.transitions is None:
+            self.load_transition_tables()
+        result = self.transitions.probabilities(by, order, context, min_observations)
+        if result is None:
+            return None
+        used_order, probabilities, observations = result
+        return {
+            'order': used_order,
+            'observations': observations,
+            'probabilities': dict(zip(labels, probabilities))
+        }
+    
+    def next_color_probabilities(self, history: Optional[List[str]] = None, order: Optional[int] = None,
+                                 min_observations: int = config.MARKOV_MIN_OBSERVATIONS) -> Optional[Dict]:
+        """P(próxima cor | últimas ``order`` cores) pelas tabelas de transição
+        
+        Sem ``history``, usa o contexto dos últimos giros incorporados (leitura
+        O(1)); ``history`` vem do mais recente para o mais antigo. Sem
+        ``order``, usa a maior ordem com ``min_observations`` observações.
+        
+        Returns:
+            {'order', 'observations', 'probabilities': {cor: probabilidade}}
+        """
+        return self._transition_probabilities('color', history, order, min_observations, COLOR_NAMES)
+    
+    def next_number_probabilities(self, numbers: Optional[List[int]] = None, order: Optional[int] = None,
+                                  min_observations: int = config.MARKOV_MIN_OBSERVATIONS) -> Optional[Dict]:
+        """P(próximo número | últimos ``order`` números); mesmo formato de ``next_color_probabilities``"""
+        return self._transition_probabilities('number', numbers, order, min_observations, range(15))
+    
+    def exact_pattern_match(self, current_sequence: List[str],
+                            lookback_sizes: Optional[List[int]] = None,
+                            min_occurrences: int = config.EXACT_MATCH_MIN_OCCURRENCES,
+                            min_confidence: float = config.EXACT_MATCH_MIN_CONFIDENCE) -> Optional[Dict]:
+        """Busca os últimos N giros no histórico inteiro e prevê pela cor que mais os seguiu
+        
+        Cada tamanho custa O(N) no índice, independente do tamanho do histórico.
+        
+        Args:
+            current_sequence: Sequência atual de cores (mais recente primeiro)
+            lookback_sizes: Tamanhos de sequências para buscar (padrão: ``config.EXACT_MATCH_SIZES``)
+            min_occurrences: Mínimo de ocorrências (já seguidas de um giro) para considerar o padrão
+            min_confidence: Proporção mínima da cor seguinte mais frequente
+        
+        Returns:
+            O padrão de maior confiança entre os tamanhos que passaram nos limites:
+            {'type', 'prediction', 'confidence', 'occurrences', 'pattern', 'size', 'distribution'}
+        """
+        sizes = [size for size in (lookback_sizes or config.EXACT_MATCH_SIZES) if size > 0]
+        if not sizes or not current_sequence:
+            return None
+        if self.pattern_index is None:
+            self.build_pattern_index()
+        
+        try:
+            recent = bytes(COLOR_CODES[color] for color in reversed(current_sequence[:max(sizes)]))
+        except KeyError:
+            return None
+        
+        best = None
+        for size in sizes:
+            if size > len(recent):
+                continue
+            match = self.pattern_index.match(recent[-size:])
+            symbol, confidence = match.best()
+            if symbol is None or match.resolved < min_occurrences or confidence < min_confidence:
+                continue
+            candidate = {
+                'type': 'exact_match',
+                'prediction': COLOR_NAMES[symbol],
+                'confidence': confidence,
+                'occurrences': match.resolved,
+                'pattern': ''.join(COLOR_NAMES[c] for c in match.pattern),
+                'size': size,
+                'distribution': dict(zip(COLOR_NAMES, match.following))
+            }
+            # Maior confiança; no empate, mais ocorrências e depois o padrão mais longo
+            if best is None or ((confidence, match.resolved, size) >
+                                (best['confidence'], best['occurrences'], best['size'])):
+                best = candidate
+        return best
+    
     def _analyze_number_patterns(self, numbers: List[int], colors: List[str], lookback: int) -> Optional[Dict]:
         """Analisa padrões relacionados a números"""
         if len(numbers) < 3 or len(colors) < 3:
@@ -305,6 +423,18 @@ class PatternAnalyzer:
         
         return None
     
+    def get_pattern_hit_rates(self, patterns: List[Dict]) -> Dict[str, Optional[float]]:
+        """Taxa de acerto histórica de cada padrão (chave: assinatura canônica)
+        
+        Padrões nunca apostados retornam None.
+        """
+        signatures = [pattern_signature(p.get('type', 'unknown'), p) for p in patterns]
+        stats = self.db.get_pattern_stats(signatures)
+        return {
+            signature: stats[signature]['success_rate'] if signature in stats else None
+            for signature in signatures
+        }
+    
     def validate_signal(self, prediction: str, confidence: float, min_confidence: float = 0.6) -> bool:
         """Valida se um sinal é válido para apostar"""
         if not prediction:
@@ -0,0 +1,340 @@
+"""
+Motor de relatório: todos os agregados do banco em uma passada por tabela
+
+Em vez de cada seção do relatório executar suas próprias consultas
+COUNT/SUM/GROUP BY, ``build_report_summary`` percorre ``games`` e ``bets``
+uma única vez (em streaming, na ordem do rowid) e acumula tudo em um
+``ReportSummary`` que as seções apenas renderizam.
+
+Com um arquivo de checkpoint, os agregados e a marca d'água (último rowid
+processado de cada tabela) são persistidos: a execução seguinte lê apenas
+as linhas novas.
+
+A ordem do rowid só é usada para retomar a leitura: os últimos jogos e o
+histórico codificado (janelas de sequência) seguem a ordem de timestamp.
+Quando uma linha chega fora dessa ordem (jogos importados pelo backfill ou
+linhas antigas), ambos são refeitos com uma leitura ordenada por timestamp.
+"""
+import base64
+import json
+import os
+import sqlite3
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.roulette import encode_spin
+from src.utils.timestamps import US_PER_SECOND, format_us, local_hour, now_us, timestamp_to_us
+from config import config
+
+
+RECENT_GAMES = 30
+RECENT_BETS = 20
+CHECKPOINT_VERSION = 2
+_FETCH_SIZE = 4096
+
+
+class ReportSummary:
+    """Agregados de ``games``/``bets`` acumulados linha a linha"""
+
+    # Atributos escalares persistidos no checkpoint (os demais são tratados em to_dict)
+    _STATE = (
+        'total_games', 'first_game_us', 'last_game_us', 'number_sum', 'number_min', 'number_max',
+        'total_bets', 'wins', 'losses', 'total_bet_amount', 'total_winnings', 'by_predicted_color',
+        'games_hwm', 'games_hwm_key', 'bets_hwm', 'bets_hwm_key',
+    )
+
+    def __init__(self):
+        # games
+        self.total_games = 0
+        # Microssegundos desde a época (ver first_game/last_game)
+        self.first_game_us: Optional[int] = None
+        self.last_game_us: Optional[int] = None
+        self.color_counts: Counter = Counter()
+        self.number_counts: Counter = Counter()
+        self.number_sum = 0
+        self.number_min: Optional[int] = None
+        self.number_max: Optional[int] = None
+        self.hourly_counts: Counter = Counter()
+        self.recent_games = deque(maxlen=RECENT_GAMES)  # (color, number, timestamp_us)
+        self.spin_codes = bytearray()  # histórico codificado (ver SequenceWindows)
+
+        # bets
+        self.total_bets = 0
+        self.wins = 0
+        self.losses = 0
+        self.total_bet_amount = 0.0
+        self.total_winnings = 0.0
+        # cor prevista -> [total, vitórias, soma da confiança, qtd. com confiança]
+        self.by_predicted_color: Dict[str, List[float]] = {}
+        self.recent_bets = deque(maxlen=RECENT_BETS)
+
+        # patterns (tabela já agregada por assinatura)
+        self.patterns: List[Tuple[str, int, Optional[float]]] = []
+
+        # Marcas d'água: último rowid incorporado e a chave da linha correspondente
+        # (detecta banco substituído ou linhas removidas desde o checkpoint)
+        self.games_hwm = 0
+        self.games_hwm_key: Optional[str] = None
+        self.bets_hwm = 0
+        self.bets_hwm_key: Optional[str] = None
+
+        # Execução atual (não persistido)
+        self.out_of_order = False  # jogo com timestamp anterior ao último já incorporado
+        self.incremental = False
+        self.new_games = 0
+        self.new_bets = 0
+        self.elapsed = 0.0
+
+    def add_game(self, color: str, number: Optional[int], timestamp):
+        self.total_games += 1
+        self.color_counts[color] += 1
+        if number is not None:
+            self.number_counts[number] += 1
+            self.number_sum += number
+            self.number_min = number if self.number_min is None else min(self.number_min, number)
+            self.number_max = number if self.number_max is None else max(self.number_max, number)
+        timestamp = timestamp_to_us(timestamp)
+        if self.last_game_us is not None and (timestamp is None or timestamp < self.last_game_us):
+            self.out_of_order = True
+        if timestamp is not None:
+            if self.first_game_us is None or timestamp < self.first_game_us:
+                self.first_game_us = timestamp
+            if self.last_game_us is None or timestamp > self.last_game_us:
+                self.last_game_us = timestamp
+            self.hourly_counts['%02d' % local_hour(timestamp)] += 1
+        self.recent_games.append((color, number, timestamp))
+        try:
+            self.spin_codes.append(encode_spin(color, number))
+        except ValueError:
+            pass
+
+    def reload_ordered_games(self, conn: sqlite3.Connection, games_table: str = 'games'):
+        """Refaz ``recent_games`` e ``spin_codes`` em ordem de timestamp (ver ``out_of_order``)"""
+        self.recent_games.clear()
+        self.spin_codes = bytearray()
+        cursor = conn.cursor()
+        cursor.arraysize = _FETCH_SIZE
+        cursor.execute(f'SELECT color, number, timestamp FROM {games_table} ORDER BY timestamp, id')
+        for rows in iter(cursor.fetchmany, []):
+            for color, number, timestamp in rows:
+                self.recent_games.append((color, number, timestamp_to_us(timestamp)))
+                try:
+                    self.spin_codes.append(encode_spin(color, number))
+                except ValueError:
+                    pass
+        cursor.close()
+
+    def add_bet(self, predicted: str, actual: Optional[str], result: Optional[str],
+                confidence: Optional[float], amount: Optional[float], timestamp):
+        self.total_bets += 1
+        self.total_bet_amount += amount or 0.0
+        if result == 'WIN':
+            self.wins += 1
+            self.total_winnings += (amount or 0.0) * 2
+        elif result == 'LOSS':
+            self.losses += 1
+        if result is not None:
+            entry = self.by_predicted_color.setdefault(predicted, [0, 0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += result == 'WIN'
+            if confidence is not None:
+                entry[2] += confidence
+                entry[3] += 1
+        self.recent_bets.append((predicted, actual, result, confidence, amount, timestamp_to_us(timestamp)))
+
+    def to_dict(self) -> Dict:
+        """Estado serializável em JSON (ver ``save_checkpoint``)"""
+        state = {name: getattr(self, name) for name in self._STATE}
+        state.update({
+            'version': CHECKPOINT_VERSION,
+            'color_counts': dict(self.color_counts),
+            'number_counts': {str(number): count for number, count in self.number_counts.items()},
+            'hourly_counts': dict(self.hourly_counts),
+            'recent_games': list(self.recent_games),
+            'recent_bets': list(self.recent_bets),
+            'spin_codes': base64.b64encode(bytes(self.spin_codes)).decode('ascii'),
+        })
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'ReportSummary':
+        summary = cls()
+        for name in cls._STATE:
+            setattr(summary, name, state[name])
+        summary.color_counts = Counter(state['color_counts'])
+        summary.number_counts = Counter({int(number): count for number, count in state['number_counts'].items()})
+        summary.hourly_counts = Counter(state['hourly_counts'])
+        summary.recent_games.extend(tuple(game) for game in state['recent_games'])
+        summary.recent_bets.extend(tuple(bet) for bet in state['recent_bets'])
+        summary.spin_codes = bytearray(base64.b64decode(state['spin_codes']))
+        return summary
+
+    def matches(self, conn: sqlite3.Connection, games_table: str = 'games', bets_table: str = 'bets') -> bool:
+        """Confere se o banco ainda contém exatamente as linhas já incorporadas"""
+        checks = (
+            (games_table, self.games_hwm, self.games_hwm_key, self.total_games, "game_id"),
+            (bets_table, self.bets_hwm, self.bets_hwm_key, self.total_bets, "IFNULL(game_id, '') || '|' || timestamp"),
+        )
+        for table, hwm, key, count, key_sql in checks:
+            if not hwm:
+                if count:
+                    return False
+                continue
+            row = conn.execute(f'SELECT {key_sql} FROM {table} WHERE id = ?', (hwm,)).fetchone()
+            if row is None or row[0] != key:
+                return False
+            if conn.execute(f'SELECT COUNT(*) FROM {table} WHERE id <= ?', (hwm,)).fetchone()[0] != count:
+                return False
+        return True
+
+    @property
+    def first_game(self) -> Optional[str]:
+        return format_us(self.first_game_us)
+
+    @property
+    def last_game(self) -> Optional[str]:
+        return format_us(self.last_game_us)
+
+    @property
+    def win_rate(self) -> float:
+        return (self.wins / self.total_bets * 100) if self.total_bets > 0 else 0.0
+
+    @property
+    def total_profit(self) -> float:
+        return self.total_winnings - self.total_bet_amount
+
+    @property
+    def number_average(self) -> Optional[float]:
+        total = sum(self.number_counts.values())
+        return self.number_sum / total if total else None
+
+    def color_distribution(self) -> List[Tuple[str, int]]:
+        return self.color_counts.most_common()
+
+    def top_numbers(self, limit: int = 10) -> List[Tuple[int, int]]:
+        return self.number_counts.most_common(limit)
+
+    def hourly_distribution(self) -> List[Tuple[str, int]]:
+        return sorted(self.hourly_counts.items())
+
+    def accuracy_by_color(self) -> List[Tuple[str, int, int, Optional[float]]]:
+        """(cor prevista, total, vitórias, confiança média) das apostas resolvidas"""
+        return [
+            (color, int(total), int(wins), conf_sum / conf_n if conf_n else None)
+            for color, (total, wins, conf_sum, conf_n) in self.by_predicted_color.items()
+        ]
+
+    def last_games(self) -> List[Tuple]:
+        """Jogos mais recentes primeiro (timestamp formatado)"""
+        return [(color, number, format_us(timestamp)) for color, number, timestamp in reversed(self.recent_games)]
+
+    def last_bets(self) -> List[Tuple]:
+        """Apostas mais recentes primeiro (timestamp formatado)"""
+        return [bet[:5] + (format_us(bet[5]),) for bet in reversed(self.recent_bets)]
+
+
+def load_checkpoint(path: str) -> Optional[ReportSummary]:
+    """Carrega um checkpoint (None se ausente, corrompido ou de outra versão)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') != CHECKPOINT_VERSION:
+            return None
+        return ReportSummary.from_dict(state)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_checkpoint(path: str, summary: ReportSummary):
+    """Grava o checkpoint de forma atômica (arquivo temporário + rename)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(summary.to_dict(), f)
+    os.replace(tmp_path, path)
+
+
+def build_report_summary(conn: sqlite3.Connection, checkpoint_path: Optional[str] = None,
+                         full: bool = False, games_table: str = 'games',
+                         bets_table: str = 'bets') -> ReportSummary:
+    """Calcula o ``ReportSummary`` com uma passada por ``games`` e uma por ``bets``
+
+    Args:
+        conn: Conexão (idealmente um snapshot somente leitura)
+        checkpoint_path: Arquivo de agregados persistidos; se válido, apenas
+            as linhas após a marca d'água são lidas
+        full: Ignora o checkpoint e recalcula tudo (o checkpoint é regravado)
+        games_table/bets_table: Tabelas ou views lidas (``all_games``/``all_bets``
+            incluem as partições arquivadas, ver ``DatabaseSnapshot(archives=True)``)
+    """
+    start = time.perf_counter()
+    summary = None
+    if checkpoint_path and not full:
+        summary = load_checkpoint(checkpoint_path)
+        if summary is not None and not summary.matches(conn, games_table, bets_table):
+            summary = None
+    incremental = summary is not None
+    if summary is None:
+        summary = ReportSummary()
+    summary.incremental = incremental
+
+    cursor = conn.cursor()
+    cursor.arraysize = _FETCH_SIZE
+    cursor.execute(f'''
+        SELECT id, game_id, color, number, timestamp
+        FROM {games_table}
+        WHERE id > ?
+        ORDER BY id
+    ''', (summary.games_hwm,))
+    for rows in iter(cursor.fetchmany, []):
+        for row_id, game_id, color, number, timestamp in rows:
+            summary.add_game(color, number, timestamp)
+            summary.new_games += 1
+        summary.games_hwm, summary.games_hwm_key = row_id, game_id
+    if summary.out_of_order:
+        summary.reload_ordered_games(conn, games_table)
+
+    # Apostas ainda sem resultado (e as seguintes) não entram no checkpoint, por
+    # mais antigas que sejam em id: a marca d'água para antes da primeira delas
+    # e a próxima execução as relê (ver ``config.PENDING_BET_MAX_AGE``)
+    first_pending = cursor.execute(f'''
+        SELECT MIN(id) FROM {bets_table}
+        WHERE id > ? AND result IS NULL AND timestamp >= ?
+    ''', (summary.bets_hwm, now_us() - config.PENDING_BET_MAX_AGE * US_PER_SECOND)).fetchone()[0]
+    cursor.execute(f'''
+        SELECT id, game_id, timestamp, predicted_color, actual_color, result, confidence, bet_amount
+        FROM {bets_table}
+        WHERE id > ?
+        ORDER BY id
+    ''', (summary.bets_hwm,))
+    pending = []
+    for rows in iter(cursor.fetchmany, []):
+        for row_id, game_id, timestamp, predicted, actual, result, confidence, amount in rows:
+            bet = (predicted, actual, result, confidence, amount, timestamp)
+            if first_pending is not None and row_id >= first_pending:
+                pending.append(bet)
+                continue
+            summary.add_bet(*bet)
+            summary.new_bets += 1
+            summary.bets_hwm, summary.bets_hwm_key = row_id, f"{game_id or ''}|{timestamp}"
+
+    if checkpoint_path:
+        save_checkpoint(checkpoint_path, summary)
+    for bet in pending:
+        summary.add_bet(*bet)
+        summary.new_bets += 1
+
+    summary.patterns = cursor.execute('''
+        SELECT
+            pattern_type,
+            SUM(occurrences) as count,
+            CASE WHEN SUM(wins + losses) > 0
+                 THEN SUM(wins) * 1.0 / SUM(wins + losses) END as avg_success
+        FROM patterns
+        GROUP BY pattern_type
+        ORDER BY count DESC
+    ''').fetchall()
+    cursor.close()
+
+    summary.elapsed = time.perf_counter() - start
+    return summary
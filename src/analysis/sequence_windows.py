@@ -0,0 +1,131 @@
+"""
+Janelas de sequências derivadas do histórico de jogos
+
+Toda janela de tamanho N é uma fatia contígua do histórico ordenado, então
+não precisa ser gravada: é calculada sob demanda a partir de ``games`` (ou
+de um array de giros codificados em memória, 1 byte por giro - ver
+``src.utils.roulette``).
+"""
+from collections import Counter
+from typing import Dict, Iterable, Iterator, Optional
+
+from src.utils.roulette import encode_spin, spin_colors
+
+
+class SequenceWindows:
+    """Visão de todas as janelas deslizantes sobre um histórico codificado.
+
+    O histórico fica em ordem cronológica (mais antigo primeiro). A janela
+    mais recente de tamanho N é ``codes[-N:]``; a de índice ``i`` (0 = mais
+    antiga) é ``codes[i:i + N]``. Novos giros entram com ``append``.
+    """
+
+    def __init__(self, codes: bytes = b''):
+        self._codes = bytearray(codes)
+        self._colors: Optional[bytes] = None
+
+    @classmethod
+    def from_database(cls, db, limit: Optional[int] = None) -> 'SequenceWindows':
+        """Carrega os ``limit`` jogos mais recentes de ``games`` (todos se None)"""
+        return cls(db.get_spin_codes(limit))
+
+    @classmethod
+    def from_spins(cls, spins: Iterable[Dict]) -> 'SequenceWindows':
+        """Constrói a partir de dicts {'color', 'number'} em ordem cronológica"""
+        windows = cls()
+        windows.append_spins(spins)
+        return windows
+
+    def append(self, codes: bytes):
+        """Acrescenta giros já codificados (do mais antigo ao mais recente)"""
+        if codes:
+            self._codes.extend(codes)
+            self._colors = None
+
+    def append_spins(self, spins: Iterable[Dict]):
+        """Acrescenta giros no formato dict, ignorando os inválidos"""
+        codes = bytearray()
+        for spin in spins:
+            try:
+                codes.append(encode_spin(spin.get('color'), spin.get('number')))
+            except ValueError:
+                continue
+        self.append(codes)
+
+    @property
+    def codes(self) -> bytes:
+        return bytes(self._codes)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def count(self, length: int) -> int:
+        """Quantidade de janelas de um tamanho"""
+        if length <= 0:
+            return 0
+        return max(0, len(self._codes) - length + 1)
+
+    def window(self, length: int, index: int = -1) -> bytes:
+        """Janela de índice ``index`` (negativo conta a partir da mais recente)"""
+        total = self.count(length)
+        if index < 0:
+            index += total
+        if not 0 <= index < total:
+            raise IndexError(f"Janela {index} inexistente para tamanho {length}")
+        return bytes(self._codes[index:index + length])
+
+    def latest(self, length: int) -> Optional[bytes]:
+        """Janela mais recente do tamanho pedido (None se o histórico for menor)"""
+        return self.window(length) if self.count(length) else None
+
+    def windows(self, length: int, limit: Optional[int] = None,
+                newest_first: bool = True) -> Iterator[bytes]:
+        """Itera as janelas de um tamanho (no máximo ``limit``, as mais recentes)"""
+        yield from self._iter(self._codes, length, limit, newest_first)
+
+    def color_windows(self, length: int, limit: Optional[int] = None,
+                      newest_first: bool = True) -> Iterator[bytes]:
+        """Como ``windows``, mas com códigos de cor (0=white, 1=red, 2=black)"""
+        if self._colors is None:
+            self._colors = spin_colors(self._codes)
+        yield from self._iter(self._colors, length, limit, newest_first)
+
+    def pattern_counts(self, length: int, limit: Optional[int] = None) -> Counter:
+        """Contagem de padrões de cor entre as ``limit`` janelas mais recentes"""
+        return Counter(self.color_windows(length, limit))
+
+    def statistics(self, lengths: Iterable[int]) -> Dict:
+        """Mesmo formato de ``Database.get_sequence_statistics``"""
+        by_length = {length: self.count(length) for length in sorted(set(lengths))}
+        by_length = {length: count for length, count in by_length.items() if count}
+        return {
+            'total_sequences': sum(by_length.values()),
+            'by_length': by_length
+        }
+
+    def materialize(self, db, lengths: Iterable[int], limit: Optional[int] = None) -> int:
+        """Grava na tabela ``sequences`` as janelas dos tamanhos informados.
+
+        Compatibilidade para consumidores que ainda leem a tabela; use
+        apenas para os tamanhos realmente consultados.
+
+        Returns:
+            Quantidade de janelas enviadas ao banco (duplicadas são ignoradas)
+        """
+        total = 0
+        for length in lengths:
+            blobs = list(self.windows(length, limit))
+            if blobs:
+                db.save_sequence_blobs(length, blobs)
+                total += len(blobs)
+        return total
+
+    @staticmethod
+    def _iter(buffer, length: int, limit: Optional[int], newest_first: bool) -> Iterator[bytes]:
+        total = max(0, len(buffer) - length + 1) if length > 0 else 0
+        if limit is not None:
+            total = min(total, max(0, limit))
+        end = len(buffer) - length + 1
+        starts = range(end - 1, end - 1 - total, -1) if newest_first else range(end - total, end)
+        for start in starts:
+            yield bytes(buffer[start:start + length])
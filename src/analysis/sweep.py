@@ -0,0 +1,198 @@
+"""
+Varredura paralela dos parâmetros do ``PatternAnalyzer``
+
+Parâmetros varridos (os demais seguem o bot):
+
+    - pesos da confiança combinada de ``analyze_history`` (``STRATEGIES``)
+    - ``lookback`` das estratégias
+    - ``min_confidence`` (``config.MIN_CONFIDENCE``: quando o bot aposta)
+    - limites do Telegram (``TELEGRAM_WARNING_CONFIDENCE`` e
+      ``TELEGRAM_BET_CONFIDENCE``): medidos como sinais e acerto acima de cada um
+
+O histórico codificado (1 byte por giro) é copiado uma única vez para um
+bloco de memória compartilhada; cada processo do pool o lê sem cópia nem
+pickle. As tarefas são lotes de combinações com o mesmo ``lookback``: o
+processo calcula ``rolling_analysis`` uma vez por ``lookback`` (cache) e
+avalia cada combinação só recombinando as estratégias (``combine_strategies``),
+o que é barato. Busca exata e Markov não entram (não dependem destes parâmetros).
+"""
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.analysis.backtest import PAYOUTS
+from src.analysis.vectorized import NUMPY_AVAILABLE, STRATEGIES, combine_strategies, rolling_analysis, spin_arrays
+from src.utils.roulette import COLOR_NAMES
+from config import config
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+RANK_METRICS = ('profit', 'hit_rate', 'roi', 'signals')
+_PAYOUT_BY_CODE = [PAYOUTS[name] for name in COLOR_NAMES]
+
+# Estado de cada processo do pool (preenchido por ``_init_worker``)
+_WORKER: Dict = {}
+
+
+def default_parameters() -> Dict:
+    """Combinação atual do bot (ponto de referência da varredura)"""
+    params = {'lookback': 10, 'min_confidence': config.MIN_CONFIDENCE,
+              'warning_confidence': config.TELEGRAM_WARNING_CONFIDENCE,
+              'bet_confidence': config.TELEGRAM_BET_CONFIDENCE}
+    params.update({f'w_{name}': weight for name, weight in STRATEGIES})
+    return params
+
+
+def parameter_grid(weights: Sequence[float], lookbacks: Sequence[int], min_confidences: Sequence[float],
+                   warning_confidences: Sequence[float] = (), bet_confidences: Sequence[float] = ()) -> List[Dict]:
+    """Produto cartesiano (pesos: cada estratégia recebe cada valor de ``weights``)"""
+    base = default_parameters()
+    warning_confidences = warning_confidences or [base['warning_confidence']]
+    bet_confidences = bet_confidences or [base['bet_confidence']]
+    names = [name for name, _ in STRATEGIES]
+    grid = []
+    for combo in itertools.product(lookbacks, min_confidences, warning_confidences, bet_confidences,
+                                   *[weights] * len(names)):
+        lookback, min_confidence, warning, bet = combo[:4]
+        params = {'lookback': lookback, 'min_confidence': min_confidence,
+                  'warning_confidence': warning, 'bet_confidence': bet}
+        params.update({f'w_{name}': weight for name, weight in zip(names, combo[4:])})
+        grid.append(params)
+    return grid
+
+
+def random_parameters(count: int, seed: int = 42, lookbacks: Sequence[int] = (5, 10, 15, 20),
+                      weight_range=(0.0, 0.5), confidence_range=(0.2, 0.9)) -> List[Dict]:
+    """Busca aleatória: pesos e limites uniformes nos intervalos, ``lookback`` sorteado"""
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(count):
+        thresholds = sorted(rng.uniform(*confidence_range) for _ in range(3))
+        params = {'lookback': rng.choice(list(lookbacks)), 'min_confidence': round(thresholds[0], 3),
+                  'warning_confidence': round(thresholds[1], 3), 'bet_confidence': round(thresholds[2], 3)}
+        params.update({f'w_{name}': round(rng.uniform(*weight_range), 3) for name, _ in STRATEGIES})
+        samples.append(params)
+    return samples
+
+
+def evaluate(strategies: Dict, prediction, outcome, params: Dict) -> Dict:
+    """Métricas de uma combinação sobre as estratégias já calculadas
+
+    ``prediction``/``outcome``: previsão combinada e cor real do giro seguinte
+    de cada posição avaliada.
+    """
+    weights = {name: params[f'w_{name}'] for name, _ in STRATEGIES if f'w_{name}' in params}
+    _, confidence = combine_strategies(strategies, weights)
+    fired = prediction >= 0
+    hit = fired & (prediction == outcome)
+    result = dict(params)
+    positions = len(outcome)
+    for prefix, threshold in (('', params['min_confidence']), ('warning_', params['warning_confidence']),
+                              ('bet_', params['bet_confidence'])):
+        signal = fired & (confidence >= threshold)
+        signals = int(np.count_nonzero(signal))
+        hits = int(np.count_nonzero(hit & signal))
+        result[f'{prefix}signals'] = signals
+        result[f'{prefix}hit_rate'] = hits / signals if signals else None
+        if not prefix:
+            returned = sum(int(np.count_nonzero(hit & signal & (prediction == code))) * payout
+                           for code, payout in enumerate(_PAYOUT_BY_CODE))
+            result['coverage'] = signals / positions if positions else 0.0
+            result['profit'] = returned - signals
+            result['roi'] = result['profit'] / signals if signals else None
+    return result
+
+
+# ===== Processos do pool =====
+def _init_worker(shm_name: str, size: int, history_size: int):
+    # O resource_tracker é o do processo principal, que remove o bloco ao final
+    shm = shared_memory.SharedMemory(name=shm_name)
+    codes = np.frombuffer(shm.buf, dtype=np.uint8, count=size)
+    colors, numbers = spin_arrays(codes)
+    _WORKER.update(shm=shm, colors=colors, numbers=numbers, history_size=history_size, cache={})
+
+
+def _strategies_for(lookback: int):
+    """``rolling_analysis`` do histórico compartilhado (guarda só o último ``lookback``)"""
+    cache = _WORKER['cache']
+    if lookback not in cache:
+        cache.clear()
+        colors = _WORKER['colors']
+        rolling = rolling_analysis(colors, _WORKER['numbers'], lookback=lookback,
+                                   history_size=_WORKER['history_size'])
+        # Posição t prevê o giro t + 1: a última posição não tem resultado
+        strategies = {name: (prediction[:-1], confidence[:-1])
+                      for name, (prediction, confidence) in rolling.strategies.items()}
+        cache[lookback] = (strategies, rolling.prediction[:-1], colors[1:])
+    return cache[lookback]
+
+
+def _run_batch(batch: List[Dict]) -> List[Dict]:
+    strategies, prediction, outcome = _strategies_for(batch[0]['lookback'])
+    return [evaluate(strategies, prediction, outcome, params) for params in batch]
+
+
+def _batches(params_list: Iterable[Dict], batch_size: int) -> List[List[Dict]]:
+    """Lotes com um único ``lookback`` cada, agrupados por ``lookback``"""
+    by_lookback: Dict[int, List[Dict]] = {}
+    for params in params_list:
+        by_lookback.setdefault(params['lookback'], []).append(params)
+    return [group[i:i + batch_size] for _, group in sorted(by_lookback.items())
+            for i in range(0, len(group), batch_size)]
+
+
+def run_sweep(codes: bytes, params_list: List[Dict], workers: Optional[int] = None,
+              history_size: int = config.HISTORY_SIZE, batch_size: int = 32,
+              progress: Optional[Callable[[int, int], None]] = None) -> List[Dict]:
+    """Avalia as combinações em um pool de processos
+
+    Args:
+        codes: Giros codificados em ordem cronológica (``get_spin_codes``)
+        workers: Processos (padrão: ``os.cpu_count()``)
+        progress: Recebe (combinações avaliadas, total) a cada lote concluído
+
+    Returns:
+        Um dict por combinação (parâmetros + métricas), na ordem de conclusão
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("numpy não está instalado. Execute: pip install numpy")
+    if len(codes) < 2 or not params_list:
+        return []
+    workers = max(1, workers or os.cpu_count() or 1)
+    batches = _batches(params_list, batch_size)
+    shm = shared_memory.SharedMemory(create=True, size=len(codes))
+    try:
+        shm.buf[:len(codes)] = codes
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.name, len(codes), history_size)) as pool:
+            futures = [pool.submit(_run_batch, batch) for batch in batches]
+            for future in as_completed(futures):
+                results.extend(future.result())
+                if progress:
+                    progress(len(results), len(params_list))
+        return results
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def rank_results(results: List[Dict], by: str = 'profit', min_signals: int = 1) -> List[Dict]:
+    """Ordena do melhor para o pior, descartando combinações com poucos sinais"""
+    if by not in RANK_METRICS:
+        raise ValueError(f"Métrica desconhecida: {by!r} (use uma de {RANK_METRICS})")
+    eligible = [result for result in results if result['signals'] >= min_signals]
+    return sorted(eligible, key=lambda result: (result[by] is not None, result[by] or 0), reverse=True)
+
+
+def timed_sweep(codes: bytes, params_list: List[Dict], **kwargs) -> Tuple[List[Dict], float]:
+    """``run_sweep`` com o tempo total em segundos"""
+    start = time.perf_counter()
+    results = run_sweep(codes, params_list, **kwargs)
+    return results, time.perf_counter() - start
@@ -0,0 +1,268 @@
+"""
+Tabelas de transição (cadeias de Markov de ordem 0..K) sobre cores e números
+
+Para cada ordem k, ``counts[k][contexto * alfabeto + símbolo]`` conta quantas
+vezes ``símbolo`` veio depois dos k giros do ``contexto`` (codificado em base
+``alfabeto``, giro mais recente no dígito menos significativo). Dois fluxos:
+
+    - ``color``: alfabeto 0=white, 1=red, 2=black
+    - ``number``: números 0..14; giros sem número (resultado lido só pela
+      cor) não entram e reiniciam o contexto
+
+Cada giro novo custa O(K): o contexto corrente de todas as ordens sai de um
+único inteiro rolante. A distribuição do próximo giro para o contexto
+corrente é uma leitura direta da linha da tabela, sem olhar o histórico.
+
+As tabelas são ``array('I')`` (4 bytes por célula) e persistem em JSON, no
+estilo do checkpoint do relatório, com a marca d'água do último jogo
+incorporado: ao reiniciar, apenas os jogos posteriores são lidos.
+"""
+import base64
+import json
+import os
+import threading
+from array import array
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from src.utils.roulette import COLOR_CODES, COLOR_NAMES, SPIN_BLACK_UNKNOWN, encode_spin, spin_colors
+from src.utils.timestamps import timestamp_to_us
+
+
+TABLES_VERSION = 1
+NUMBER_ALPHABET = 15
+STREAMS = {'color': len(COLOR_NAMES), 'number': NUMBER_ALPHABET}
+_COLOR_OF_SPIN = spin_colors(bytes(range(SPIN_BLACK_UNKNOWN + 1)))
+
+
+class _Stream:
+    """Tabelas de um fluxo e o contexto rolante (últimos ``order`` símbolos)"""
+
+    def __init__(self, alphabet: int, order: int):
+        self.alphabet = alphabet
+        self.order = order
+        self.powers = [alphabet ** k for k in range(order + 1)]
+        self.tables = [array('I', bytes(4 * alphabet ** (k + 1))) for k in range(order + 1)]
+        self.context = 0
+        self.valid = 0  # símbolos consecutivos no contexto (até ``order``)
+
+    def add(self, symbol: int):
+        alphabet, context, powers, tables = self.alphabet, self.context, self.powers, self.tables
+        for k in range(self.valid + 1):
+            tables[k][(context % powers[k]) * alphabet + symbol] += 1
+        self.context = (context * alphabet + symbol) % powers[self.order]
+        if self.valid < self.order:
+            self.valid += 1
+
+    def reset_context(self):
+        self.context = 0
+        self.valid = 0
+
+    def row(self, order: int, context: Optional[int] = None) -> Optional[Tuple[int, ...]]:
+        """Contagens do próximo símbolo (None se o contexto corrente for curto demais)"""
+        if not 0 <= order <= self.order:
+            raise ValueError(f"Ordem fora de 0..{self.order}: {order}")
+        if context is None:
+            if order > self.valid:
+                return None
+            context = self.context % self.powers[order]
+        start = context * self.alphabet
+        return tuple(self.tables[order][start:start + self.alphabet])
+
+
+def _context_index(symbols: Sequence[int], alphabet: int) -> int:
+    """Contexto de símbolos em ordem cronológica (mais recente por último)"""
+    index = 0
+    for symbol in symbols:
+        index = index * alphabet + symbol
+    return index
+
+
+class TransitionTables:
+    """Contagens de transição de ordem 0..K, atualizadas giro a giro"""
+
+    def __init__(self, color_order: int = 6, number_order: int = 3):
+        self.streams = {
+            'color': _Stream(STREAMS['color'], color_order),
+            'number': _Stream(STREAMS['number'], number_order),
+        }
+        self.spins = 0
+        # Último jogo incorporado (timestamp em µs e game_id)
+        self.hwm_us: Optional[int] = None
+        self.hwm_key: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def color_order(self) -> int:
+        return self.streams['color'].order
+
+    @property
+    def number_order(self) -> int:
+        return self.streams['number'].order
+
+    # ===== Ingestão =====
+    def add(self, code: int):
+        """Incorpora um giro codificado (ver ``src.utils.roulette``); O(K)"""
+        self.streams['color'].add(_COLOR_OF_SPIN[code])
+        numbers = self.streams['number']
+        if code < NUMBER_ALPHABET:
+            numbers.add(code)
+        else:
+            numbers.reset_context()
+        self.spins += 1
+
+    def append(self, codes: bytes):
+        """Acrescenta giros já codificados (do mais antigo ao mais recente)"""
+        with self._lock:
+            for code in codes:
+                self.add(code)
+
+    def append_spins(self, spins: Iterable[Dict]):
+        """Acrescenta jogos no formato dict (como os de ``save_games_bulk``) e avança a marca d'água"""
+        with self._lock:
+            for spin in spins:
+                try:
+                    code = encode_spin(spin.get('color'), spin.get('number'))
+                except ValueError:
+                    continue
+                self.add(code)
+                timestamp = timestamp_to_us(spin.get('timestamp'))
+                if timestamp is not None:
+                    self.hwm_us, self.hwm_key = timestamp, spin.get('game_id')
+
+    # ===== Consulta =====
+    def counts(self, by: str = 'color', order: int = 1,
+               context: Optional[Sequence] = None) -> Optional[Tuple[int, ...]]:
+        """Quantas vezes cada símbolo seguiu o contexto
+
+        Sem ``context``, usa os últimos ``order`` giros incorporados (O(1)).
+        ``context`` explícito vem do mais recente para o mais antigo (como o
+        histórico do ``PatternAnalyzer``): cores por nome ou números 0..14.
+        """
+        stream = self.streams[by]
+        if context is None:
+            return stream.row(order)
+        if len(context) < order:
+            return None
+        recent = list(reversed(context[:order]))
+        try:
+            symbols = [COLOR_CODES[c] for c in recent] if by == 'color' else [int(n) for n in recent]
+        except (KeyError, TypeError, ValueError):
+            return None
+        if any(not 0 <= s < stream.alphabet for s in symbols):
+            return None
+        return stream.row(order, _context_index(symbols, stream.alphabet))
+
+    def probabilities(self, by: str = 'color', order: Optional[int] = None,
+                      context: Optional[Sequence] = None,
+                      min_observations: int = 1) -> Optional[Tuple[int, Tuple[float, ...], int]]:
+        """(ordem usada, probabilidades do próximo símbolo, observações)
+
+        Sem ``order``, usa a maior ordem cujo contexto tenha pelo menos
+        ``min_observations`` observações (recuo para ordens menores).
+        """
+        orders = [order] if order is not None else range(self.streams[by].order, -1, -1)
+        for k in orders:
+            row = self.counts(by, k, context)
+            total = sum(row) if row else 0
+            if total and total >= min_observations:
+                return k, tuple(count / total for count in row), total
+        return None
+
+    # ===== Persistência =====
+    def to_dict(self) -> Dict:
+        with self._lock:
+            state = {
+                'version': TABLES_VERSION,
+                'color_order': self.color_order,
+                'number_order': self.number_order,
+                'spins': self.spins,
+                'hwm_us': self.hwm_us,
+                'hwm_key': self.hwm_key,
+            }
+            for name, stream in self.streams.items():
+                state[name] = {
+                    'context': stream.context,
+                    'valid': stream.valid,
+                    'tables': [base64.b64encode(table.tobytes()).decode('ascii') for table in stream.tables],
+                }
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'TransitionTables':
+        tables = cls(state['color_order'], state['number_order'])
+        tables.spins = state['spins']
+        tables.hwm_us = state['hwm_us']
+        tables.hwm_key = state['hwm_key']
+        for name, stream in tables.streams.items():
+            saved = state[name]
+            stream.context = saved['context']
+            stream.valid = saved['valid']
+            for k, encoded in enumerate(saved['tables']):
+                table = array('I')
+                table.frombytes(base64.b64decode(encoded))
+                if len(table) != len(stream.tables[k]):
+                    raise ValueError(f"Tabela {name}/{k} com tamanho inesperado")
+                stream.tables[k] = table
+        return tables
+
+
+def load_tables(path: str) -> Optional[TransitionTables]:
+    """Carrega as tabelas (None se ausentes, corrompidas ou de outra versão)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') != TABLES_VERSION:
+            return None
+        return TransitionTables.from_dict(state)
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        return None
+
+
+def save_tables(path: str, tables: TransitionTables):
+    """Grava as tabelas de forma atômica (arquivo temporário + rename)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(tables.to_dict(), f)
+    os.replace(tmp_path, path)
+
+
+def _matches(db, tables: TransitionTables) -> bool:
+    """Confere se o último jogo incorporado ainda está no banco"""
+    if tables.hwm_us is None:
+        return tables.spins == 0
+    games = db.get_games_between(tables.hwm_us, tables.hwm_us + 1)
+    return any(game['game_id'] == tables.hwm_key for game in games)
+
+
+def build_tables(db, color_order: int = 6, number_order: int = 3) -> TransitionTables:
+    """Recalcula as tabelas a partir de todo o histórico de ``games``"""
+    tables = TransitionTables(color_order, number_order)
+    latest = db.get_recent_games(limit=1)
+    tables.append(db.get_spin_codes())
+    if latest:
+        tables.hwm_us = timestamp_to_us(latest[0].get('timestamp'))
+        tables.hwm_key = latest[0].get('game_id')
+    return tables
+
+
+def load_or_build_tables(db, path: Optional[str] = None, color_order: int = 6,
+                         number_order: int = 3) -> Tuple[TransitionTables, int]:
+    """Tabelas persistidas + jogos posteriores à marca d'água, ou recálculo completo
+
+    Returns:
+        (tabelas, jogos lidos do banco); o recálculo acontece quando o arquivo
+        não existe, tem outras ordens ou o banco não contém mais o último jogo
+        incorporado (banco substituído ou jogos removidos).
+    """
+    tables = load_tables(path) if path else None
+    if tables is not None and (tables.color_order, tables.number_order) != (color_order, number_order):
+        tables = None
+    if tables is not None and _matches(db, tables):
+        if tables.hwm_us is None:
+            new_games = db.get_games_between(0, 2 ** 63 - 1)
+        else:
+            new_games = db.get_games_between(tables.hwm_us + 1, 2 ** 63 - 1)
+        tables.append_spins(new_games)
+        return tables, len(new_games)
+    tables = build_tables(db, color_order, number_order)
+    return tables, tables.spins
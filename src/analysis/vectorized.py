@@ -0,0 +1,363 @@
+"""
+Núcleo vetorizado (NumPy) das estratégias do ``PatternAnalyzer``
+
+O histórico é um array ``int8`` em ordem cronológica (mais antigo primeiro):
+cores com os códigos da API (0=white, 1=red, 2=black) e, opcionalmente, um
+array alinhado de números 0..14 (-1 = número desconhecido). Os giros
+codificados de ``get_spin_codes``/``SequenceWindows`` viram esses arrays sem
+laço em Python (``spin_arrays``).
+
+    - ``analyze_arrays``: uma análise, com o mesmo dict de
+      ``PatternAnalyzer.analyze_history`` (mesmos padrões, textos e floats)
+    - ``rolling_analysis``: a análise de todas as posições do histórico de
+      uma vez (cada posição vê apenas os giros até ela), para backtests
+
+Para uma única análise de poucos giros (o caso do bot) as estratégias em
+Python puro de ``analyze_history`` continuam mais rápidas; o ganho aparece
+ao analisar todas as posições de históricos longos. NumPy é opcional: sem
+ele ``NUMPY_AVAILABLE`` é False e só ``analyze_history`` fica disponível.
+"""
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from src.utils.roulette import COLOR_CODES, COLOR_NAMES, SPIN_BLACK_UNKNOWN, SPIN_RED_UNKNOWN
+
+
+# Estratégias na ordem de ``analyze_history``: (nome, peso na confiança combinada)
+STRATEGIES = (('sequence', 0.25), ('frequency', 0.25), ('alternating', 0.20),
+              ('trend', 0.20), ('number', 0.10))
+
+# Reversão de tendência: ordem de preferência das outras cores em caso de empate
+_REVERSAL_ORDER = (COLOR_CODES['red'], COLOR_CODES['black'], COLOR_CODES['white'])
+_TREND_LOOKBACK = 5
+_NO_NUMBER = -1
+_EMPTY_ANALYSIS = {'confidence': 0.0, 'prediction': None, 'patterns': []}
+
+
+def _require_numpy():
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("numpy não está instalado. Execute: pip install numpy")
+
+
+def encode_history(history: Sequence[str], numbers: Optional[Sequence[Optional[int]]] = None):
+    """Listas de ``analyze_history`` (mais recente primeiro) -> arrays cronológicos
+
+    Retorna ``(cores, números)``, com ``números`` None se a lista estiver
+    vazia, ou None se houver cor ou número fora do padrão.
+    """
+    _require_numpy()
+    try:
+        colors = np.array([COLOR_CODES[color] for color in reversed(history)], dtype=np.int8)
+        if not numbers:
+            return colors, None
+        values = [_NO_NUMBER if number is None else int(number) for number in reversed(numbers)]
+    except (KeyError, TypeError, ValueError):
+        return None
+    if any(not _NO_NUMBER <= value <= 14 for value in values):
+        return None
+    return colors, np.array(values, dtype=np.int8)
+
+
+def spin_arrays(codes: bytes):
+    """Giros codificados (1 byte cada, ver ``src.utils.roulette``) -> (cores, números)"""
+    _require_numpy()
+    spins = np.frombuffer(bytes(codes), dtype=np.uint8)
+    table = np.zeros(SPIN_BLACK_UNKNOWN + 1, dtype=np.int8)
+    table[1:8] = COLOR_CODES['red']
+    table[8:15] = COLOR_CODES['black']
+    table[SPIN_RED_UNKNOWN] = COLOR_CODES['red']
+    table[SPIN_BLACK_UNKNOWN] = COLOR_CODES['black']
+    colors = table[spins]
+    numbers = np.where(spins <= 14, spins, _NO_NUMBER).astype(np.int8)
+    return colors, numbers
+
+
+# ===== Análise única (equivalente a PatternAnalyzer.analyze_history) =====
+def _first_seen(recent, color: int) -> int:
+    """Posição da primeira ocorrência de ``color`` (ordem de inserção de um Counter)"""
+    return int(np.argmax(recent == color))
+
+
+def _most_common(recent) -> Tuple[int, int]:
+    """``Counter(recent).most_common(1)[0]`` em códigos: (cor, contagem)"""
+    counts = np.bincount(recent, minlength=3)
+    best = int(counts.max())
+    candidates = np.flatnonzero(counts == best)
+    color = min(candidates, key=lambda c: _first_seen(recent, c))
+    return int(color), best
+
+
+def _sequence(recent) -> Optional[Dict]:
+    hits = np.flatnonzero((recent[:-2] == recent[1:-1]) & (recent[1:-1] != recent[2:]))
+    if not hits.size:
+        return None
+    i = int(hits[0])
+    first, second, third = (COLOR_NAMES[c] for c in recent[i:i + 3])
+    return {'type': 'sequence_break', 'pattern': f"{first}{second}{third}",
+            'prediction': third, 'confidence': 0.6}
+
+
+def _frequency(recent) -> Optional[Dict]:
+    total = len(recent)
+    counts = np.bincount(recent, minlength=3)
+    present = np.flatnonzero(counts)
+    # min() sobre o dict de probabilidades: empate fica com a cor vista primeiro
+    color = int(min(present, key=lambda c: (counts[c], _first_seen(recent, c))))
+    min_prob = int(counts[color]) / total
+    if min_prob < 0.25 and total >= 5:
+        name = COLOR_NAMES[color]
+        return {'type': 'frequency_imbalance', 'pattern': f"{name} está {min_prob*100:.1f}% frequente",
+                'prediction': name, 'confidence': 0.7 - min_prob}
+    return None
+
+
+def _alternating(recent) -> Optional[Dict]:
+    if len(recent) < 4 or not np.array_equal(recent[:-2], recent[2:]):
+        return None
+    return {'type': 'alternating', 'pattern': f"Alternado: {COLOR_NAMES[recent[0]]}{COLOR_NAMES[recent[1]]}...",
+            'prediction': COLOR_NAMES[recent[0]], 'confidence': 0.65}
+
+
+def _trend(colors, recent) -> Optional[Dict]:
+    counts = np.bincount(recent, minlength=3)
+    if np.count_nonzero(counts) == 1:
+        dominant = int(recent[0])
+        others = [c for c in _REVERSAL_ORDER if c != dominant]
+        if len(colors) > len(recent):
+            full_counts = np.bincount(colors, minlength=3)
+            prediction = min(others, key=lambda c: full_counts[c])
+        else:
+            prediction = others[0]
+        return {'type': 'trend_reversal',
+                'pattern': f"Muitas {COLOR_NAMES[dominant]} seguidas, possível reversão",
+                'prediction': COLOR_NAMES[prediction], 'confidence': 0.6}
+    color, count = _most_common(recent)
+    if count / len(recent) >= 0.6:
+        name = COLOR_NAMES[color]
+        return {'type': 'recent_dominance',
+                'pattern': f"{name} dominou recentemente ({count}/{len(recent)})",
+                'prediction': name, 'confidence': 0.55}
+    return None
+
+
+def _number(recent_numbers, recent_colors) -> Optional[Dict]:
+    paired = min(len(recent_numbers), len(recent_colors))
+    latest = int(recent_numbers[0])
+    same = recent_colors[:paired][recent_numbers[:paired] == latest]
+    if len(same) < 2:
+        return None
+    color, count = _most_common(same)
+    if count >= 2 and count / len(same) >= 0.7:
+        name = COLOR_NAMES[color]
+        number = None if latest == _NO_NUMBER else latest
+        return {'type': 'number_color_association', 'pattern': f"Número {number} tende a aparecer com {name}",
+                'prediction': name, 'confidence': 0.55}
+    return None
+
+
+def analyze_arrays(colors, numbers=None, lookback: int = 10) -> Dict:
+    """Mesmo resultado de ``analyze_history`` sobre arrays cronológicos
+
+    Args:
+        colors: Códigos de cor, do mais antigo ao mais recente
+        numbers: Números (mesma ordem; -1 = desconhecido); não precisa ter o
+            mesmo tamanho de ``colors``, como em ``analyze_history``
+        lookback: Giros mais recentes considerados pelas estratégias
+    """
+    _require_numpy()
+    colors = np.asarray(colors, dtype=np.int8)
+    if len(colors) < 3:
+        return dict(_EMPTY_ANALYSIS, patterns=[])
+    # Visões do mais recente ao mais antigo (mesma orientação das listas do bot)
+    newest_first = colors[::-1]
+    recent = newest_first[:lookback]
+
+    results = [
+        _sequence(recent),
+        _frequency(recent),
+        _alternating(recent) if len(colors) >= 4 else None,
+        _trend(colors, newest_first[:min(_TREND_LOOKBACK, len(colors))]),
+        None,
+    ]
+    if numbers is not None and len(numbers) >= 3:
+        results[4] = _number(np.asarray(numbers, dtype=np.int8)[::-1][:lookback], recent)
+
+    patterns = []
+    confidence = 0.0
+    prediction = None
+    for result, (_, weight) in zip(results, STRATEGIES):
+        if result:
+            patterns.append(result)
+            confidence += result.get('confidence', 0) * weight
+            if not prediction and result.get('prediction'):
+                prediction = result['prediction']
+    return {'confidence': min(confidence, 1.0), 'prediction': prediction, 'patterns': patterns}
+
+
+# ===== Análise de todas as posições =====
+class RollingAnalysis(NamedTuple):
+    """Resultado de ``rolling_analysis`` (um valor por posição do histórico)
+
+    ``prediction[t]`` é o código da cor prevista para o giro ``t + 1`` com o
+    histórico até ``t`` (-1 = sem previsão); ``strategies`` traz, por
+    estratégia, (previsão, confiança) com -1/0.0 onde ela não disparou.
+    """
+    prediction: 'np.ndarray'
+    confidence: 'np.ndarray'
+    strategies: Dict[str, Tuple['np.ndarray', 'np.ndarray']]
+
+
+def _cumulative(mask):
+    cumulative = np.zeros(len(mask) + 1, dtype=np.int64)
+    np.cumsum(mask, out=cumulative[1:])
+    return cumulative
+
+
+def _rolling_sum(cumulative, width: Optional[int]):
+    """Soma dos últimos ``width`` valores até cada posição (menos no início; None = todos)"""
+    sums = cumulative[1:]
+    if width is None or width >= len(sums):
+        return sums
+    sums = sums.copy()
+    sums[width:] -= cumulative[1:len(sums) - width + 1]
+    return sums
+
+
+def _last_index(mask):
+    """Para cada posição, o último índice ``<=`` a ela em que ``mask`` é verdadeiro (-1 se nenhum)"""
+    return np.maximum.accumulate(np.where(mask, np.arange(len(mask)), -1))
+
+
+def _select(values, better):
+    """Índice (0..2) e valor do melhor de três arrays; empate fica com o primeiro"""
+    index = np.zeros(len(values[0]), dtype=np.int8)
+    best = values[0]
+    for code in (1, 2):
+        improved = better(values[code], best)
+        index[improved] = code
+        best = np.where(improved, values[code], best)
+    return index, best
+
+
+def rolling_analysis(colors, numbers=None, lookback: int = 10,
+                     history_size: Optional[int] = None) -> RollingAnalysis:
+    """``analyze_arrays`` em cada posição ``t``, sem laço por posição
+
+    A posição ``t`` enxerga os ``history_size`` giros até ``t`` (todos se
+    None), como o bot que analisa os últimos ``config.HISTORY_SIZE`` jogos.
+    ``numbers`` deve estar alinhado a ``colors`` (-1 = desconhecido).
+    """
+    _require_numpy()
+    colors = np.asarray(colors, dtype=np.int8)
+    total = len(colors)
+    t = np.arange(total)
+    # Todas as janelas têm a forma min(t + 1, largura)
+    history_width = None if history_size is None else max(1, history_size)
+    width = max(1, lookback) if history_width is None else min(max(1, lookback), history_width)
+    trend_width = _TREND_LOOKBACK if history_width is None else min(_TREND_LOOKBACK, history_width)
+    size = t + 1 if history_width is None else np.minimum(t + 1, history_width)
+    k = np.minimum(t + 1, width)
+    k5 = np.minimum(t + 1, trend_width)
+    valid = size >= 3
+
+    previous = np.r_[np.int8(-1), colors[:-1]] if total else colors  # c[t - 1]
+    before = np.r_[np.int8(-2), np.int8(-3), colors[:-2]][:total]  # c[t - 2]
+    color_masks = [colors == code for code in range(3)]
+    color_cumulative = [_cumulative(mask) for mask in color_masks]
+    last_seen = [_last_index(mask) for mask in color_masks]
+    none_i8 = np.full(total, -1, dtype=np.int8)
+    strategies = {}
+
+    # Quebra de sequência: par igual seguido de cor diferente, o mais recente na janela
+    breaks = (colors == previous) & (previous != before) & (t >= 2)
+    last_break = _last_index(breaks)
+    fired = valid & (k >= 3) & (last_break >= t - k + 3)
+    strategies['sequence'] = (np.where(fired, colors[np.maximum(last_break - 2, 0)], none_i8),
+                              np.where(fired, 0.6, 0.0))
+
+    # Desequilíbrio de frequência: cor presente menos frequente (empate: vista por último)
+    counts = [_rolling_sum(cumulative, width) for cumulative in color_cumulative]
+    keys = [np.where(count > 0, count * (total + 1) + (total - seen), np.iinfo(np.int64).max)
+            for count, seen in zip(counts, last_seen)]
+    rarest, rarest_key = _select(keys, np.less)
+    min_prob = (rarest_key // (total + 1)) / k
+    fired = valid & (k >= 5) & (min_prob < 0.25)
+    strategies['frequency'] = (np.where(fired, rarest, none_i8), np.where(fired, 0.7 - min_prob, 0.0))
+
+    # Alternância: recent[i] == recent[i + 2] em toda a janela
+    broken = _rolling_sum(_cumulative((colors != before) & (t >= 2)), max(1, width - 2))
+    fired = valid & (size >= 4) & (k >= 4) & (broken == 0)
+    strategies['alternating'] = (np.where(fired, colors, none_i8), np.where(fired, 0.65, 0.0))
+
+    # Tendência nos últimos 5 giros: reversão (todos iguais) ou dominância (>= 60%)
+    counts5 = [_rolling_sum(cumulative, trend_width) for cumulative in color_cumulative]
+    most = np.maximum(np.maximum(counts5[0], counts5[1]), counts5[2])
+    uniform = most == k5
+    full_counts = [_rolling_sum(cumulative, history_width) for cumulative in color_cumulative]
+    reversal = none_i8
+    for dominant in range(3):
+        first, second = (code for code in _REVERSAL_ORDER if code != dominant)
+        # min() com empate fica com a primeira da ordem red, black, white
+        by_count = np.where(full_counts[second] < full_counts[first], second, first)
+        choice = np.where(size > k5, by_count, first)
+        reversal = np.where(uniform & (colors == dominant), choice, reversal)
+    # most_common com empate: a cor vista por último (primeira na ordem do Counter)
+    dominant, _ = _select([np.where(count == most, seen, -1) for count, seen in zip(counts5, last_seen)],
+                          np.greater)
+    dominance = ~uniform & (most / k5 >= 0.6)
+    fired = valid & (uniform | dominance)
+    strategies['trend'] = (np.where(fired, np.where(uniform, reversal, dominant), none_i8).astype(np.int8),
+                           np.where(fired, np.where(uniform, 0.6, 0.55), 0.0))
+
+    # Associação número -> cor dentro da janela (um deslocamento por vez: janelas são curtas)
+    if numbers is not None:
+        n = np.asarray(numbers, dtype=np.int8)
+        matches = np.zeros(total, dtype=np.int64)
+        color_counts = [np.zeros(total, dtype=np.int64) for _ in range(3)]
+        for offset in range(min(width, total)):
+            # Giro ``t - offset``; -2 nunca é igual a um número real
+            same = (np.r_[np.full(offset, -2, dtype=np.int8), n[:total - offset]] == n) & (offset < k)
+            shifted_colors = np.r_[np.full(offset, -1, dtype=np.int8), colors[:total - offset]]
+            matches += same
+            for code in range(3):
+                color_counts[code] += same & (shifted_colors == code)
+        associated, best = _select(color_counts, np.greater)
+        fired = valid & (matches >= 2) & (best >= 2) & (best / np.maximum(matches, 1) >= 0.7)
+        strategies['number'] = (np.where(fired, associated, none_i8), np.where(fired, 0.55, 0.0))
+
+    prediction, confidence = combine_strategies(strategies)
+    return RollingAnalysis(prediction, confidence, strategies)
+
+
+def combine_strategies(strategies: Dict[str, Tuple['np.ndarray', 'np.ndarray']],
+                       weights: Optional[Dict[str, float]] = None):
+    """Previsão e confiança combinadas, como no final de ``analyze_history``
+
+    A previsão é a da primeira estratégia que disparou (na ordem de
+    ``STRATEGIES``, independente dos pesos); a confiança é a soma ponderada,
+    limitada a 1.0. ``weights`` substitui os pesos de ``STRATEGIES``.
+    """
+    total = len(next(iter(strategies.values()))[0]) if strategies else 0
+    confidence = np.zeros(total)
+    prediction = np.full(total, -1, dtype=np.int8)
+    for name, weight in STRATEGIES:
+        if name not in strategies:
+            continue
+        if weights is not None:
+            weight = weights.get(name, weight)
+        strategy_prediction, strategy_confidence = strategies[name]
+        confidence = confidence + np.where(strategy_prediction >= 0, strategy_confidence * weight, 0.0)
+        prediction = np.where((prediction < 0) & (strategy_prediction >= 0), strategy_prediction, prediction)
+    return prediction.astype(np.int8), np.minimum(confidence, 1.0)
+
+
+def patterns_at(analysis: RollingAnalysis, position: int) -> List[str]:
+    """Estratégias que dispararam em uma posição (nomes de ``STRATEGIES``)"""
+    return [name for name, _ in STRATEGIES
+            if name in analysis.strategies and analysis.strategies[name][0][position] >= 0]
@@ -716,10 +716,12 @@ class BlazeAutomation:
                 else:
                     continue  # Ignora cores inválidas
                 
-                # Normaliza resultado
+                # Normaliza resultado (mantém id/created_at da rodada para deduplicação estável)
                 normalized = normalize_result({
                     'color': color,
-                    'number': api_roll
+                    'number': api_roll,
+                    'round_id': item.get('id'),
+                    'created_at': item.get('created_at')
                 })
                 results.append(normalized)
             
@@ -1507,17 +1509,29 @@ class BlazeAutomation:
         except Exception:
             return { 'high': None, 'low': None }
 
-    def get_history_latest(self, limit: int = 25) -> list:
-        """Extrai a lista do Histórico no modal (necessita aba 'Histórico' ativa)."""
+    def get_history_latest(self, limit: int = 25, offset: int = 0) -> list:
+        """Extrai a lista do Histórico no modal (necessita aba 'Histórico' ativa).
+
+        Itens do mais recente para o mais antigo, a partir da linha ``offset``.
+        """
+        return self._read_history_rows(limit, offset)[0]
+
+    def _read_history_rows(self, limit: int, offset: int, anchor: list = None) -> tuple:
+        """Lê até ``limit`` itens do Histórico a partir da linha ``offset`` do DOM.
+
+        Retorna ``(itens, próxima linha não lida, chave do último item)``. A
+        próxima linha conta também as linhas sem item (puladas), e ``anchor``
+        (chave [data, hora, cor, número] do último item já lido) corrige o
+        deslocamento quando rodadas novas entram no topo da lista.
+        """
         try:
-            items = self.page.evaluate("""
-                (limit) => {
+            data = self.page.evaluate("""
+                ([limit, offset, anchor]) => {
                     const out = [];
                     const rows = document.querySelectorAll('#double-analytics #history__double .history__double__container');
-                    for (let i = 0; i < rows.length && out.length < limit; i++) {
-                        const row = rows[i];
+                    const parse = (row) => {
                         const itemEl = row.querySelector('.history__double__item');
-                        if (!itemEl) continue;
+                        if (!itemEl) return null;
                         let color = null;
                         const cls = itemEl.className || '';
                         if (cls.includes('--red')) color = 'red';
@@ -1540,15 +1554,80 @@ class BlazeAutomation:
                                 time = (ps[1].innerText||'').trim();
                             }
                         }
-                        out.push({ color, number, date, time });
+                        return { color, number, date, time };
+                    };
+                    const keyOf = (it) => it ? [it.date, it.time, it.color, it.number] : null;
+                    const sameKey = (a, b) => !!a && !!b && a.every((v, k) => v === b[k]);
+                    let start = offset;
+                    if (anchor && offset > 0) {
+                        // Rodadas novas no topo empurram a lista: retoma após a âncora
+                        let found = -1;
+                        for (let i = offset - 1; i < rows.length; i++) {
+                            if (sameKey(keyOf(parse(rows[i])), anchor)) { found = i; break; }
+                        }
+                        if (found >= 0) start = found + 1;
                     }
-                    return out;
+                    let last = anchor || null;
+                    let i = start;
+                    for (; i < rows.length && out.length < limit; i++) {
+                        const it = parse(rows[i]);
+                        if (!it) continue;
+                        out.push(it);
+                        last = keyOf(it);
+                    }
+                    return { items: out, next: i, anchor: last };
                 }
-            """, int(max(1, min(300, limit))))
-            # Normaliza números/cores
-            return [normalize_result(it) for it in (items or [])]
+            """, [int(max(1, min(3000, limit))), int(max(0, offset)), anchor])
+            data = data or {}
+            # Normaliza números/cores (data/hora do modal são preservadas)
+            items = [dict(normalize_result(it), date=it.get('date'), time=it.get('time'))
+                     for it in (data.get('items') or [])]
+            return items, int(data.get('next') or offset), data.get('anchor') or anchor
         except Exception:
-            return []
+            return [], offset, anchor
+
+    def _scroll_history_list(self) -> int:
+        """Rola a lista do Histórico até o fim; retorna quantos itens estão carregados."""
+        try:
+            return self.page.evaluate("""
+                () => {
+                    const list = document.querySelector('#double-analytics #history__double');
+                    if (!list) return 0;
+                    const rows = list.querySelectorAll('.history__double__container');
+                    if (rows.length) rows[rows.length - 1].scrollIntoView({ block: 'end' });
+                    list.scrollTop = list.scrollHeight;
+                    return rows.length;
+                }
+            """) or 0
+        except Exception:
+            return 0
+
+    def iter_history_pages(self, rounds: int = 3000, page_size: int = 500, max_idle_scrolls: int = 5):
+        """Percorre o Histórico do modal de analytics em páginas (mais recentes primeiro).
+
+        Seleciona ``rounds`` rodadas no modal e rola a lista enquanto ela
+        carregar novos itens. Cada página é uma lista de ``get_history_latest``
+        com ``date``/``time`` (resolução de minuto).
+        """
+        if not self.open_analytics_modal('history'):
+            return
+        self.set_analytics_rounds(rounds)
+        time.sleep(1.0)
+        offset = 0  # Próxima linha do DOM ainda não lida
+        anchor = None
+        read = 0
+        idle = 0
+        while read < rounds and idle < max_idle_scrolls:
+            page, offset, anchor = self._read_history_rows(min(page_size, rounds - read), offset, anchor)
+            if page:
+                read += len(page)
+                idle = 0
+                yield page
+                continue
+            # Itens são carregados sob demanda: rola e aguarda a lista crescer
+            if self._scroll_history_list() <= offset:
+                idle += 1
+            time.sleep(0.8)
 
     def _goto_with_retry(self, url: str, attempts: int = 3, base_timeout_ms: int = 60000):
         """Abre URL com backoff e espera menos agressiva (domcontentloaded)."""
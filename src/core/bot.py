@@ -13,23 +13,59 @@ from src.utils.encoding import setup_encoding
 setup_encoding()
 
 import time
+import signal
 import threading
 from datetime import datetime
 from queue import Queue
+from typing import Optional
 
 # Imports dos módulos
 from src.automation import BlazeAutomation
-from src.database import Database
-from src.analysis import PatternAnalyzer
+from src.database import (Database, StorageBackend, WriteBehindWorker, Archiver, DatabaseMetrics,
+                          MetricsReporter, DatabaseMaintenance, MaintenanceWorker, open_storage)
+from src.analysis import PatternAnalyzer, SequenceWindows
 from src.ui import UI
 from src.notifications import TelegramNotifier
 from config import config
 
 
 class BlazeBot:
-    def __init__(self):
+    def __init__(self, db: Optional[StorageBackend] = None):
         self.automation = None
-        self.db = Database(config.DATABASE_PATH)
+        # Qualquer motor de armazenamento (ver src/database/storage.py); padrão: config.DB_BACKEND
+        self.db = db or open_storage(
+            config.DB_BACKEND,
+            config.DATABASE_PATH,
+            reader_pool_size=config.DB_READER_POOL_SIZE,
+            busy_timeout_ms=config.DB_BUSY_TIMEOUT_MS,
+            recent_cache_size=config.RECENT_HISTORY_SIZE
+        )
+        # Instrumentação opcional: latência por método do banco e espera por lock
+        self.db_metrics = None
+        self.db_metrics_reporter = None
+        if config.DB_METRICS_ENABLED:
+            self.db_metrics = DatabaseMetrics()
+            self.db_metrics.instrument(self.db)
+            self.db_metrics_reporter = MetricsReporter(self.db_metrics, config.DB_METRICS_LOG,
+                                                       interval=config.DB_METRICS_INTERVAL)
+        # Backup online, quick_check e vacuum incremental (apenas no arquivo SQLite)
+        self.db_maintenance = None
+        if config.DB_MAINTENANCE_ENABLED and isinstance(self.db, Database):
+            self.db_maintenance = MaintenanceWorker(
+                DatabaseMaintenance(self.db, config.DB_BACKUP_DIR, backup_keep=config.DB_BACKUP_KEEP,
+                                    pages_per_step=config.DB_BACKUP_PAGES_PER_STEP,
+                                    step_sleep=config.DB_BACKUP_STEP_SLEEP,
+                                    vacuum_pages=config.DB_VACUUM_PAGES),
+                backup_interval=config.DB_BACKUP_INTERVAL,
+                check_interval=config.DB_QUICK_CHECK_INTERVAL,
+                vacuum_interval=config.DB_VACUUM_INTERVAL
+            )
+        # Escritas assíncronas: o loop do navegador nunca espera pelo disco
+        self.db_writer = WriteBehindWorker(
+            self.db,
+            max_queue=config.DB_WRITE_QUEUE_SIZE,
+            batch_size=config.DB_WRITE_BATCH_SIZE
+        )
         self.analyzer = PatternAnalyzer(self.db)
         self.ui = UI()
         # Inicialização do Telegram é segura antes do Playwright (ajustada no notifier)
@@ -37,20 +73,22 @@ class BlazeBot:
         self.running = False
         self.last_game_id = None
         
-        # Threading e sincronização
-        self.lock = threading.Lock()
+        # Threading e sincronização (escritas serializadas no escritor do pool)
         self.game_state_queue = Queue()
         self.results_queue = Queue()
         self.prediction_queue = Queue()
         
         # Cache para evitar processamento duplicado
         self.last_game_state = None
-        self.last_history_hash = None
+        self.last_history_version = None
         self.last_results_hash = None
         
+        # Última gravação das tabelas de transição
+        self.last_transitions_save = 0
+        
         # Controle de coleta de sequências
         self.last_sequence_collection = 0
-        self.sequences_collected = set()  # Para evitar duplicação
+        self.last_sequence_version = None
         
         # Threads
         self.monitor_thread = None
@@ -150,13 +188,96 @@ class BlazeBot:
             self.ui.print_error("Falha ao carregar jogo Double")
             return False
     
+    def archive_old_partitions(self):
+        """Move dias/meses encerrados para arquivos (antes do worker de escrita iniciar)"""
+        if not config.ARCHIVE_ON_START or not isinstance(self.db, Database):
+            return
+        try:
+            archiver = Archiver(self.db, config.ARCHIVE_DIR, granularity=config.ARCHIVE_GRANULARITY,
+                                hot_days=config.ARCHIVE_HOT_DAYS, retention_days=config.ARCHIVE_RETENTION_DAYS)
+            result = archiver.run()
+            for partition in result['archived']:
+                self.ui.print_info(f"Partição {partition['partition']} arquivada "
+                                   f"({partition['games']} jogos, {partition['bets']} apostas)")
+        except Exception as e:
+            self.ui.print_warning(f"Falha ao arquivar partições antigas: {e}")
+
+    def dump_db_metrics(self, *_):
+        """Exibe as métricas do banco acumuladas no intervalo atual (também via SIGUSR1)"""
+        if not self.db_metrics:
+            return
+        self.ui.print_info(self.db_metrics.dump())
+
+    def _register_metrics_signal(self):
+        if not self.db_metrics or not hasattr(signal, 'SIGUSR1'):
+            return
+        try:
+            signal.signal(signal.SIGUSR1, self.dump_db_metrics)
+        except ValueError:
+            # Só é possível registrar sinais na thread principal
+            pass
+
+    def build_pattern_index(self):
+        """Indexa o histórico de ``games`` para a busca exata de sequências"""
+        start = time.perf_counter()
+        try:
+            index = self.analyzer.build_pattern_index(config.PATTERN_INDEX_LIMIT or None,
+                                                      numbers=config.PATTERN_INDEX_NUMBERS)
+        except Exception as e:
+            self.ui.print_warning(f"Busca exata desativada (falha ao indexar o histórico): {e}")
+            return
+        self.ui.print_info(f"Busca exata: {len(index):,} giros indexados em {time.perf_counter() - start:.1f} s")
+    
+    def load_transition_tables(self):
+        """Carrega as tabelas de Markov persistidas e incorpora os jogos novos"""
+        start = time.perf_counter()
+        path = config.MARKOV_TABLES_PATH if isinstance(self.db, Database) else None
+        try:
+            read = self.analyzer.load_transition_tables(path)
+        except Exception as e:
+            self.ui.print_warning(f"Tabelas de transição desativadas: {e}")
+            return
+        self.last_transitions_save = time.time()
+        self.ui.print_info(f"Tabelas de transição: {self.analyzer.transitions.spins:,} giros "
+                           f"({read:,} lidos do banco em {time.perf_counter() - start:.1f} s)")
+    
+    def save_transition_tables(self, force: bool = False):
+        """Persiste as tabelas de Markov a cada ``MARKOV_SAVE_INTERVAL`` segundos (apenas no arquivo SQLite)"""
+        if self.analyzer.transitions is None or not isinstance(self.db, Database):
+            return
+        if not force and time.time() - self.last_transitions_save < config.MARKOV_SAVE_INTERVAL:
+            return
+        self.last_transitions_save = time.time()
+        try:
+            self.analyzer.save_transition_tables(config.MARKOV_TABLES_PATH)
+        except OSError as e:
+            self.ui.print_warning(f"Falha ao gravar as tabelas de transição: {e}")
+    
     def get_game_id(self) -> str:
         """Gera um ID único para o jogo atual baseado no timestamp"""
         return f"game_{int(time.time())}"
     
-    def collect_sequences(self, recent_results: list):
-        """Coleta sequências de diferentes tamanhos para análise"""
+    def _on_rounds_saved(self, future):
+        """Callback do write-behind: encaminha para análise apenas as rodadas novas"""
+        try:
+            new_rounds = future.result()
+        except Exception as e:
+            self.ui.print_warning(f"Erro ao salvar resultados: {e}")
+            return
+        if new_rounds:
+            self.results_queue.put(new_rounds)
+    
+    def collect_sequences(self, new_rounds: list):
+        """Materializa na tabela ``sequences`` as janelas dos tamanhos configurados.
+        
+        As janelas são derivadas de ``games`` sob demanda (``SequenceWindows``);
+        só os tamanhos de ``config.SEQUENCE_MATERIALIZED_SIZES`` ainda são gravados.
+        """
         try:
+            sizes = config.SEQUENCE_MATERIALIZED_SIZES
+            if not sizes:
+                return
+            
             current_time = time.time()
             
             # Coleta sequências em intervalos configurados
@@ -165,36 +286,21 @@ class BlazeBot:
             
             self.last_sequence_collection = current_time
             
-            # Obtém histórico completo do banco
-            with self.lock:
-                history = self.db.get_recent_games(limit=max(config.SEQUENCE_SIZES))
-            
-            if len(history) < 3:
+            # Nada mudou desde a última coleta
+            version = self.db.get_history_version()
+            if version == self.last_sequence_version:
                 return
+            self.last_sequence_version = version
             
-            # Coleta sequências de cada tamanho configurado
-            for size in config.SEQUENCE_SIZES:
-                if len(history) >= size:
-                    # Pega os últimos N jogos
-                    sequence = history[:size]
-                    
-                    # Cria hash da sequência para evitar duplicação
-                    sequence_hash = hash(str([(s.get('color'), s.get('number')) for s in sequence]))
-                    sequence_key = f"{size}_{sequence_hash}"
-                    
-                    # Se não coletou essa sequência ainda, salva
-                    if sequence_key not in self.sequences_collected:
-                        self.sequences_collected.add(sequence_key)
-                        
-                        # Salva no banco
-                        with self.lock:
-                            self.db.save_sequence(size, sequence)
-                        
-                        # Limita o tamanho do cache para não consumir muita memória
-                        if len(self.sequences_collected) > 1000:
-                            # Remove as mais antigas (mantém apenas as últimas 500)
-                            sequences_list = list(self.sequences_collected)
-                            self.sequences_collected = set(sequences_list[-500:])
+            # Histórico recente (cache em memória), do mais antigo ao mais recente
+            history = self.db.get_recent_games(limit=max(sizes))
+            windows = SequenceWindows.from_spins(reversed(history))
+            
+            # Apenas a janela mais recente de cada tamanho (o UNIQUE da tabela descarta repetidas)
+            for size in sizes:
+                latest = windows.latest(size)
+                if latest is not None:
+                    self.db_writer.submit('save_sequence_blobs', size, [latest])
         
         except Exception as e:
             # Ignora erros para não interromper o monitoramento
@@ -209,6 +315,17 @@ class BlazeBot:
             self.ui.print_warning("Histórico insuficiente para análise")
             return None
         
+        # Padrão exato no histórico completo tem prioridade quando atinge os limites
+        if config.EXACT_MATCH_ENABLED and self.analyzer.pattern_index is not None:
+            exact = self.analyzer.exact_pattern_match(history_colors)
+            if exact and self.analyzer.validate_signal(exact['prediction'], exact['confidence'],
+                                                       config.MIN_CONFIDENCE):
+                return {
+                    'color': exact['prediction'],
+                    'confidence': exact['confidence'],
+                    'patterns': [exact]
+                }
+        
         # Gera previsão incluindo análise de números
         prediction_data = self.analyzer.get_prediction(
             history_colors, 
@@ -282,29 +399,20 @@ class BlazeBot:
                 
                 if recent_results:
                     # Calcula hash dos resultados para evitar processamento duplicado
-                    results_hash = hash(str([(r.get('color'), r.get('number')) for r in recent_results]))
+                    results_hash = hash(str([(r.get('round_id'), r.get('color'), r.get('number')) for r in recent_results]))
                     
                     if results_hash != self.last_results_hash:
                         self.last_results_hash = results_hash
                         
-                        # Salva resultados no banco (thread-safe, evita duplicação)
-                        with self.lock:
-                            # Cria IDs únicos baseados em cor+número+timestamp para evitar duplicação
-                            for result in recent_results:
-                                if result.get('color'):
-                                    # Gera ID único baseado no conteúdo
-                                    unique_id = f"game_{result.get('color')}_{result.get('number', 0)}_{int(time.time())}"
-                                    self.db.save_game(
-                                        unique_id,
-                                        result.get('color'),
-                                        result.get('number')
-                                    )
-                        
-                        self.results_queue.put(recent_results)
+                        # Salva em lote apenas as rodadas novas (uma transação, via thread de escrita)
+                        new_rounds = self.db_writer.submit('save_games_bulk', recent_results).result()
                         
-                        # Coleta sequências de diferentes tamanhos
-                        if config.COLLECT_SEQUENCES:
-                            self.collect_sequences(recent_results)
+                        if new_rounds:
+                            self.results_queue.put(new_rounds)
+                            
+                            # Coleta sequências de diferentes tamanhos
+                            if config.COLLECT_SEQUENCES:
+                                self.collect_sequences(new_rounds)
                 
                 # Sleep menor porque agora estamos reagindo a mudanças no DOM
                 time.sleep(0.2)  # Verifica a cada 200ms se há mudanças
@@ -321,21 +429,18 @@ class BlazeBot:
             try:
                 # Aguarda por novos resultados ou estado de aposta
                 if not self.results_queue.empty():
-                    recent_results = self.results_queue.get()
+                    new_rounds = self.results_queue.get()
+                    self.analyzer.observe(new_rounds)
+                    self.save_transition_tables()
                     
-                    # Obtém histórico do banco
-                    with self.lock:
+                    # Só analisa se o histórico mudou (versão do cache em memória)
+                    history_version = self.db.get_history_version()
+                    if history_version != self.last_history_version:
+                        self.last_history_version = history_version
+                        
                         history = self.db.get_recent_games(limit=config.HISTORY_SIZE)
-                    
-                    history_colors = [g['color'] for g in history if g.get('color')]
-                    history_numbers = [g['number'] for g in history if g.get('number') is not None]
-                    
-                    # Calcula hash do histórico
-                    history_hash = hash(str(history_colors[:10]))
-                    
-                    # Só analisa se o histórico mudou
-                    if history_hash != self.last_history_hash:
-                        self.last_history_hash = history_hash
+                        history_colors = [g['color'] for g in history if g.get('color')]
+                        history_numbers = [g['number'] for g in history if g.get('number') is not None]
                         
                         if len(history_colors) >= 3:
                             # Analisa e gera previsão em paralelo
@@ -381,6 +486,19 @@ class BlazeBot:
                 break
         
         self.running = True
+        self.archive_old_partitions()
+        # Índice da busca exata: construído antes do escritor, depois só recebe as rodadas novas
+        if config.EXACT_MATCH_ENABLED:
+            self.build_pattern_index()
+        if config.MARKOV_ENABLED:
+            self.load_transition_tables()
+        self.db_writer.start()
+        if self.db_metrics_reporter:
+            self.db_metrics_reporter.start()
+            self._register_metrics_signal()
+            self.ui.print_info(f"Métricas do banco em {config.DB_METRICS_LOG} (kill -USR1 {os.getpid()} exibe agora)")
+        if self.db_maintenance:
+            self.db_maintenance.start()
         self.ui.print_success("Bot iniciado e pronto para análise")
         self.ui.print_info("Modo paralelo ativado - monitoramento contínuo")
         if self.automation.is_logged_in:
@@ -520,15 +638,13 @@ class BlazeBot:
                         recent_results = []
                     
                     if recent_results:
-                        results_hash = hash(str([(r.get('color'), r.get('number')) for r in recent_results]))
+                        results_hash = hash(str([(r.get('round_id'), r.get('color'), r.get('number')) for r in recent_results]))
                         if results_hash != self.last_results_hash:
                             self.last_results_hash = results_hash
-                            with self.lock:
-                                for result in recent_results:
-                                    if result.get('color'):
-                                        unique_id = f"game_{result.get('color')}_{result.get('number', 0)}_{int(time.time())}"
-                                        self.db.save_game(unique_id, result.get('color'), result.get('number'))
-                            self.results_queue.put(recent_results)
+                            # Persistência assíncrona; só o delta segue para a análise após o commit
+                            self.db_writer.submit('save_games_bulk', recent_results).add_done_callback(
+                                self._on_rounds_saved
+                            )
 
                     # Humanização periódica (não bloqueante)
                     now = time.time()
@@ -543,10 +659,9 @@ class BlazeBot:
                         except Exception:
                             pass
                     
-                    # Obtém histórico do banco
-                    with self.lock:
-                        history = self.db.get_recent_games(limit=config.HISTORY_SIZE)
-                        stats = self.db.get_statistics()
+                    # Obtém histórico recente (cache em memória, sem consultar o SQLite)
+                    history = self.db.get_recent_games(limit=config.HISTORY_SIZE)
+                    stats = self.db.get_statistics()
                     
                     # Verifica se há nova previsão
                     if not self.prediction_queue.empty():
@@ -631,14 +746,14 @@ class BlazeBot:
                                         current_bet_placed = True
                                         waiting_for_result = True
                                         
-                                        # Salva a aposta no banco
-                                        with self.lock:
-                                            self.db.save_bet(
-                                                game_id,
-                                                current_prediction['color'],
-                                                config.DEFAULT_BET_AMOUNT,
-                                                current_prediction['confidence']
-                                            )
+                                        # Salva a aposta no banco (write-behind)
+                                        self.db_writer.submit(
+                                            'save_bet',
+                                            game_id,
+                                            current_prediction['color'],
+                                            config.DEFAULT_BET_AMOUNT,
+                                            current_prediction['confidence']
+                                        )
                                         
                                         # Envia notificação Telegram de aposta realizada
                                         self.telegram.send_bet_placed(
@@ -691,37 +806,34 @@ class BlazeBot:
                                 actual_color = result.get('color')
                                 bet_result = "WIN" if actual_color == current_prediction['color'] else "LOSS"
 
-                                # Atualiza aposta e persiste jogo
-                                with self.lock:
-                                    game_id = self.current_bet_game_id or self.get_game_id()
-                                    self.db.update_bet_result(game_id, actual_color, bet_result)
-                                    self.db.save_game(game_id, actual_color, result.get('number'))
+                                # Atualiza aposta (o jogo em si é persistido pela ingestão em lote)
+                                game_id = self.current_bet_game_id or self.get_game_id()
+                                self.db_writer.submit('update_bet_result', game_id, actual_color, bet_result)
 
                                 # Exibe resultado
                                 self.ui.display_bet_result(
                                     current_prediction['color'], actual_color, bet_result, current_prediction['confidence']
                                 )
 
-                                # Salva padrões se houver
+                                # Acumula os padrões da rodada (um único upsert em lote)
                                 if current_prediction.get('patterns'):
-                                    with self.lock:
-                                        for pattern in current_prediction['patterns']:
-                                            self.db.save_pattern(
-                                                pattern.get('type', 'unknown'), pattern, pattern.get('confidence', 0)
-                                            )
+                                    self.db_writer.submit(
+                                        'save_patterns', current_prediction['patterns'], bet_result
+                                    )
 
                                 # Envia notificação Telegram com resultado
-                                with self.lock:
-                                    stats = self.db.get_statistics()
-                                    self.telegram.send_bet_result(
-                                        current_prediction['color'],
-                                        actual_color,
-                                        bet_result,
-                                        current_prediction['confidence'],
-                                        stats.get('win_rate', 0.0),
-                                        stats.get('total_bets', 0),
-                                        stats.get('wins', 0)
-                                    )
+                                # (barreira: as estatísticas precisam refletir o resultado acima)
+                                self.db_writer.flush(timeout=5.0)
+                                stats = self.db.get_statistics()
+                                self.telegram.send_bet_result(
+                                    current_prediction['color'],
+                                    actual_color,
+                                    bet_result,
+                                    current_prediction['confidence'],
+                                    stats.get('win_rate', 0.0),
+                                    stats.get('total_bets', 0),
+                                    stats.get('wins', 0)
+                                )
 
                                 # Reseta flags
                                 current_bet_placed = False
@@ -794,8 +906,21 @@ class BlazeBot:
         # Aguarda threads finalizarem
         if self.analyzer_thread:
             self.analyzer_thread.join(timeout=2)
+        # Rodadas ainda na fila ficam após a marca d'água e são lidas no próximo início
+        self.save_transition_tables(force=True)
         
         if self.automation:
             self.automation.close()
+        
+        # Confirma escritas pendentes e fecha conexões persistentes do banco
+        try:
+            if self.db_maintenance:
+                self.db_maintenance.stop()
+            self.db_writer.stop()
+            if self.db_metrics_reporter:
+                self.db_metrics_reporter.stop()
+            self.db.close()
+        except Exception:
+            pass
         self.ui.print_success("Bot encerrado")
 
@@ -1,7 +1,21 @@
 """
 Módulo de gerenciamento de banco de dados
 """
+from .storage import StorageBackend, open_storage
 from .database import Database, get_timestamp
+from .memory import MemoryDatabase
+from .analytical import AnalyticalDatabase
+from .writer import WriteBehindWorker
+from .recent_history import RecentHistory, Spin
+from .snapshot import DatabaseSnapshot
+from .export import ColumnarExporter
+from .archive import Archiver
+from .backfill import Backfiller
+from .instrumentation import DatabaseMetrics, MetricsReporter
+from .maintenance import DatabaseMaintenance, MaintenanceWorker
 
-__all__ = ['Database', 'get_timestamp']
-
+__all__ = ['StorageBackend', 'open_storage', 'Database', 'MemoryDatabase', 'AnalyticalDatabase',
+           'get_timestamp', 'WriteBehindWorker', 'RecentHistory', 'Spin',
+           'DatabaseSnapshot', 'ColumnarExporter', 'Archiver',
+           'Backfiller', 'DatabaseMetrics', 'MetricsReporter',
+           'DatabaseMaintenance', 'MaintenanceWorker']
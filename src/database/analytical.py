@@ -0,0 +1,360 @@
+"""
+Motor analítico (DuckDB) somente leitura para relatórios
+
+``AnalyticalDatabase.from_sqlite`` copia ``games``/``bets`` (incluindo as
+partições arquivadas), ``patterns`` e ``sequences`` de um snapshot do banco
+SQLite para um DuckDB em memória, em blocos de colunas. As leituras de
+``StorageBackend`` e o ``report_summary`` são agregações vetorizadas do
+DuckDB, sem percorrer as linhas em Python; métodos de escrita lançam
+``RuntimeError``.
+
+Requer ``duckdb`` (dependência opcional).
+"""
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+from src.utils.roulette import decode_spins
+from src.utils.timestamps import US_PER_HOUR, format_us, local_hour
+
+from .recent_history import RecentHistory, Spin
+from .storage import StorageBackend
+
+
+_LOAD_CHUNK_ROWS = 65536
+# Todos os fusos têm deslocamento múltiplo de 15 minutos (ver local_hour)
+_US_PER_QUARTER = 900 * 1_000_000
+# Separador das colunas enviadas como texto (não ocorre em ids, cores ou JSON)
+_SEPARATOR = '\x1f'
+
+# Tabelas copiadas: (consulta no SQLite, colunas (nome, tipo DuckDB, tipo de carga))
+_TABLES = {
+    'games': ('''
+        SELECT g.id, g.game_id, r.round_id, g.color, g.number, g.timestamp
+        FROM {games} g
+        LEFT JOIN {rounds} r ON r.game_id = g.game_id
+        ORDER BY g.id
+    ''', (('id', 'BIGINT', 'int'), ('game_id', 'VARCHAR', 'str'), ('round_id', 'VARCHAR', 'str'),
+          ('color', 'VARCHAR', 'str'), ('number', 'INTEGER', 'int'), ('timestamp', 'BIGINT', 'int'))),
+    'bets': ('''
+        SELECT id, game_id, predicted_color, actual_color, bet_amount, confidence, result, timestamp
+        FROM {bets}
+        ORDER BY id
+    ''', (('id', 'BIGINT', 'int'), ('game_id', 'VARCHAR', 'str'), ('predicted_color', 'VARCHAR', 'str'),
+          ('actual_color', 'VARCHAR', 'str'), ('bet_amount', 'DOUBLE', 'float'),
+          ('confidence', 'DOUBLE', 'float'), ('result', 'VARCHAR', 'str'), ('timestamp', 'BIGINT', 'int'))),
+    'patterns': ('''
+        SELECT signature, pattern_type, pattern_data, confidence, occurrences,
+               wins, losses, success_rate, last_seen, created_at
+        FROM patterns
+    ''', (('signature', 'VARCHAR', 'str'), ('pattern_type', 'VARCHAR', 'str'),
+          ('pattern_data', 'VARCHAR', 'str'), ('confidence', 'DOUBLE', 'float'),
+          ('occurrences', 'BIGINT', 'int'), ('wins', 'BIGINT', 'int'), ('losses', 'BIGINT', 'int'),
+          ('success_rate', 'DOUBLE', 'float'), ('last_seen', 'BIGINT', 'int'),
+          ('created_at', 'BIGINT', 'int'))),
+    'sequences': ('''
+        SELECT sequence_length, hex(spins), timestamp FROM sequences ORDER BY id
+    ''', (('sequence_length', 'INTEGER', 'int'), ('spins', 'BLOB', 'hex'), ('timestamp', 'BIGINT', 'int'))),
+}
+
+# Código do giro (ver encode_spin) calculado no DuckDB
+_SPIN_CODE_SQL = '''
+    CASE WHEN number BETWEEN 0 AND 14 THEN number
+         WHEN lower(color) = 'white' THEN 0
+         WHEN lower(color) = 'red' THEN 15
+         WHEN lower(color) = 'black' THEN 16
+    END
+'''
+
+
+def _column(values: list) -> str:
+    """Coluna do SQLite como um único texto (nulo = vazio)"""
+    return _SEPARATOR.join('' if value is None else str(value) for value in values)
+
+
+def _select_expression(column: str, sql_type: str, kind: str) -> str:
+    if kind == 'hex':
+        return f'unhex({column})'
+    if kind == 'str':
+        return f"NULLIF({column}, '')"
+    return f"CAST(NULLIF({column}, '') AS {sql_type})"
+
+
+def _read_only(self, *args, **kwargs):
+    raise RuntimeError("AnalyticalDatabase é somente leitura (use o motor 'sqlite' ou 'memory')")
+
+
+class AnalyticalDatabase(StorageBackend):
+    """Cópia em DuckDB (memória) de um banco SQLite, para leituras analíticas"""
+
+    def __init__(self, recent_cache_size: int = 500):
+        if not DUCKDB_AVAILABLE:
+            raise RuntimeError("duckdb não está instalado. Execute: pip install duckdb")
+        self.db_path = ':memory:'
+        self.partitions: List[str] = []
+        self._conn = duckdb.connect(':memory:')
+        # Conexão DuckDB não deve ser usada por várias threads ao mesmo tempo
+        self._lock = threading.RLock()
+        for table, (_, columns) in _TABLES.items():
+            definition = ', '.join(f'{name} {sql_type}' for name, sql_type, _ in columns)
+            self._conn.execute(f'CREATE TABLE {table} ({definition})')
+        # Mesmos nomes do snapshot com partições (relatórios escritos para o SQLite)
+        self._conn.execute('CREATE VIEW all_games AS SELECT * FROM games')
+        self._conn.execute('CREATE VIEW all_bets AS SELECT * FROM bets')
+        self.recent_history = RecentHistory(maxlen=recent_cache_size)
+
+    @classmethod
+    def from_sqlite(cls, db_path: str, recent_cache_size: int = 500, archives: bool = True,
+                    busy_timeout_ms: int = 5000) -> 'AnalyticalDatabase':
+        """Carrega um snapshot do banco SQLite (e das partições arquivadas)"""
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"Banco não encontrado: {db_path}")
+        db = cls(recent_cache_size=recent_cache_size)
+
+        from .snapshot import DatabaseSnapshot
+        with DatabaseSnapshot(db_path, busy_timeout_ms=busy_timeout_ms, archives=archives) as snapshot:
+            db.partitions = list(snapshot.partitions)
+            tables = {'games': 'all_games' if archives else 'games',
+                      'bets': 'all_bets' if archives else 'bets',
+                      'rounds': 'all_rounds' if archives else 'rounds'}
+            for table, (sql, columns) in _TABLES.items():
+                db._load_table(snapshot.get_connection(), table, sql.format(**tables), columns)
+        return db
+
+    def _load_table(self, source, table: str, sql: str, columns):
+        """Copia uma consulta do SQLite em blocos
+
+        Cada coluna do bloco vai como um único parâmetro texto e é separada
+        por ``string_split`` no DuckDB: converter objetos Python um a um
+        (registro de arrays/listas) é muito mais lento.
+        """
+        cursor = source.cursor()
+        cursor.arraysize = _LOAD_CHUNK_ROWS
+        cursor.execute(sql)
+        unnest = ', '.join(f"unnest(string_split(?, chr({ord(_SEPARATOR)}))) AS c{i}" for i in range(len(columns)))
+        select = ', '.join(_select_expression(f'c{i}', sql_type, kind)
+                           for i, (_, sql_type, kind) in enumerate(columns))
+        insert = f'INSERT INTO {table} SELECT {select} FROM (SELECT {unnest})'
+        with self._lock:
+            for rows in iter(cursor.fetchmany, []):
+                self._conn.execute(insert, [_column([row[i] for row in rows]) for i in range(len(columns))])
+        cursor.close()
+
+    def get_connection(self):
+        """Conexão DuckDB (tabelas games, bets, patterns, sequences e views all_*)"""
+        return self._conn
+
+    def _fetchall(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, list(params)).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ===== Escritas não suportadas =====
+    save_game = save_games_bulk = import_games = _read_only
+    save_bet = update_bet_result = _read_only
+    save_patterns = save_pattern = save_sequence_blobs = _read_only
+
+    def save_sequence(self, sequence_length: int, sequence_data: List[Dict]):
+        _read_only(self)
+
+    def rebuild_statistics(self):
+        """Estatísticas são sempre calculadas na consulta"""
+
+    # ===== games =====
+    def _load_recent_spins(self, limit: int) -> List[Spin]:
+        rows = self._fetchall('''
+            SELECT game_id, color, number, timestamp FROM games
+            ORDER BY timestamp DESC LIMIT ?
+        ''', (limit,))
+        return [Spin(*row) for row in rows]
+
+    def _query_recent_games(self, limit: int) -> List[Dict]:
+        return [
+            {'game_id': game_id, 'color': color, 'number': number,
+             'timestamp': format_us(timestamp), 'result': None}
+            for game_id, color, number, timestamp in self._fetchall('''
+                SELECT game_id, color, number, timestamp FROM games
+                ORDER BY timestamp DESC LIMIT ?
+            ''', (limit,))
+        ]
+
+    def get_games_between(self, start_us: int, end_us: int) -> List[Dict]:
+        """Jogos com ``start_us <= timestamp < end_us`` (microssegundos), em ordem cronológica"""
+        return [
+            {'game_id': game_id, 'color': color, 'number': number,
+             'timestamp': format_us(timestamp), 'result': None}
+            for game_id, color, number, timestamp in self._fetchall('''
+                SELECT game_id, color, number, timestamp FROM games
+                WHERE timestamp >= ? AND timestamp < ?
+                ORDER BY timestamp, id
+            ''', (start_us, end_us))
+        ]
+
+    def get_hourly_counts(self, start_us: Optional[int] = None,
+                          end_us: Optional[int] = None) -> Dict[int, int]:
+        """Jogos por hora (UTC) no intervalo: {início da hora em µs: quantidade}"""
+        rows = self._fetchall('''
+            SELECT timestamp // ? AS hour, COUNT(*) FROM games
+            WHERE timestamp >= ? AND timestamp < ?
+            GROUP BY hour ORDER BY hour
+        ''', (US_PER_HOUR, start_us if start_us is not None else 0,
+              end_us if end_us is not None else 2 ** 63 - 1))
+        return {hour * US_PER_HOUR: count for hour, count in rows}
+
+    def get_spin_codes(self, limit: Optional[int] = None) -> bytes:
+        """Giros codificados (1 byte cada), do mais antigo ao mais recente"""
+        with self._lock:
+            codes = self._conn.execute(f'''
+                SELECT code FROM (
+                    SELECT {_SPIN_CODE_SQL} AS code, timestamp AS position FROM games
+                    ORDER BY position DESC LIMIT ?
+                )
+                WHERE code IS NOT NULL
+                ORDER BY position
+            ''', [limit if limit is not None else 2 ** 62]).fetchall()
+        return bytes(code for code, in codes)
+
+    # ===== bets / statistics =====
+    def get_statistics(self) -> Dict:
+        """Contadores calculados na consulta (mesmas regras dos triggers)"""
+        total_games = self._fetchall('SELECT COUNT(*) FROM games')[0][0]
+        total_bets, wins, losses, profit = self._fetchall('''
+            SELECT COUNT(*), COUNT(*) FILTER (result = 'WIN'), COUNT(*) FILTER (result = 'LOSS'),
+                   IFNULL(SUM(CASE WHEN result = 'WIN' THEN 1 ELSE -1 END * IFNULL(bet_amount, 0)), 0.0)
+            FROM bets
+        ''')[0]
+        return {'total_games': total_games, 'total_bets': total_bets, 'wins': wins, 'losses': losses,
+                'win_rate': wins * 100.0 / total_bets if total_bets > 0 else 0.0,
+                'total_profit': float(profit)}
+
+    # ===== patterns / sequences =====
+    def get_pattern_stats(self, signatures: List[str]) -> Dict[str, Dict]:
+        """Contadores acumulados por assinatura"""
+        if not signatures:
+            return {}
+        rows = self._fetchall('''
+            SELECT signature, occurrences, wins, losses, success_rate FROM patterns
+            WHERE list_contains(?, signature)
+        ''', (list(signatures),))
+        return {
+            signature: {'occurrences': occurrences, 'wins': wins, 'losses': losses, 'success_rate': success_rate}
+            for signature, occurrences, wins, losses, success_rate in rows
+        }
+
+    def _recent_sequences(self, length: Optional[int], limit: int) -> List[tuple]:
+        if length is None:
+            return self._fetchall('''
+                SELECT sequence_length, spins, timestamp FROM sequences
+                ORDER BY timestamp DESC LIMIT ?
+            ''', (limit,))
+        return self._fetchall('''
+            SELECT sequence_length, spins, timestamp FROM sequences
+            WHERE sequence_length = ?
+            ORDER BY timestamp DESC LIMIT ?
+        ''', (length, limit))
+
+    def get_sequence_blobs(self, length: Optional[int] = None, limit: int = 500) -> List[bytes]:
+        return [bytes(spins) for _, spins, _ in self._recent_sequences(length, limit)]
+
+    def get_sequences_by_length(self, length: int, limit: int = 100) -> List[Dict]:
+        return [
+            {'sequence': decode_spins(bytes(spins)), 'length': length, 'timestamp': format_us(timestamp)}
+            for length, spins, timestamp in self._recent_sequences(length, limit)
+        ]
+
+    def get_all_sequences(self, limit: int = 500) -> List[Dict]:
+        return [
+            {'sequence': decode_spins(bytes(spins)), 'length': length, 'timestamp': format_us(timestamp)}
+            for length, spins, timestamp in self._recent_sequences(None, limit)
+        ]
+
+    def get_sequence_statistics(self) -> Dict:
+        rows = self._fetchall('''
+            SELECT sequence_length, COUNT(*) FROM sequences
+            GROUP BY sequence_length ORDER BY sequence_length
+        ''')
+        return {'total_sequences': sum(count for _, count in rows), 'by_length': dict(rows)}
+
+    # ===== Relatório =====
+    def report_summary(self):
+        """``ReportSummary`` completo calculado por agregações no DuckDB
+
+        Mesmo resultado de ``build_report_summary`` sobre ``all_games``/``all_bets``
+        (sem checkpoint: o recálculo completo já é vetorizado).
+        """
+        from src.analysis.report import RECENT_BETS, RECENT_GAMES, ReportSummary
+
+        start = time.perf_counter()
+        summary = ReportSummary()
+        (summary.total_games, summary.first_game_us, summary.last_game_us, summary.number_sum,
+         summary.number_min, summary.number_max, summary.games_hwm) = self._fetchall('''
+            SELECT COUNT(*), MIN(timestamp), MAX(timestamp), IFNULL(SUM(number), 0),
+                   MIN(number), MAX(number), IFNULL(MAX(id), 0)
+            FROM games
+        ''')[0]
+        summary.number_sum = int(summary.number_sum)
+        summary.new_games = summary.total_games
+        summary.color_counts.update(dict(self._fetchall('SELECT color, COUNT(*) FROM games GROUP BY color')))
+        summary.number_counts.update(dict(self._fetchall('''
+            SELECT number, COUNT(*) FROM games WHERE number IS NOT NULL GROUP BY number
+        ''')))
+        # Hora local a partir de blocos de 15 minutos (nenhuma data formatada por linha)
+        for quarter, count in self._fetchall('''
+            SELECT timestamp // ? AS quarter, COUNT(*) FROM games
+            WHERE timestamp IS NOT NULL GROUP BY quarter
+        ''', (_US_PER_QUARTER,)):
+            summary.hourly_counts['%02d' % local_hour(quarter * _US_PER_QUARTER)] += count
+        # Ordem de timestamp (empates pelo id), como no SQLite: NULL primeiro
+        summary.recent_games.extend(reversed(self._fetchall('''
+            SELECT color, number, timestamp FROM games
+            ORDER BY timestamp DESC NULLS LAST, id DESC LIMIT ?
+        ''', (RECENT_GAMES,))))
+        summary.spin_codes = bytearray(code for code, in self._fetchall(f'''
+            SELECT code FROM (
+                SELECT {_SPIN_CODE_SQL} AS code, timestamp, id FROM games
+            )
+            WHERE code IS NOT NULL
+            ORDER BY timestamp NULLS FIRST, id
+        '''))
+
+        (summary.total_bets, summary.wins, summary.losses, summary.total_bet_amount,
+         summary.total_winnings, summary.bets_hwm) = self._fetchall('''
+            SELECT COUNT(*), COUNT(*) FILTER (result = 'WIN'), COUNT(*) FILTER (result = 'LOSS'),
+                   IFNULL(SUM(bet_amount), 0.0),
+                   IFNULL(SUM(bet_amount * 2) FILTER (result = 'WIN'), 0.0),
+                   IFNULL(MAX(id), 0)
+            FROM bets
+        ''')[0]
+        summary.new_bets = summary.total_bets
+        for predicted, total, wins, confidence_sum, confidence_count in self._fetchall('''
+            SELECT predicted_color, COUNT(*), COUNT(*) FILTER (result = 'WIN'),
+                   IFNULL(SUM(confidence), 0.0), COUNT(confidence)
+            FROM bets WHERE result IS NOT NULL
+            GROUP BY predicted_color
+        '''):
+            summary.by_predicted_color[predicted] = [total, wins, confidence_sum, confidence_count]
+        summary.recent_bets.extend(reversed(self._fetchall('''
+            SELECT predicted_color, actual_color, result, confidence, bet_amount, timestamp
+            FROM bets ORDER BY id DESC LIMIT ?
+        ''', (RECENT_BETS,))))
+
+        summary.patterns = self._fetchall('''
+            SELECT pattern_type, SUM(occurrences) AS count,
+                   CASE WHEN SUM(wins + losses) > 0
+                        THEN SUM(wins) * 1.0 / SUM(wins + losses) END AS avg_success
+            FROM patterns
+            GROUP BY pattern_type
+            ORDER BY count DESC
+        ''')
+        summary.elapsed = time.perf_counter() - start
+        return summary
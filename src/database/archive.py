@@ -0,0 +1,371 @@
+"""
+Arquivamento por período (dia ou mês) e retenção do histórico de jogos
+
+Dias ou meses encerrados há mais de ``hot_days`` saem do banco principal
+para arquivos SQLite anuais (``<dir>/<banco>.<ano>.db``), registrados em
+``archive_partitions``. O banco quente fica restrito aos dias recentes e o
+histórico completo é lido pelas views temporárias ``all_games``/``all_bets``/
+``all_rounds`` (``attach_archives``), que unem o banco principal e os
+arquivos anexados. Os leitores do histórico completo de ``Database``
+(``get_games_between``, ``get_hourly_counts``, ``get_spin_codes``) anexam os
+arquivos sozinhos quando o intervalo pedido alcança partições arquivadas.
+
+A tabela ``statistics`` continua cobrindo todo o histórico retido: os
+contadores das partições arquivadas são somados de volta (e subtraídos
+quando a retenção apaga uma partição).
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.utils.timestamps import US_PER_HOUR, US_PER_SECOND, now_us, timestamp_to_us
+
+
+GRANULARITIES = ('day', 'month')
+_US_PER_DAY = 24 * US_PER_HOUR
+
+# Views unificadas (banco quente + arquivos): nome -> (tabela, colunas)
+UNIFIED_VIEWS = {
+    'all_games': ('games', 'id, game_id, color, number, timestamp, result'),
+    'all_bets': ('bets', 'id, game_id, predicted_color, actual_color, bet_amount, confidence, result, timestamp'),
+}
+# ``all_rounds``: identidades das rodadas do banco quente e dos arquivos
+ROUNDS_COLUMNS = 'round_id, game_id, created_at'
+
+# Esquema de um arquivo de partição (mesmas colunas e ids do banco principal)
+_ARCHIVE_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS {alias}.games (
+        id INTEGER PRIMARY KEY,
+        game_id TEXT UNIQUE,
+        color TEXT NOT NULL,
+        number INTEGER,
+        timestamp INTEGER,
+        result TEXT
+    )''',
+    'CREATE INDEX IF NOT EXISTS {alias}.idx_games_timestamp ON games(timestamp, game_id, color, number, result)',
+    '''CREATE TABLE IF NOT EXISTS {alias}.bets (
+        id INTEGER PRIMARY KEY,
+        game_id TEXT,
+        predicted_color TEXT NOT NULL,
+        actual_color TEXT,
+        bet_amount REAL,
+        confidence REAL,
+        result TEXT,
+        timestamp INTEGER
+    )''',
+    'CREATE INDEX IF NOT EXISTS {alias}.idx_bets_timestamp ON bets(timestamp)',
+    '''CREATE TABLE IF NOT EXISTS {alias}.rounds (
+        round_id TEXT PRIMARY KEY,
+        game_id TEXT NOT NULL,
+        created_at TEXT
+    ) WITHOUT ROWID''',
+)
+
+# Contadores de uma partição, no mesmo critério de REBUILD_STATISTICS_SQL
+_PARTITION_TOTALS_SQL = '''
+    SELECT
+        (SELECT COUNT(*) FROM {alias}.games),
+        COUNT(*),
+        IFNULL(SUM(result = 'WIN'), 0),
+        IFNULL(SUM(result = 'LOSS'), 0),
+        IFNULL(SUM(CASE WHEN result = 'WIN' THEN 1 ELSE -1 END * IFNULL(bet_amount, 0)), 0.0)
+    FROM {alias}.bets
+'''
+
+_ADJUST_STATISTICS_SQL = '''
+    UPDATE statistics SET
+        total_games = total_games + :games,
+        total_bets = total_bets + :bets,
+        wins = wins + :wins,
+        losses = losses + :losses,
+        total_profit = total_profit + :profit,
+        win_rate = CASE WHEN total_bets + :bets > 0
+                        THEN (wins + :wins) * 100.0 / (total_bets + :bets) ELSE 0.0 END
+    WHERE id = 1
+'''
+
+_TOTAL_FIELDS = ('games', 'bets', 'wins', 'losses', 'profit')
+
+
+def partition_bounds(timestamp_us: int, granularity: str = 'month') -> Tuple[str, int, int]:
+    """(chave, início, fim) da partição em hora local que contém ``timestamp_us``"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularidade inválida: {granularity!r} (use {', '.join(GRANULARITIES)})")
+    moment = datetime.fromtimestamp(timestamp_us // US_PER_SECOND)
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        end = start + timedelta(days=1)
+        key = start.strftime('%Y-%m-%d')
+    else:
+        start = start.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        key = start.strftime('%Y-%m')
+    return key, timestamp_to_us(start), timestamp_to_us(end)
+
+
+def archive_key(timestamp_us: int) -> str:
+    """Arquivo (ano, hora local) que recebe o período de ``timestamp_us``"""
+    return datetime.fromtimestamp(timestamp_us // US_PER_SECOND).strftime('%Y')
+
+
+def adjust_statistics(conn: sqlite3.Connection, totals: Dict[str, float], sign: int = 1):
+    """Soma (ou subtrai) os contadores de partições na linha ``statistics.id = 1``"""
+    conn.execute(_ADJUST_STATISTICS_SQL, {field: sign * (totals.get(field) or 0) for field in _TOTAL_FIELDS})
+
+
+def archived_totals(conn: sqlite3.Connection) -> Dict[str, float]:
+    """Soma dos contadores de todas as partições registradas"""
+    row = conn.execute('''
+        SELECT IFNULL(SUM(games), 0), IFNULL(SUM(bets), 0), IFNULL(SUM(wins), 0),
+               IFNULL(SUM(losses), 0), IFNULL(SUM(profit), 0.0)
+        FROM archive_partitions
+    ''').fetchone()
+    return dict(zip(_TOTAL_FIELDS, row))
+
+
+def list_partitions(conn: sqlite3.Connection, start_us: Optional[int] = None,
+                    end_us: Optional[int] = None) -> List[Tuple[str, str, int, int]]:
+    """Partições registradas que intersectam [start_us, end_us): (chave, caminho, início, fim)"""
+    try:
+        return conn.execute('''
+            SELECT partition_key, path, start_us, end_us
+            FROM archive_partitions
+            WHERE end_us > ? AND start_us < ?
+            ORDER BY start_us
+        ''', (start_us if start_us is not None else -2 ** 63,
+              end_us if end_us is not None else 2 ** 63 - 1)).fetchall()
+    except sqlite3.OperationalError:
+        # Banco anterior à migração de arquivamento (ex.: snapshot sem migrar)
+        return []
+
+
+def attach_archives(conn: sqlite3.Connection, start_us: Optional[int] = None,
+                    end_us: Optional[int] = None) -> List[str]:
+    """Anexa os arquivos do intervalo e cria as views temporárias ``all_games``/``all_bets``/``all_rounds``
+
+    Deve ser chamado fora de transação e antes de ``PRAGMA query_only``.
+    Sem partições, as views apenas repassam as tabelas do banco principal.
+
+    Returns:
+        Chaves das partições anexadas
+    """
+    partitions = list_partitions(conn, start_us, end_us)
+    attached = len(conn.execute('PRAGMA database_list').fetchall())
+    # database_list inclui main e temp; o limite conta apenas os anexados
+    available = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) - max(0, attached - 2)
+    if len(partitions) > available:
+        raise ValueError(
+            f"{len(partitions)} arquivos no intervalo, mas apenas {available} podem ser "
+            "anexados; restrinja o intervalo"
+        )
+
+    aliases = []
+    for i, (key, path, start, end) in enumerate(partitions):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Arquivo da partição {key} não encontrado: {path}")
+        alias = f'archive_{i}'
+        conn.execute(f'ATTACH DATABASE ? AS {alias}', (path,))
+        aliases.append((alias, int(start), int(end)))
+
+    for view, (table, columns) in UNIFIED_VIEWS.items():
+        conn.execute(f'DROP VIEW IF EXISTS temp.{view}')
+        # Arquivos em ordem cronológica e o banco quente por último (ids crescentes).
+        # Só o intervalo registrado é lido: linhas copiadas por um arquivamento
+        # interrompido (ainda presentes no banco quente) ficam de fora
+        selects = [
+            f'SELECT {columns} FROM {alias}.{table} WHERE timestamp >= {start} AND timestamp < {end}'
+            for alias, start, end in aliases
+        ]
+        selects.append(f'SELECT {columns} FROM main.{table}')
+        conn.execute(f'CREATE TEMP VIEW {view} AS ' + ' UNION ALL '.join(selects))
+    # rounds não tem timestamp: UNION descarta as linhas repetidas de um arquivamento interrompido
+    conn.execute('DROP VIEW IF EXISTS temp.all_rounds')
+    conn.execute('CREATE TEMP VIEW all_rounds AS ' + ' UNION '.join(
+        f'SELECT {ROUNDS_COLUMNS} FROM {alias}.rounds' for alias in [a for a, _, _ in aliases] + ['main']
+    ))
+    return [key for key, _, _, _ in partitions]
+
+
+class Archiver:
+    """Move períodos encerrados de ``games``/``bets``/``rounds`` para arquivos anexáveis.
+
+    ``granularity`` é a unidade que sai do banco quente (só dias ou meses
+    completos); cada ano fica em um único arquivo, mantendo poucos arquivos
+    a anexar (o SQLite limita a 10 por conexão).
+
+    Cada período é copiado e confirmado no arquivo antes de ser apagado do
+    banco principal (transações separadas: em WAL, commits em vários arquivos
+    não são atômicos entre si). Uma interrupção no meio deixa as linhas nos
+    dois lugares, mas o período só é registrado — e lido pelas views — após
+    a remoção; a próxima execução conclui o trabalho.
+    """
+
+    def __init__(self, db, archive_dir: str, granularity: str = 'month', hot_days: int = 30,
+                 retention_days: Optional[int] = None):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Granularidade inválida: {granularity!r} (use {', '.join(GRANULARITIES)})")
+        self.db = db
+        self.archive_dir = archive_dir
+        self.granularity = granularity
+        self.hot_days = max(0, hot_days)
+        self.retention_days = retention_days or None
+
+    def archive_path(self, key: str) -> str:
+        stem = os.path.splitext(os.path.basename(self.db.db_path))[0]
+        return os.path.abspath(os.path.join(self.archive_dir, f"{stem}.{key}.db"))
+
+    def pending_partitions(self, now: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """Períodos com dados no banco principal que já saíram da janela quente"""
+        cutoff = (now if now is not None else now_us()) - self.hot_days * _US_PER_DAY
+        pending = []
+        after = -2 ** 63
+        with self.db.pool.read() as conn:
+            while True:
+                # Salta direto para o próximo período com dados (sem iterar períodos vazios)
+                oldest = conn.execute('''
+                    SELECT MIN(ts) FROM (
+                        SELECT MIN(timestamp) AS ts FROM games WHERE timestamp >= ?1
+                        UNION ALL
+                        SELECT MIN(timestamp) FROM bets WHERE timestamp >= ?1
+                    )
+                ''', (after,)).fetchone()[0]
+                if oldest is None:
+                    break
+                key, start, end = partition_bounds(oldest, self.granularity)
+                if end > cutoff:
+                    break
+                pending.append((key, start, end))
+                after = end
+        return pending
+
+    def roll(self, now: Optional[int] = None) -> List[Dict]:
+        """Arquiva todos os períodos pendentes
+
+        Returns:
+            Um dict por período (chave, arquivo, linhas movidas)
+        """
+        results = [self.archive_partition(key, start, end) for key, start, end in self.pending_partitions(now)]
+        if results:
+            self.db.invalidate_caches()
+        return results
+
+    @contextmanager
+    def _attached(self, key: str) -> Iterator[sqlite3.Connection]:
+        path = self.archive_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.db.pool.attached(path, 'archive') as writer:
+            # auto_vacuum só tem efeito em arquivo novo (antes da primeira tabela)
+            writer.execute('PRAGMA archive.auto_vacuum = INCREMENTAL')
+            writer.execute('PRAGMA archive.synchronous = FULL')
+            yield writer
+
+    def archive_partition(self, key: str, start_us: int, end_us: int) -> Dict:
+        file_key = archive_key(start_us)
+        bounds = (start_us, end_us)
+        with self._attached(file_key):
+            # 1) Copia e confirma no arquivo (ids preservados; reexecução é idempotente)
+            with self.db.pool.write() as conn:
+                for sql in _ARCHIVE_SCHEMA:
+                    conn.execute(sql.format(alias='archive'))
+                conn.execute('''
+                    INSERT OR IGNORE INTO archive.rounds (round_id, game_id, created_at)
+                    SELECT r.round_id, r.game_id, r.created_at
+                    FROM main.rounds r
+                    JOIN main.games g ON g.game_id = r.game_id
+                    WHERE g.timestamp >= ? AND g.timestamp < ?
+                ''', bounds)
+                for table, columns in UNIFIED_VIEWS.values():
+                    conn.execute(f'''
+                        INSERT OR IGNORE INTO archive.{table} ({columns})
+                        SELECT {columns} FROM main.{table}
+                        WHERE timestamp >= ? AND timestamp < ?
+                    ''', bounds)
+
+            # 2) Remove do banco quente e registra o período na mesma transação
+            with self.db.pool.write() as conn:
+                conn.execute('''
+                    DELETE FROM rounds WHERE game_id IN (
+                        SELECT game_id FROM games WHERE timestamp >= ? AND timestamp < ?
+                    )
+                ''', bounds)
+                moved_bets = conn.execute('DELETE FROM bets WHERE timestamp >= ? AND timestamp < ?', bounds).rowcount
+                moved_games = conn.execute('DELETE FROM games WHERE timestamp >= ? AND timestamp < ?', bounds).rowcount
+                # Os triggers descontaram as linhas apagadas; devolve o que agora está no arquivo
+                self._register(conn, file_key, start_us, end_us)
+
+        return {'partition': key, 'path': self.archive_path(file_key), 'games': moved_games, 'bets': moved_bets}
+
+    def _register(self, conn: sqlite3.Connection, file_key: str, start_us: int, end_us: int,
+                  trimmed: bool = False):
+        """Atualiza o registro do arquivo e as estatísticas pela diferença de contadores
+
+        O intervalo registrado é estendido para cobrir [start_us, end_us), ou
+        passa a começar em ``start_us`` quando a retenção cortou o início.
+        """
+        totals = dict(zip(_TOTAL_FIELDS, conn.execute(_PARTITION_TOTALS_SQL.format(alias='archive')).fetchone()))
+        previous = conn.execute(
+            f'SELECT {", ".join(_TOTAL_FIELDS)}, start_us, end_us FROM archive_partitions WHERE partition_key = ?',
+            (file_key,)
+        ).fetchone()
+        adjust_statistics(conn, totals)
+        if previous:
+            adjust_statistics(conn, dict(zip(_TOTAL_FIELDS, previous)), sign=-1)
+            if not trimmed:
+                start_us = min(start_us, previous[-2])
+            end_us = max(end_us, previous[-1])
+        conn.execute('''
+            INSERT OR REPLACE INTO archive_partitions
+                (partition_key, path, start_us, end_us, games, bets, wins, losses, profit, archived_at)
+            VALUES (:key, :path, :start, :end, :games, :bets, :wins, :losses, :profit, :archived_at)
+        ''', dict(totals, key=file_key, path=self.archive_path(file_key), start=start_us, end=end_us,
+                   archived_at=now_us()))
+
+    def apply_retention(self, now: Optional[int] = None) -> List[str]:
+        """Descarta os períodos encerrados há mais de ``retention_days`` (sem retenção: nada)
+
+        Arquivos inteiramente anteriores ao limite são apagados; no arquivo que
+        contém o limite, apenas as linhas dos períodos expirados são removidas.
+        """
+        if not self.retention_days:
+            return []
+        limit = (now if now is not None else now_us()) - self.retention_days * _US_PER_DAY
+        # Só períodos completos expiram: o limite recua ao início do dia/mês
+        cutoff = partition_bounds(limit, self.granularity)[1]
+        with self.db.pool.read() as conn:
+            partitions = conn.execute(f'''
+                SELECT partition_key, path, start_us, end_us, {", ".join(_TOTAL_FIELDS)}
+                FROM archive_partitions
+                WHERE start_us < ?
+                ORDER BY start_us
+            ''', (cutoff,)).fetchall()
+
+        expired = []
+        for key, path, start_us, end_us, *totals in partitions:
+            if end_us <= cutoff:
+                with self.db.pool.write() as conn:
+                    adjust_statistics(conn, dict(zip(_TOTAL_FIELDS, totals)), sign=-1)
+                    conn.execute('DELETE FROM archive_partitions WHERE partition_key = ?', (key,))
+                # Arquivo só é removido depois que o registro deixou de apontá-lo
+                if os.path.exists(path):
+                    os.remove(path)
+            else:
+                with self._attached(key) as writer:
+                    with self.db.pool.write() as conn:
+                        conn.execute('''
+                            DELETE FROM archive.rounds WHERE game_id IN (
+                                SELECT game_id FROM archive.games WHERE timestamp < ?
+                            )
+                        ''', (cutoff,))
+                        conn.execute('DELETE FROM archive.bets WHERE timestamp < ?', (cutoff,))
+                        conn.execute('DELETE FROM archive.games WHERE timestamp < ?', (cutoff,))
+                        self._register(conn, key, cutoff, end_us, trimmed=True)
+                    writer.execute('PRAGMA archive.incremental_vacuum')
+            expired.append(key)
+        return expired
+
+    def run(self, now: Optional[int] = None) -> Dict[str, List]:
+        """Arquiva os períodos pendentes e aplica a retenção"""
+        now = now if now is not None else now_us()
+        return {'archived': self.roll(now), 'expired': self.apply_retention(now)}
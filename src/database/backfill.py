@@ -0,0 +1,304 @@
+"""
+Importação de histórico (backfill) para o banco de jogos
+
+Fontes aceitas, todas normalizadas para o mesmo registro:
+    - API da Blaze (``id``, ``color`` 0/1/2, ``roll``, ``created_at``)
+    - Modal de analytics (``color``, ``number``, ``date``, ``time`` com
+      resolução de minuto; ver ``BlazeAutomation.iter_history_pages``)
+    - Arquivos JSON (lista ou JSON Lines) e CSV com essas mesmas colunas
+      (ou ``round_id``/``number``/``timestamp``)
+
+Deduplicação contra o que já está no banco:
+    1. ``round_id`` já registrado em ``rounds`` -> ignorado
+    2. Jogo armazenado na mesma janela de tempo com a mesma cor/número
+       (coletado ao vivo, ex.: fallback DOM sem id) -> ignorado; se o
+       registro tem ``round_id``, a identidade é associada ao jogo existente
+    3. Demais registros entram em lote por ``Database.import_games``
+"""
+import csv
+import json
+import os
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from src.utils.roulette import COLOR_NAMES, normalize_result
+from src.utils.timestamps import US_PER_SECOND, timestamp_to_us
+
+from .database import _spin_matches
+
+
+_US_PER_MINUTE = 60 * US_PER_SECOND
+_MODAL_DATE_FORMATS = ('%d/%m/%Y', '%d/%m/%y', '%Y-%m-%d')
+_MODAL_TIME_FORMATS = ('%H:%M:%S', '%H:%M')
+
+
+class BackfillRecord(NamedTuple):
+    """Rodada normalizada para importação"""
+    round_id: Optional[str]
+    color: str
+    number: Optional[int]
+    timestamp: int  # microssegundos desde a época
+    created_at: Optional[str]
+    coarse: bool  # horário com resolução de minuto (modal de analytics)
+
+
+class BackfillStats:
+    """Contadores de uma importação"""
+
+    def __init__(self):
+        self.read = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.identified = 0  # jogos existentes que receberam o round_id
+        self.inserted = 0
+        self.batches = 0
+        self.elapsed = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Registros processados por segundo"""
+        return self.read / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        return {'read': self.read, 'invalid': self.invalid, 'duplicates': self.duplicates,
+                'identified': self.identified, 'inserted': self.inserted, 'batches': self.batches,
+                'elapsed': self.elapsed, 'rate': self.rate}
+
+
+def _parse_modal_datetime(date: Optional[str], clock: Optional[str]) -> Optional[int]:
+    """``date``/``time`` do modal (ex.: '04/11/2025' e '00:07') -> microssegundos (hora local)"""
+    if not date or not clock:
+        return None
+    date, clock = str(date).strip(), str(clock).strip()
+    for date_format in _MODAL_DATE_FORMATS:
+        for time_format in _MODAL_TIME_FORMATS:
+            try:
+                moment = datetime.strptime(f"{date} {clock}", f"{date_format} {time_format}")
+            except ValueError:
+                continue
+            return timestamp_to_us(moment)
+    # Sem ano ('04/11'): ano corrente, ou o anterior se a data ficaria no futuro
+    try:
+        moment = datetime.strptime(f"{date}/{datetime.now().year} {clock}", '%d/%m/%Y %H:%M')
+    except ValueError:
+        return None
+    if moment > datetime.now():
+        moment = moment.replace(year=moment.year - 1)
+    return timestamp_to_us(moment)
+
+
+def _to_int(value) -> Optional[int]:
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_record(raw: Dict) -> Optional[BackfillRecord]:
+    """Converte um registro de qualquer fonte (None se inválido)"""
+    color = raw.get('color')
+    color_code = _to_int(color)
+    if color_code is not None and 0 <= color_code < len(COLOR_NAMES):
+        color = COLOR_NAMES[color_code]  # formato da API (0=white, 1=red, 2=black)
+    number = _to_int(raw.get('number', raw.get('roll')))
+    round_id = raw.get('round_id', raw.get('id'))
+    result = normalize_result({'color': color, 'number': number, 'round_id': round_id,
+                               'created_at': raw.get('created_at')})
+    if result['color'] not in COLOR_NAMES:
+        return None
+
+    coarse = False
+    timestamp = None
+    if result.get('created_at'):
+        timestamp = timestamp_to_us(result['created_at'])
+    if timestamp is None and raw.get('timestamp') not in (None, ''):
+        value = raw['timestamp']
+        timestamp = timestamp_to_us(_to_int(value) if _to_int(value) is not None else value)
+    if timestamp is None:
+        timestamp = _parse_modal_datetime(raw.get('date'), raw.get('time'))
+        coarse = timestamp is not None
+    if timestamp is None:
+        return None
+    return BackfillRecord(result.get('round_id'), result['color'], result['number'], timestamp,
+                          result.get('created_at'), coarse)
+
+
+def iter_file_records(path: str, fmt: str = 'auto') -> Iterator[Dict]:
+    """Registros brutos de um arquivo JSON (lista ou JSON Lines) ou CSV"""
+    if fmt == 'auto':
+        fmt = 'csv' if path.lower().endswith('.csv') else 'json'
+    if fmt == 'csv':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            yield from csv.DictReader(f)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        head = f.read(1)
+        while head and head.isspace():
+            head = f.read(1)
+        f.seek(0)
+        if head == '[':
+            yield from json.load(f)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def _spread_coarse(records: List[BackfillRecord]) -> List[BackfillRecord]:
+    """Distribui dentro do minuto os registros do modal que compartilham o mesmo horário"""
+    spread = []
+    i = 0
+    while i < len(records):
+        j = i + 1
+        if records[i].coarse:
+            while j < len(records) and records[j].coarse and records[j].timestamp == records[i].timestamp:
+                j += 1
+        step = _US_PER_MINUTE // (j - i)
+        spread.extend(record._replace(timestamp=record.timestamp + k * step)
+                      for k, record in enumerate(records[i:j]))
+        i = j
+    return spread
+
+
+class Backfiller:
+    """Importa rodadas históricas em lotes, deduplicando contra o banco.
+
+    Cada lote é deduplicado e gravado dentro da mesma transação de escrita,
+    para que uma rodada coletada ao vivo no meio da importação não entre duas
+    vezes.
+    """
+
+    def __init__(self, db, batch_size: int = 20000, match_before_s: float = 5.0,
+                 match_after_s: float = 90.0):
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        # Jogos ao vivo são gravados alguns segundos após a rodada (e o modal
+        # só informa o minuto): a janela de correspondência é assimétrica
+        self.match_before_us = int(match_before_s * US_PER_SECOND)
+        self.match_after_us = int(match_after_s * US_PER_SECOND)
+
+    def import_records(self, raw_records: Iterable[Dict], newest_first: Optional[bool] = None) -> BackfillStats:
+        """Normaliza, ordena cronologicamente e grava os registros
+
+        Args:
+            raw_records: Registros de qualquer fonte aceita
+            newest_first: Ordem da fonte para desempatar horários iguais
+                (None = detecta pelos timestamps do primeiro e do último)
+        """
+        stats = BackfillStats()
+        start = time.perf_counter()
+        records = []
+        for raw in raw_records:
+            stats.read += 1
+            record = normalize_record(raw)
+            if record is None:
+                stats.invalid += 1
+            else:
+                records.append(record)
+
+        if newest_first is None:
+            newest_first = len(records) > 1 and records[0].timestamp > records[-1].timestamp
+        if newest_first:
+            records.reverse()
+        # sort é estável: empates mantêm a ordem cronológica da fonte
+        records.sort(key=lambda record: record.timestamp)
+        records = _spread_coarse(records)
+
+        for offset in range(0, len(records), self.batch_size):
+            self._import_batch(records[offset:offset + self.batch_size], stats)
+            stats.batches += 1
+
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def import_file(self, path: str, fmt: str = 'auto') -> BackfillStats:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Arquivo não encontrado: {path}")
+        return self.import_records(iter_file_records(path, fmt))
+
+    def _import_batch(self, records: List[BackfillRecord], stats: BackfillStats):
+        windows = [self._window(record) for record in records]
+        with self.db.pool.write() as conn:
+            known_rounds = self._known_rounds(conn, [r.round_id for r in records if r.round_id])
+            stored = conn.execute('''
+                SELECT g.timestamp, g.game_id, g.color, g.number,
+                       EXISTS(SELECT 1 FROM rounds r WHERE r.game_id = g.game_id)
+                FROM games g
+                WHERE g.timestamp >= ? AND g.timestamp <= ?
+                ORDER BY g.timestamp
+            ''', (min(w[0] for w in windows), max(w[1] for w in windows))).fetchall()
+            stored_ts = [row[0] for row in stored]
+            consumed = set()
+
+            games = []
+            rounds = []
+            seen_rounds = set()
+            for record in records:
+                if record.round_id in known_rounds or record.round_id in seen_rounds:
+                    stats.duplicates += 1
+                    continue
+                match = self._match_stored(record, stored, stored_ts, consumed)
+                if match is not None:
+                    stats.duplicates += 1
+                    if record.round_id and not stored[match][4]:
+                        rounds.append((record.round_id, stored[match][1], record.created_at))
+                        seen_rounds.add(record.round_id)
+                        stats.identified += 1
+                    continue
+                if record.round_id:
+                    game_id = f"round_{record.round_id}"
+                    rounds.append((record.round_id, game_id, record.created_at))
+                    seen_rounds.add(record.round_id)
+                else:
+                    number = record.number if record.number is not None else 'x'
+                    game_id = f"hist_{record.color}_{number}_{record.timestamp}"
+                games.append((game_id, record.color, record.number, record.timestamp))
+
+            inserted = self.db.import_games(games, rounds)
+            stats.inserted += inserted
+            stats.duplicates += len(games) - inserted
+
+    def _window(self, record: BackfillRecord) -> Tuple[int, int]:
+        """Intervalo em que um jogo armazenado pode ser a mesma rodada"""
+        if record.coarse:
+            # Só o minuto é conhecido: a rodada pode ter ocorrido em qualquer ponto dele
+            # (fusos têm deslocamento múltiplo de 15 min: o minuto UTC é o minuto local)
+            minute = record.timestamp - record.timestamp % _US_PER_MINUTE
+            return minute - self.match_before_us, minute + _US_PER_MINUTE + self.match_after_us
+        return record.timestamp - self.match_before_us, record.timestamp + self.match_after_us
+
+    def _match_stored(self, record: BackfillRecord, stored: List[tuple], stored_ts: List[int],
+                      consumed: set) -> Optional[int]:
+        """Índice do primeiro jogo armazenado compatível e ainda não usado"""
+        low, high = self._window(record)
+        first = bisect_left(stored_ts, low)
+        last = bisect_right(stored_ts, high)
+        incoming = (record.color, record.number)
+        for i in range(first, last):
+            if i in consumed:
+                continue
+            # Jogo já identificado por outra rodada não pode receber este round_id
+            if record.round_id and stored[i][4]:
+                continue
+            if _spin_matches((stored[i][2], stored[i][3]), incoming):
+                consumed.add(i)
+                return i
+        return None
+
+    @staticmethod
+    def _known_rounds(conn, round_ids: List[str]) -> set:
+        known = set()
+        # Limite de parâmetros por consulta do SQLite
+        for offset in range(0, len(round_ids), 500):
+            chunk = round_ids[offset:offset + 500]
+            placeholders = ','.join('?' * len(chunk))
+            known.update(row[0] for row in conn.execute(
+                f'SELECT round_id FROM rounds WHERE round_id IN ({placeholders})', chunk
+            ))
+        return known
@@ -2,422 +2,595 @@
 Módulo de gerenciamento de banco de dados
 """
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 import json
 
+from src.utils.patterns import pattern_signature
+from src.utils.roulette import encode_spin, decode_spins
+from src.utils.timestamps import US_PER_HOUR, format_us, now_us
+from .archive import adjust_statistics, archived_totals, attach_archives, list_partitions
+from .pool import ConnectionPool
+from .recent_history import RecentHistory, Spin
+from .storage import StorageBackend
+from .migrations import MIGRATIONS, REBUILD_STATISTICS_SQL, current_version, record_version
+
 
 def get_timestamp() -> str:
-    """Retorna timestamp formatado com data, hora, minuto, segundo e microssegundos"""
+    """Retorna timestamp formatado com data, hora, minuto, segundo e microssegundos
+
+    O banco grava inteiros (``now_us``); este formato é o de exibição (``format_us``).
+    """
     return datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
 
 
-class Database:
-    def __init__(self, db_path: str = "blaze_data.db"):
+def _spin_matches(stored: tuple, incoming: tuple) -> bool:
+    """Compara (cor, número); número ausente em um dos lados (DOM) não invalida"""
+    if stored[0] != incoming[0]:
+        return False
+    return stored[1] is None or incoming[1] is None or stored[1] == incoming[1]
+
+
+def _find_overlap(tail: List[tuple], window: List[tuple]) -> int:
+    """Maior k tal que os últimos k itens armazenados == primeiros k da janela.
+    Ambas as listas em ordem cronológica (mais antigo primeiro)."""
+    for k in range(min(len(tail), len(window)), 0, -1):
+        offset = len(tail) - k
+        if all(_spin_matches(tail[offset + i], window[i]) for i in range(k)):
+            return k
+    return 0
+
+
+def build_round_rows(new_rounds: List[Dict], base_id: int) -> Tuple[List[tuple], List[tuple], List[Dict]]:
+    """Linhas de ``games``/``rounds`` para as rodadas novas de ``save_games_bulk``
+
+    Returns:
+        (games, rounds, inseridas): ``(game_id, color, number, timestamp)``,
+        ``(round_id, game_id, created_at)`` e os dicts retornados ao chamador
+    """
+    rows = []
+    round_rows = []
+    inserted = []
+    for i, result in enumerate(new_rounds):
+        color = result.get('color')
+        number = result.get('number')
+        round_id = result.get('round_id')
+        if round_id:
+            game_id = f"round_{round_id}"
+            round_rows.append((round_id, game_id, result.get('created_at')))
+        else:
+            game_id = result.get('game_id') or f"game_{color}_{number if number is not None else 0}_{base_id + i}"
+        # Estritamente crescente dentro do lote: a ordem por timestamp é a de inserção
+        timestamp = base_id + i
+        rows.append((game_id, color, number, timestamp))
+        inserted.append({'game_id': game_id, 'color': color, 'number': number,
+                         'round_id': round_id, 'timestamp': format_us(timestamp)})
+    return rows, round_rows, inserted
+
+
+def read_spin_codes(conn: sqlite3.Connection, limit: Optional[int] = None, games_table: str = 'games') -> bytes:
+    """Lê de ``games`` (ou ``all_games``) os giros codificados, do mais antigo ao mais recente"""
+    rows = conn.execute(f'''
+        SELECT color, number FROM {games_table}
+        ORDER BY timestamp DESC
+        LIMIT ?
+    ''', (-1 if limit is None else limit,)).fetchall()
+
+    codes = bytearray()
+    for color, number in reversed(rows):
+        try:
+            codes.append(encode_spin(color, number))
+        except ValueError:
+            continue
+    return bytes(codes)
+
+
+class Database(StorageBackend):
+    """Motor padrão: arquivo SQLite em WAL (ver ``StorageBackend``)"""
+
+    def __init__(self, db_path: str = "blaze_data.db", reader_pool_size: int = 4,
+                 busy_timeout_ms: int = 5000, recent_cache_size: int = 500):
         self.db_path = db_path
+        # Conexões persistentes: um escritor + N leitores em modo WAL
+        self.pool = ConnectionPool(db_path, readers=reader_pool_size,
+                                   busy_timeout_ms=busy_timeout_ms)
+        # Histórico recente em memória (SQLite só é consultado na carga fria)
+        self.recent_history = RecentHistory(maxlen=recent_cache_size)
         self.init_database()
+        # Carga fria única, antes de qualquer thread de ingestão começar
+        self.recent_history.load(self._load_recent_spins)
     
     def get_connection(self):
-        return sqlite3.connect(self.db_path)
+        """Abre uma conexão avulsa (legado - o chamador deve fechá-la).
+        Métodos internos usam ``self.pool.read()``/``self.pool.write()``."""
+        conn = sqlite3.connect(self.db_path, timeout=self.pool.busy_timeout_ms / 1000.0)
+        conn.execute(f'PRAGMA busy_timeout = {int(self.pool.busy_timeout_ms)}')
+        return conn
+    
+    def close(self):
+        """Fecha as conexões persistentes do pool"""
+        self.pool.close()
     
     def init_database(self):
-        """Inicializa o banco de dados criando as tabelas necessárias"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Tabela de jogos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS games (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                game_id TEXT UNIQUE,
-                color TEXT NOT NULL,
-                number INTEGER,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                result TEXT
-            )
-        ''')
-        
-        # Tabela de apostas
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS bets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                game_id TEXT,
-                predicted_color TEXT NOT NULL,
-                actual_color TEXT,
-                bet_amount REAL,
-                confidence REAL,
-                result TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (game_id) REFERENCES games(game_id)
-            )
-        ''')
-        
-        # Tabela de padrões identificados
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS patterns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                pattern_type TEXT NOT NULL,
-                pattern_data TEXT,
-                success_rate REAL,
-                occurrences INTEGER DEFAULT 0,
-                last_seen DATETIME,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de estatísticas
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS statistics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                total_games INTEGER DEFAULT 0,
-                total_bets INTEGER DEFAULT 0,
-                wins INTEGER DEFAULT 0,
-                losses INTEGER DEFAULT 0,
-                win_rate REAL DEFAULT 0.0,
-                total_profit REAL DEFAULT 0.0,
-                last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de sequências coletadas (amostragens)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sequences (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                sequence_length INTEGER NOT NULL,
-                sequence_data TEXT NOT NULL,
-                sequence_colors TEXT NOT NULL,
-                sequence_numbers TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(sequence_length, sequence_data)
-            )
-        ''')
-        
-        # Índices para consultas rápidas
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sequence_length ON sequences(sequence_length)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sequence_timestamp ON sequences(timestamp)')
-        
-        conn.commit()
-        conn.close()
+        """Inicializa o banco de dados aplicando as migrações pendentes"""
+        self.migrate()
+    
+    def migrate(self) -> int:
+        """Aplica, em ordem, as migrações ainda não registradas em ``schema_version``.
+        
+        Cada migração roda em sua própria transação: se falhar, o banco
+        permanece na última versão aplicada com sucesso.
+        
+        Returns:
+            Versão do esquema após as migrações
+        """
+        with self.pool.write() as conn:
+            version = current_version(conn.cursor())
+        
+        for target, description, apply in MIGRATIONS:
+            if target <= version:
+                continue
+            with self.pool.write() as conn:
+                cursor = conn.cursor()
+                apply(cursor)
+                record_version(cursor, target, description)
+            version = target
+        return version
+    
+    def get_schema_version(self) -> int:
+        """Retorna a versão atual do esquema"""
+        with self.pool.read() as conn:
+            row = conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()
+        return row[0] if row else 0
     
+    def transaction(self):
+        """Transação de escrita do pool: ``BEGIN IMMEDIATE`` ... ``COMMIT`` (ver ``StorageBackend``)"""
+        return self.pool.write()
+
     def save_game(self, game_id: str, color: str, number: Optional[int] = None):
-        """Salva um jogo no banco de dados (evita duplicação)"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        """Salva um jogo no banco de dados (upsert pela chave game_id)"""
         try:
-            # Verifica se já existe um jogo com mesma cor e número recentemente
-            cursor.execute('''
-                SELECT game_id FROM games 
-                WHERE color = ? AND number = ? 
-                ORDER BY timestamp DESC 
-                LIMIT 1
-            ''', (color, number))
-            
-            existing = cursor.fetchone()
-            
-            # Se não existe ou é diferente, insere
-            if not existing:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO games (game_id, color, number, timestamp)
+            with self.pool.write() as conn:
+                conn.execute('''
+                    INSERT INTO games (game_id, color, number, timestamp)
                     VALUES (?, ?, ?, ?)
-                ''', (game_id, color, number, get_timestamp()))
-                conn.commit()
-            else:
-                # Jogo já existe, apenas atualiza timestamp se necessário
-                existing_id = existing[0]
-                if existing_id != game_id:
-                    cursor.execute('''
-                        UPDATE games 
-                        SET timestamp = ?
-                        WHERE game_id = ?
-                    ''', (get_timestamp(), existing_id))
-                    conn.commit()
-        except sqlite3.IntegrityError:
-            # Jogo já existe com mesmo ID, apenas atualiza
-            cursor.execute('''
-                UPDATE games 
-                SET color = ?, number = ?, timestamp = ?
-                WHERE game_id = ?
-            ''', (color, number, get_timestamp(), game_id))
-            conn.commit()
-        except Exception as e:
+                    ON CONFLICT(game_id) DO UPDATE SET
+                        color = excluded.color,
+                        number = excluded.number
+                ''', (game_id, color, number, now_us()))
+            # Pode ter sido atualização de um jogo antigo: recarrega sob demanda
+            self.recent_history.invalidate()
+        except Exception:
             # Em caso de erro, apenas ignora para não bloquear
             pass
-        finally:
-            conn.close()
     
+    def save_games_bulk(self, results: List[Dict]) -> List[Dict]:
+        """Salva em lote apenas as rodadas novas de uma janela de resultados recentes.
+
+        Com ``round_id`` (API) a deduplicação é por chave primária em ``rounds``;
+        sem ele (fallback DOM) alinha a janela contra a cauda armazenada.
+
+        Args:
+            results: Janela de resultados com o mais recente no índice 0
+                (formato de ``get_recent_results``)
+
+        Returns:
+            Rodadas efetivamente inseridas, da mais antiga para a mais recente
+        """
+        # Ordem cronológica (mais antiga primeiro) = ordem de inserção
+        window = [r for r in reversed(results or []) if r.get('color')]
+        if not window:
+            return []
+
+        with self.pool.write() as conn:
+            if all(r.get('round_id') for r in window):
+                new_rounds = self._filter_identified(conn, window)
+            else:
+                # Cauda já armazenada (mesma extensão da janela), em ordem cronológica:
+                # jogos do backfill têm rowids novos mas timestamps antigos
+                tail = conn.execute('''
+                    SELECT color, number FROM games
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                ''', (len(window),)).fetchall()
+                tail.reverse()
+
+                overlap = _find_overlap(tail, [(r.get('color'), r.get('number')) for r in window])
+                new_rounds = window[overlap:]
+            if not new_rounds:
+                return []
+
+            rows, round_rows, inserted = build_round_rows(new_rounds, now_us())
+            conn.executemany('''
+                INSERT OR IGNORE INTO games (game_id, color, number, timestamp)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
+            if round_rows:
+                conn.executemany('''
+                    INSERT OR IGNORE INTO rounds (round_id, game_id, created_at)
+                    VALUES (?, ?, ?)
+                ''', round_rows)
+
+        self.recent_history.extend(Spin(*row) for row in rows)
+        return inserted
+
+    def import_games(self, games: List[tuple], rounds: List[tuple] = ()) -> int:
+        """Insere jogos históricos em lote (backfill), sem alinhamento com a cauda.
+        
+        Args:
+            games: (game_id, color, number, timestamp_us) em ordem cronológica
+            rounds: (round_id, game_id, created_at) das rodadas com id da plataforma
+        
+        Returns:
+            Jogos efetivamente inseridos (game_id repetido é ignorado)
+        """
+        with self.pool.write() as conn:
+            inserted = conn.executemany('''
+                INSERT OR IGNORE INTO games (game_id, color, number, timestamp)
+                VALUES (?, ?, ?, ?)
+            ''', games).rowcount if games else 0
+            if rounds:
+                conn.executemany('''
+                    INSERT OR IGNORE INTO rounds (round_id, game_id, created_at)
+                    VALUES (?, ?, ?)
+                ''', rounds)
+        # Jogos antigos podem entrar no meio do histórico recente
+        self.recent_history.invalidate()
+        return max(0, inserted)
+
+    def _filter_identified(self, conn: sqlite3.Connection, window: List[Dict]) -> List[Dict]:
+        """Retorna as rodadas da janela (com round_id) ainda não armazenadas.
+
+        Rodadas que já entraram pelo fallback DOM (sem id) logo antes são
+        reconhecidas por alinhamento e apenas recebem a identidade em ``rounds``.
+        """
+        ids = [str(r['round_id']) for r in window]
+        placeholders = ','.join('?' * len(ids))
+        known = {row[0] for row in conn.execute(
+            f'SELECT round_id FROM rounds WHERE round_id IN ({placeholders})', ids
+        )}
+        candidates = [r for r in window if str(r['round_id']) not in known]
+        if not candidates:
+            return []
+
+        # Cauda de jogos sem identidade (ingeridos via DOM) mais recente
+        recent = conn.execute('''
+            SELECT g.game_id, g.color, g.number,
+                   EXISTS(SELECT 1 FROM rounds r WHERE r.game_id = g.game_id)
+            FROM games g
+            ORDER BY g.timestamp DESC
+            LIMIT ?
+        ''', (len(candidates),)).fetchall()
+        unidentified = []
+        for game_id, color, number, registered in recent:
+            if registered:
+                break
+            unidentified.append((game_id, color, number))
+        unidentified.reverse()
+
+        overlap = _find_overlap([(c, n) for _, c, n in unidentified],
+                                [(r.get('color'), r.get('number')) for r in candidates])
+        if overlap:
+            offset = len(unidentified) - overlap
+            conn.executemany('''
+                INSERT OR IGNORE INTO rounds (round_id, game_id, created_at)
+                VALUES (?, ?, ?)
+            ''', [
+                (str(candidates[i]['round_id']), unidentified[offset + i][0], candidates[i].get('created_at'))
+                for i in range(overlap)
+            ])
+        return candidates[overlap:]
+
     def save_bet(self, game_id: str, predicted_color: str, bet_amount: float, 
                  confidence: float, actual_color: Optional[str] = None, 
                  result: Optional[str] = None):
         """Salva uma aposta no banco de dados"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO bets (game_id, predicted_color, actual_color, 
-                            bet_amount, confidence, result, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (game_id, predicted_color, actual_color, bet_amount, 
-              confidence, result, get_timestamp()))
-        
-        conn.commit()
-        conn.close()
-        self.update_statistics()
+        with self.pool.write() as conn:
+            conn.execute('''
+                INSERT INTO bets (game_id, predicted_color, actual_color, 
+                                bet_amount, confidence, result, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (game_id, predicted_color, actual_color, bet_amount, 
+                  confidence, result, now_us()))
     
     def update_bet_result(self, game_id: str, actual_color: str, result: str):
         """Atualiza o resultado de uma aposta"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE bets 
-            SET actual_color = ?, result = ?
-            WHERE game_id = ?
-        ''', (actual_color, result, game_id))
-        
-        conn.commit()
-        conn.close()
-        self.update_statistics()
+        with self.pool.write() as conn:
+            conn.execute('''
+                UPDATE bets 
+                SET actual_color = ?, result = ?
+                WHERE game_id = ?
+            ''', (actual_color, result, game_id))
     
-    def get_recent_games(self, limit: int = 50) -> List[Dict]:
-        """Retorna os jogos mais recentes"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT game_id, color, number, timestamp, result
-            FROM games
-            ORDER BY timestamp DESC
-            LIMIT ?
-        ''', (limit,))
-        
+    def _load_recent_spins(self, limit: int) -> List[Spin]:
+        return [Spin(*row[:4]) for row in self._fetch_recent_games(limit)]
+    
+    def _fetch_recent_games(self, limit: int) -> List[tuple]:
+        with self.pool.read() as conn:
+            return conn.execute('''
+                SELECT game_id, color, number, timestamp, result
+                FROM games
+                ORDER BY timestamp DESC
+                LIMIT ?
+            ''', (limit,)).fetchall()
+    
+    def _query_recent_games(self, limit: int) -> List[Dict]:
         games = []
-        for row in cursor.fetchall():
+        for row in self._fetch_recent_games(limit):
             games.append({
                 'game_id': row[0],
                 'color': row[1],
                 'number': row[2],
-                'timestamp': row[3],
+                'timestamp': format_us(row[3]),
                 'result': row[4]
             })
         
-        conn.close()
         return games
     
-    def get_game_history_colors(self, limit: int = 50) -> List[str]:
-        """Retorna apenas as cores dos jogos mais recentes"""
-        games = self.get_recent_games(limit)
-        return [game['color'] for game in games]
+    @contextmanager
+    def history_reader(self, start_us: Optional[int] = None,
+                       end_us: Optional[int] = None) -> Iterator[Tuple[sqlite3.Connection, str]]:
+        """(conexão, tabela) para ler o histórico completo de ``games`` no intervalo
+
+        Sem partições arquivadas no intervalo, empresta um leitor do pool e a
+        tabela ``games``. Caso contrário, abre uma conexão avulsa com os
+        arquivos do intervalo anexados e a view ``all_games`` (ver ``attach_archives``).
+        """
+        with self.pool.read() as conn:
+            if not list_partitions(conn, start_us, end_us):
+                yield conn, 'games'
+                return
+        conn = sqlite3.connect(self.db_path, timeout=self.pool.busy_timeout_ms / 1000.0, isolation_level=None)
+        try:
+            conn.execute(f'PRAGMA busy_timeout = {int(self.pool.busy_timeout_ms)}')
+            attach_archives(conn, start_us, end_us)
+            conn.execute('PRAGMA query_only = 1')
+            yield conn, 'all_games'
+        finally:
+            conn.close()
+
+    def get_games_between(self, start_us: int, end_us: int) -> List[Dict]:
+        """Jogos com ``start_us <= timestamp < end_us`` (microssegundos), em ordem cronológica
+
+        Inclui as partições arquivadas do intervalo.
+        """
+        with self.history_reader(start_us, end_us) as (conn, games_table):
+            rows = conn.execute(f'''
+                SELECT game_id, color, number, timestamp, result
+                FROM {games_table}
+                WHERE timestamp >= ? AND timestamp < ?
+                ORDER BY timestamp
+            ''', (start_us, end_us)).fetchall()
+        return [
+            {'game_id': game_id, 'color': color, 'number': number,
+             'timestamp': format_us(timestamp), 'result': result}
+            for game_id, color, number, timestamp, result in rows
+        ]
+    
+    def get_hourly_counts(self, start_us: Optional[int] = None,
+                          end_us: Optional[int] = None) -> Dict[int, int]:
+        """Jogos por hora (UTC) no intervalo: {início da hora em µs: quantidade}
+        
+        Varredura de intervalo em ``idx_games_timestamp`` com agrupamento por
+        divisão inteira, sem formatar datas linha a linha. Inclui as partições
+        arquivadas do intervalo.
+        """
+        with self.history_reader(start_us, end_us) as (conn, games_table):
+            rows = conn.execute(f'''
+                SELECT timestamp / ?1 AS hour, COUNT(*)
+                FROM {games_table}
+                WHERE timestamp >= ?2 AND timestamp < ?3
+                GROUP BY hour
+                ORDER BY hour
+            ''', (US_PER_HOUR, start_us if start_us is not None else 0,
+                  end_us if end_us is not None else 2 ** 63 - 1)).fetchall()
+        return {hour * US_PER_HOUR: count for hour, count in rows}
+    
+    def get_spin_codes(self, limit: Optional[int] = None) -> bytes:
+        """Giros de ``games`` codificados (1 byte cada), do mais antigo ao mais recente.
+
+        ``limit`` restringe aos N jogos mais recentes. Jogos com cor inválida
+        são ignorados. As partições arquivadas (sempre anteriores ao banco
+        quente) só são lidas quando ``games`` tem menos de ``limit`` jogos.
+        """
+        if limit is not None:
+            with self.pool.read() as conn:
+                enough = conn.execute('SELECT 1 FROM games ORDER BY timestamp DESC LIMIT 1 OFFSET ?',
+                                      (max(0, limit - 1),)).fetchone()
+                if enough:
+                    return read_spin_codes(conn, limit)
+        with self.history_reader() as (conn, games_table):
+            return read_spin_codes(conn, limit, games_table)
+
+    _UPSERT_PATTERN_SQL = '''
+        INSERT INTO patterns
+            (signature, pattern_type, pattern_data, confidence, occurrences,
+             wins, losses, success_rate, last_seen, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?,
+                CASE WHEN ?6 + ?7 > 0 THEN ?6 * 1.0 / (?6 + ?7) END, ?, ?)
+        ON CONFLICT(signature) DO UPDATE SET
+            pattern_data = excluded.pattern_data,
+            confidence = excluded.confidence,
+            occurrences = occurrences + excluded.occurrences,
+            wins = wins + excluded.wins,
+            losses = losses + excluded.losses,
+            success_rate = CASE
+                WHEN wins + excluded.wins + losses + excluded.losses > 0
+                THEN (wins + excluded.wins) * 1.0 / (wins + excluded.wins + losses + excluded.losses)
+            END,
+            last_seen = excluded.last_seen
+    '''
+    
+    def save_patterns(self, patterns: List[Dict], result: Optional[str] = None):
+        """Acumula os padrões de uma rodada (upsert pela assinatura canônica).
+        
+        Args:
+            patterns: Padrões retornados por ``PatternAnalyzer.analyze_history``
+            result: 'WIN'/'LOSS' da aposta feita com esses padrões (None = apenas observado)
+        """
+        timestamp = now_us()
+        win = 1 if result == 'WIN' else 0
+        loss = 1 if result == 'LOSS' else 0
+        rows = []
+        for pattern in patterns or []:
+            pattern_type = pattern.get('type', 'unknown')
+            rows.append((pattern_signature(pattern_type, pattern), pattern_type, json.dumps(pattern),
+                         pattern.get('confidence', 0), 1, win, loss, timestamp, timestamp))
+        if not rows:
+            return
+        with self.pool.write() as conn:
+            conn.executemany(self._UPSERT_PATTERN_SQL, rows)
     
     def save_pattern(self, pattern_type: str, pattern_data: Dict, 
                     success_rate: float, occurrences: int = 1):
-        """Salva um padrão identificado"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        pattern_json = json.dumps(pattern_data)
-        
-        cursor.execute('''
-            INSERT INTO patterns (pattern_type, pattern_data, success_rate, 
-                               occurrences, last_seen)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (pattern_type, pattern_json, success_rate, occurrences, get_timestamp()))
-        
-        conn.commit()
-        conn.close()
+        """Mantido por compatibilidade: registra uma observação via ``save_patterns``"""
+        timestamp = now_us()
+        with self.pool.write() as conn:
+            conn.execute(self._UPSERT_PATTERN_SQL, (
+                pattern_signature(pattern_type, pattern_data), pattern_type, json.dumps(pattern_data),
+                success_rate, occurrences, 0, 0, timestamp, timestamp
+            ))
+    
+    def get_pattern_stats(self, signatures: List[str]) -> Dict[str, Dict]:
+        """Contadores acumulados por assinatura (busca pela chave primária)"""
+        if not signatures:
+            return {}
+        placeholders = ','.join('?' * len(signatures))
+        with self.pool.read() as conn:
+            rows = conn.execute(f'''
+                SELECT signature, occurrences, wins, losses, success_rate
+                FROM patterns
+                WHERE signature IN ({placeholders})
+            ''', list(signatures)).fetchall()
+        return {
+            signature: {'occurrences': occurrences, 'wins': wins, 'losses': losses, 'success_rate': success_rate}
+            for signature, occurrences, wins, losses, success_rate in rows
+        }
     
     def get_statistics(self) -> Dict:
-        """Retorna as estatísticas gerais"""
-        conn = self.get_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM statistics ORDER BY last_updated DESC LIMIT 1')
-            row = cursor.fetchone()
-            if row:
-                return {
-                    'total_games': row[1],
-                    'total_bets': row[2],
-                    'wins': row[3],
-                    'losses': row[4],
-                    'win_rate': row[5],
-                    'total_profit': row[6]
-                }
+        """Retorna as estatísticas gerais (contadores mantidos por triggers)"""
+        with self.pool.read() as conn:
+            row = conn.execute('''
+                SELECT total_games, total_bets, wins, losses, win_rate, total_profit
+                FROM statistics
+                WHERE id = 1
+            ''').fetchone()
+        if row:
             return {
-                'total_games': 0,
-                'total_bets': 0,
-                'wins': 0,
-                'losses': 0,
-                'win_rate': 0.0,
-                'total_profit': 0.0
+                'total_games': row[0],
+                'total_bets': row[1],
+                'wins': row[2],
+                'losses': row[3],
+                'win_rate': row[4],
+                'total_profit': row[5]
             }
-        finally:
-            conn.close()
+        return {
+            'total_games': 0,
+            'total_bets': 0,
+            'wins': 0,
+            'losses': 0,
+            'win_rate': 0.0,
+            'total_profit': 0.0
+        }
     
-    def update_statistics(self):
-        """Atualiza as estatísticas gerais"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Conta jogos
-        cursor.execute('SELECT COUNT(*) FROM games')
-        total_games = cursor.fetchone()[0]
-        
-        # Conta apostas
-        cursor.execute('SELECT COUNT(*) FROM bets')
-        total_bets = cursor.fetchone()[0]
-        
-        # Conta vitórias e derrotas
-        cursor.execute('SELECT COUNT(*) FROM bets WHERE result = "WIN"')
-        wins = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM bets WHERE result = "LOSS"')
-        losses = cursor.fetchone()[0]
-        
-        # Calcula taxa de acerto
-        win_rate = (wins / total_bets * 100) if total_bets > 0 else 0.0
-        
-        # Calcula lucro (simplificado - assume que cada vitória paga 2x o valor apostado)
-        cursor.execute('''
-            SELECT SUM(bet_amount * 2) FROM bets WHERE result = "WIN"
-        ''')
-        total_winnings = cursor.fetchone()[0] or 0.0
-        
-        cursor.execute('SELECT SUM(bet_amount) FROM bets')
-        total_bet_amount = cursor.fetchone()[0] or 0.0
-        
-        total_profit = total_winnings - total_bet_amount
-        
-        # Atualiza ou insere estatísticas
-        cursor.execute('''
-            INSERT OR REPLACE INTO statistics 
-            (id, total_games, total_bets, wins, losses, win_rate, total_profit, last_updated)
-            VALUES (1, ?, ?, ?, ?, ?, ?, ?)
-        ''', (total_games, total_bets, wins, losses, win_rate, total_profit, get_timestamp()))
-        
-        conn.commit()
-        conn.close()
+    def rebuild_statistics(self):
+        """Recalcula os contadores do zero (manutenção).
+        
+        No fluxo normal os triggers de ``games``/``bets`` mantêm a linha
+        ``statistics.id = 1`` atualizada na mesma transação de cada escrita.
+        """
+        with self.pool.write() as conn:
+            conn.execute(REBUILD_STATISTICS_SQL)
+            # Partições já movidas para arquivos continuam contando (ver archive.py)
+            adjust_statistics(conn, archived_totals(conn))
+            # Remove linhas antigas que não são mais mantidas pelos triggers
+            conn.execute('DELETE FROM statistics WHERE id <> 1')
     
-    def save_sequence(self, sequence_length: int, sequence_data: List[Dict]):
-        """Salva uma sequência de jogos para análise"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            # Extrai cores e números da sequência
-            colors = [s.get('color', '') for s in sequence_data]
-            numbers = [str(s.get('number', '')) if s.get('number') is not None else '' for s in sequence_data]
-            
-            # Cria representação da sequência
-            colors_str = ','.join(colors)
-            numbers_str = ','.join(numbers) if any(numbers) else None
-            sequence_str = ','.join([f"{c}:{n}" if n else c for c, n in zip(colors, numbers)])
-            
-            # Insere ou ignora se já existe (evita duplicação)
-            cursor.execute('''
-                INSERT OR IGNORE INTO sequences 
-                (sequence_length, sequence_data, sequence_colors, sequence_numbers, timestamp)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (sequence_length, sequence_str, colors_str, numbers_str, get_timestamp()))
-            
-            conn.commit()
-        except Exception as e:
-            # Em caso de erro, apenas ignora para não bloquear
-            pass
-        finally:
-            conn.close()
+    def save_sequence_blobs(self, sequence_length: int, blobs: List[bytes]):
+        """Grava várias sequências já codificadas em um único comando"""
+        timestamp = now_us()
+        with self.pool.write() as conn:
+            conn.executemany('''
+                INSERT OR IGNORE INTO sequences (sequence_length, spins, timestamp)
+                VALUES (?, ?, ?)
+            ''', [(sequence_length, bytes(blob), timestamp) for blob in blobs])
+
+    def get_sequence_blobs(self, length: Optional[int] = None, limit: int = 500) -> List[bytes]:
+        """Retorna as sequências como ``bytes`` codificados (ver ``src.utils.roulette``).
+        
+        Use ``spin_numbers``/``spin_colors`` para ler sem montar dicts.
+        """
+        with self.pool.read() as conn:
+            if length is None:
+                rows = conn.execute('''
+                    SELECT spins FROM sequences
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                ''', (limit,)).fetchall()
+            else:
+                rows = conn.execute('''
+                    SELECT spins FROM sequences
+                    WHERE sequence_length = ?
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                ''', (length, limit)).fetchall()
+        return [row[0] for row in rows]
     
     def get_sequences_by_length(self, length: int, limit: int = 100) -> List[Dict]:
         """Retorna sequências de um tamanho específico"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT sequence_data, sequence_colors, sequence_numbers, timestamp
-            FROM sequences
-            WHERE sequence_length = ?
-            ORDER BY timestamp DESC
-            LIMIT ?
-        ''', (length, limit))
-        
-        sequences = []
-        for row in cursor.fetchall():
-            sequence_data, colors_str, numbers_str, timestamp = row
-            colors = colors_str.split(',') if colors_str else []
-            numbers = numbers_str.split(',') if numbers_str else []
-            
-            # Reconstroi a sequência
-            seq = []
-            for i, color in enumerate(colors):
-                number = int(numbers[i]) if i < len(numbers) and numbers[i] and numbers[i].isdigit() else None
-                seq.append({'color': color, 'number': number})
-            
-            sequences.append({
-                'sequence': seq,
-                'length': length,
-                'timestamp': timestamp
-            })
-        
-        conn.close()
-        return sequences
+        with self.pool.read() as conn:
+            rows = conn.execute('''
+                SELECT spins, timestamp
+                FROM sequences
+                WHERE sequence_length = ?
+                ORDER BY timestamp DESC
+                LIMIT ?
+            ''', (length, limit)).fetchall()
+        
+        return [
+            {'sequence': decode_spins(spins), 'length': length, 'timestamp': format_us(timestamp)}
+            for spins, timestamp in rows
+        ]
     
     def get_all_sequences(self, limit: int = 500) -> List[Dict]:
         """Retorna todas as sequências coletadas"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT sequence_length, sequence_data, sequence_colors, sequence_numbers, timestamp
-            FROM sequences
-            ORDER BY timestamp DESC
-            LIMIT ?
-        ''', (limit,))
-        
-        sequences = []
-        for row in cursor.fetchall():
-            length, sequence_data, colors_str, numbers_str, timestamp = row
-            colors = colors_str.split(',') if colors_str else []
-            numbers = numbers_str.split(',') if numbers_str else []
-            
-            seq = []
-            for i, color in enumerate(colors):
-                number = int(numbers[i]) if i < len(numbers) and numbers[i] and numbers[i].isdigit() else None
-                seq.append({'color': color, 'number': number})
-            
-            sequences.append({
-                'sequence': seq,
-                'length': length,
-                'timestamp': timestamp
-            })
-        
-        conn.close()
-        return sequences
+        with self.pool.read() as conn:
+            rows = conn.execute('''
+                SELECT sequence_length, spins, timestamp
+                FROM sequences
+                ORDER BY timestamp DESC
+                LIMIT ?
+            ''', (limit,)).fetchall()
+        
+        return [
+            {'sequence': decode_spins(spins), 'length': length, 'timestamp': format_us(timestamp)}
+            for length, spins, timestamp in rows
+        ]
     
     def get_sequence_statistics(self) -> Dict:
         """Retorna estatísticas sobre sequências coletadas"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Total de sequências por tamanho
-        cursor.execute('''
-            SELECT sequence_length, COUNT(*) as count
-            FROM sequences
-            GROUP BY sequence_length
-            ORDER BY sequence_length
-        ''')
-        
-        stats_by_length = {}
-        for row in cursor.fetchall():
-            length, count = row
-            stats_by_length[length] = count
-        
-        # Total geral
-        cursor.execute('SELECT COUNT(*) FROM sequences')
-        total = cursor.fetchone()[0]
-        
-        conn.close()
+        with self.pool.read() as conn:
+            cursor = conn.cursor()
+            
+            # Total de sequências por tamanho
+            cursor.execute('''
+                SELECT sequence_length, COUNT(*) as count
+                FROM sequences
+                GROUP BY sequence_length
+                ORDER BY sequence_length
+            ''')
+            
+            stats_by_length = {}
+            for row in cursor.fetchall():
+                length, count = row
+                stats_by_length[length] = count
+            
+            # Total geral
+            cursor.execute('SELECT COUNT(*) FROM sequences')
+            total = cursor.fetchone()[0]
         
         return {
             'total_sequences': total,
             'by_length': stats_by_length
         }
-
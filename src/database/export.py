@@ -0,0 +1,319 @@
+"""
+Exportação colunar do histórico (Arrow IPC ou Parquet) para pesquisa offline
+
+Cada execução acrescenta uma nova partição por tabela com as linhas após a
+marca d'água registrada em ``_manifest.json``; nada do que já foi exportado
+é relido. Cores são dicionário (0=white, 1=red, 2=black, iguais em todas as
+partições) e timestamps são inteiros em microssegundos desde a época (UTC).
+
+Arquivos Arrow IPC podem ser mapeados em memória diretamente:
+``pyarrow.ipc.open_file(pyarrow.memory_map(path))``.
+
+Requer ``pyarrow`` (dependência opcional).
+"""
+import json
+import os
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from src.utils.roulette import COLOR_CODES, COLOR_NAMES
+from src.utils.timestamps import US_PER_SECOND, now_us, timestamp_to_us
+
+
+FORMATS = ('arrow', 'parquet')
+MANIFEST_NAME = '_manifest.json'
+
+# Consultas paginadas por id das tabelas só de acréscimo
+_APPEND_SQL = {
+    'games': '''
+        SELECT g.id, g.game_id, r.round_id, g.color, g.number, g.timestamp
+        FROM games g
+        LEFT JOIN rounds r ON r.game_id = g.game_id
+        WHERE g.id > ?
+        ORDER BY g.id
+        LIMIT ?
+    ''',
+    'bets': '''
+        SELECT id, game_id, predicted_color, actual_color, bet_amount, confidence, result, timestamp
+        FROM bets
+        WHERE id > ?
+        ORDER BY id
+        LIMIT ?
+    ''',
+}
+
+_PATTERNS_SQL = '''
+    SELECT signature, pattern_type, pattern_data, confidence, occurrences,
+           wins, losses, success_rate, last_seen, created_at
+    FROM patterns
+    ORDER BY signature
+'''
+_PATTERN_COLUMNS = ('signature', 'pattern_type', 'pattern_data', 'confidence', 'occurrences',
+                    'wins', 'losses', 'success_rate', 'last_seen_us', 'created_at_us')
+
+
+def _color_code(color: Optional[str]) -> Optional[int]:
+    return COLOR_CODES.get((color or '').lower())
+
+
+def _games_columns(rows: List[tuple]) -> Dict[str, list]:
+    return {
+        'id': [r[0] for r in rows],
+        'game_id': [r[1] for r in rows],
+        'round_id': [r[2] for r in rows],
+        'color': [_color_code(r[3]) for r in rows],
+        'number': [r[4] for r in rows],
+        'timestamp_us': [timestamp_to_us(r[5]) for r in rows],
+    }
+
+
+def _bets_columns(rows: List[tuple]) -> Dict[str, list]:
+    return {
+        'id': [r[0] for r in rows],
+        'game_id': [r[1] for r in rows],
+        'predicted_color': [_color_code(r[2]) for r in rows],
+        'actual_color': [_color_code(r[3]) for r in rows],
+        'bet_amount': [r[4] for r in rows],
+        'confidence': [r[5] for r in rows],
+        'result': [r[6] for r in rows],
+        'timestamp_us': [timestamp_to_us(r[7]) for r in rows],
+    }
+
+
+def _patterns_columns(rows: List[tuple]) -> Dict[str, list]:
+    columns = {name: [r[i] for r in rows] for i, name in enumerate(_PATTERN_COLUMNS[:8])}
+    columns['last_seen_us'] = [timestamp_to_us(r[8]) for r in rows]
+    columns['created_at_us'] = [timestamp_to_us(r[9]) for r in rows]
+    return columns
+
+
+_COLUMN_BUILDERS = {'games': _games_columns, 'bets': _bets_columns}
+
+
+def _schemas() -> Dict[str, 'pa.Schema']:
+    color = pa.dictionary(pa.int8(), pa.string())
+    return {
+        'games': pa.schema([
+            ('id', pa.int64()), ('game_id', pa.string()), ('round_id', pa.string()),
+            ('color', color), ('number', pa.int8()), ('timestamp_us', pa.int64()),
+        ]),
+        'bets': pa.schema([
+            ('id', pa.int64()), ('game_id', pa.string()), ('predicted_color', color),
+            ('actual_color', color), ('bet_amount', pa.float64()), ('confidence', pa.float64()),
+            ('result', pa.string()), ('timestamp_us', pa.int64()),
+        ]),
+        'patterns': pa.schema([
+            ('signature', pa.string()), ('pattern_type', pa.string()), ('pattern_data', pa.string()),
+            ('confidence', pa.float64()), ('occurrences', pa.int64()), ('wins', pa.int64()),
+            ('losses', pa.int64()), ('success_rate', pa.float64()),
+            ('last_seen_us', pa.int64()), ('created_at_us', pa.int64()),
+        ]),
+    }
+
+
+class _PartitionWriter:
+    """Grava lotes (record batches / row groups) em um único arquivo"""
+
+    def __init__(self, path: str, schema: 'pa.Schema', fmt: str):
+        self.path = path
+        self.schema = schema
+        self.fmt = fmt
+        self.rows = 0
+        self._tmp_path = f"{path}.tmp"
+        if fmt == 'parquet':
+            self._writer = pq.ParquetWriter(self._tmp_path, schema, compression='zstd')
+        else:
+            self._sink = pa.OSFile(self._tmp_path, 'wb')
+            self._writer = pa_ipc.new_file(self._sink, schema)
+
+    def write(self, columns: Dict[str, list]):
+        arrays = []
+        dictionary = pa.array(COLOR_NAMES, type=pa.string())
+        for field in self.schema:
+            values = columns[field.name]
+            if pa.types.is_dictionary(field.type):
+                indices = pa.array(values, type=field.type.index_type)
+                arrays.append(pa.DictionaryArray.from_arrays(indices, dictionary))
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if self.fmt == 'parquet':
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+        self.rows += batch.num_rows
+
+    def close(self):
+        self._writer.close()
+        if self.fmt != 'parquet':
+            self._sink.close()
+        # Partição só aparece completa (leitores nunca veem arquivo pela metade)
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        try:
+            self._writer.close()
+            if self.fmt != 'parquet':
+                self._sink.close()
+        finally:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+
+class ColumnarExporter:
+    """Exporta ``games``, ``bets`` e ``patterns`` de um ``Database`` em partições colunares.
+
+    Layout em ``out_dir``::
+
+        _manifest.json                     marcas d'água e partições por tabela
+        games/part-<primeiro>-<último>.arrow
+        bets/part-<primeiro>-<último>.arrow
+        patterns/snapshot.arrow            reescrito a cada execução (contadores mudam)
+    """
+
+    def __init__(self, db, out_dir: str, fmt: str = 'arrow', chunk_rows: int = 65536,
+                 pending_bet_max_age: int = 86400):
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato inválido: {fmt!r} (use {', '.join(FORMATS)})")
+        self.db = db
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.chunk_rows = max(1, chunk_rows)
+        # Segundos em que uma aposta sem resultado ainda pode ser resolvida (config.PENDING_BET_MAX_AGE)
+        self.pending_bet_max_age = pending_bet_max_age
+        self.manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+
+    def load_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        if manifest.get('format', self.fmt) != self.fmt:
+            raise ValueError(
+                f"{self.out_dir} já contém exportação em {manifest['format']}; use outro diretório"
+            )
+        manifest.setdefault('format', self.fmt)
+        manifest.setdefault('tables', {})
+        return manifest
+
+    def _save_manifest(self, manifest: Dict):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def iter_chunks(self, table: str, after_id: int) -> Iterator[List[tuple]]:
+        """Linhas de ``table`` com id > ``after_id``, em blocos de ``chunk_rows``
+
+        Paginação por chave (``WHERE id > ?``): cada bloco é uma consulta curta,
+        sem manter um cursor aberto durante a gravação dos arquivos.
+        """
+        sql = _APPEND_SQL[table]
+        stop_id = None
+        if table == 'bets':
+            stop_id = self._first_pending_bet(after_id)
+        while True:
+            with self.db.pool.read() as conn:
+                rows = conn.execute(sql, (after_id, self.chunk_rows)).fetchall()
+            if stop_id is not None:
+                rows = [row for row in rows if row[0] < stop_id]
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1][0]
+            if len(rows) < self.chunk_rows:
+                return
+
+    def _first_pending_bet(self, after_id: int) -> Optional[int]:
+        """Primeira aposta ainda sem resultado (ela e as seguintes só saem quando resolvida)
+
+        Apostas sem resultado há mais de ``pending_bet_max_age`` segundos são
+        abandonadas (o bot só resolve a aposta da rodada corrente) e saem como estão.
+        """
+        with self.db.pool.read() as conn:
+            row = conn.execute('''
+                SELECT MIN(id) FROM bets
+                WHERE id > ? AND result IS NULL AND timestamp >= ?
+            ''', (after_id, now_us() - self.pending_bet_max_age * US_PER_SECOND)).fetchone()
+        return row[0] if row else None
+
+    def export(self, tables=('games', 'bets', 'patterns')) -> Dict[str, int]:
+        """Acrescenta as linhas novas de cada tabela como uma nova partição
+
+        Returns:
+            Linhas exportadas por tabela nesta execução
+        """
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("pyarrow não está instalado. Execute: pip install pyarrow")
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        manifest = self.load_manifest()
+        schemas = _schemas()
+        exported = {}
+
+        for table in tables:
+            if table == 'patterns':
+                exported[table] = self._export_patterns(manifest, schemas[table])
+            else:
+                exported[table] = self._export_append(table, manifest, schemas[table])
+            # Manifesto gravado a cada tabela: uma falha posterior não perde o progresso
+            self._save_manifest(manifest)
+        return exported
+
+    def _export_append(self, table: str, manifest: Dict, schema: 'pa.Schema') -> int:
+        state = manifest['tables'].setdefault(table, {'hwm': 0, 'rows': 0, 'partitions': []})
+        table_dir = os.path.join(self.out_dir, table)
+        os.makedirs(table_dir, exist_ok=True)
+
+        writer = None
+        first_id = last_id = None
+        try:
+            for rows in self.iter_chunks(table, state['hwm']):
+                if writer is None:
+                    first_id = rows[0][0]
+                    # Nome definitivo só é conhecido no fim; grava em um nome provisório
+                    writer = _PartitionWriter(os.path.join(table_dir, f"part-{first_id:012d}.{self.fmt}"),
+                                              schema, self.fmt)
+                writer.write(_COLUMN_BUILDERS[table](rows))
+                last_id = rows[-1][0]
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+
+        if writer is None:
+            return 0
+        name = f"part-{first_id:012d}-{last_id:012d}.{self.fmt}"
+        writer.path = os.path.join(table_dir, name)
+        writer.close()
+
+        state['hwm'] = last_id
+        state['rows'] += writer.rows
+        state['partitions'].append({'file': f"{table}/{name}", 'rows': writer.rows,
+                                    'first_id': first_id, 'last_id': last_id})
+        return writer.rows
+
+    def _export_patterns(self, manifest: Dict, schema: 'pa.Schema') -> int:
+        with self.db.pool.read() as conn:
+            rows = conn.execute(_PATTERNS_SQL).fetchall()
+        table_dir = os.path.join(self.out_dir, 'patterns')
+        os.makedirs(table_dir, exist_ok=True)
+        writer = _PartitionWriter(os.path.join(table_dir, f"snapshot.{self.fmt}"), schema, self.fmt)
+        try:
+            writer.write(_patterns_columns(rows))
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+        manifest['tables']['patterns'] = {'rows': writer.rows, 'partitions': [
+            {'file': f"patterns/snapshot.{self.fmt}", 'rows': writer.rows}
+        ]}
+        return writer.rows
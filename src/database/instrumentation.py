@@ -0,0 +1,280 @@
+"""
+Instrumentação opcional de latência do banco de dados
+
+``DatabaseMetrics.instrument(db)`` envolve os métodos públicos de uma
+instância de ``Database`` ou outro ``StorageBackend`` (a classe não é alterada) e registra, por método:
+chamadas, erros, linhas retornadas e um histograma de latência com
+p50/p95/p99. ``wrap_lock`` mede o tempo de espera para adquirir um lock;
+``instrument`` o aplica ao lock do escritor do pool (``pool.writer``), o
+ponto de contenção entre o bot e a thread de escrita.
+
+``MetricsReporter`` grava periodicamente uma linha JSON por intervalo em um
+arquivo de log, para comparar as latências à medida que as tabelas crescem.
+"""
+import json
+import math
+import threading
+import time
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+from src.utils.timestamps import format_us, now_us
+
+
+# Buckets logarítmicos: 4 por potência de 2 (erro relativo máximo de ~19%)
+_BUCKETS_PER_OCTAVE = 4
+_PERCENTILES = (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+
+
+class LatencyHistogram:
+    """Histograma de durações com memória constante (buckets em microssegundos)"""
+
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets: Dict[int, int] = {}
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        micros = seconds * 1e6
+        index = int(math.log2(micros) * _BUCKETS_PER_OCTAVE) + 1 if micros > 1 else 0
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def percentile(self, fraction: float) -> float:
+        """Limite superior (em segundos) do bucket que contém o percentil"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                upper = 2 ** (index / _BUCKETS_PER_OCTAVE) / 1e6
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self) -> Dict:
+        summary = {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total * 1000 / self.count, 4) if self.count else 0.0,
+            'max_ms': round(self.max * 1000, 4),
+        }
+        for name, fraction in _PERCENTILES:
+            summary[f'{name}_ms'] = round(self.percentile(fraction) * 1000, 4)
+        return summary
+
+
+class _MethodStats:
+    __slots__ = ('latency', 'errors', 'rows')
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.rows = 0
+
+
+# Métodos públicos que não são operações do banco (gerenciadores de contexto)
+_NOT_TIMED = ('transaction',)
+
+
+def _row_count(result) -> int:
+    """Linhas retornadas por um método (listas de jogos, blobs, bytes de giros)"""
+    if isinstance(result, (list, tuple, bytes, bytearray)):
+        return len(result)
+    return 0
+
+
+class InstrumentedLock:
+    """Envolve um ``Lock``/``RLock`` medindo a espera em ``acquire``"""
+
+    def __init__(self, lock, metrics: 'DatabaseMetrics', name: str):
+        self._lock = lock
+        self._metrics = metrics
+        self.name = name
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        start = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        # Tentativas não bloqueantes não esperam: não entram no histograma
+        if blocking:
+            self._metrics.record_wait(self.name, time.perf_counter() - start)
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class DatabaseMetrics:
+    """Contadores de latência por método do banco e de espera por lock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods: Dict[str, _MethodStats] = {}
+        self._waits: Dict[str, LatencyHistogram] = {}
+        self._since_us = now_us()
+
+    def record(self, method: str, seconds: float, rows: int = 0, error: bool = False):
+        with self._lock:
+            stats = self._methods.get(method)
+            if stats is None:
+                stats = self._methods[method] = _MethodStats()
+            stats.latency.add(seconds)
+            stats.rows += rows
+            if error:
+                stats.errors += 1
+
+    def record_wait(self, name: str, seconds: float):
+        with self._lock:
+            histogram = self._waits.get(name)
+            if histogram is None:
+                histogram = self._waits[name] = LatencyHistogram()
+            histogram.add(seconds)
+
+    def _wrap(self, name: str, method: Callable) -> Callable:
+        @wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except BaseException:
+                self.record(name, time.perf_counter() - start, error=True)
+                raise
+            self.record(name, time.perf_counter() - start, _row_count(result))
+            return result
+        return timed
+
+    def instrument(self, db, wrap_pool_lock: bool = True):
+        """Passa a medir os métodos públicos de ``db`` (apenas esta instância)
+
+        Chamadas feitas pelo ``WriteBehindWorker`` também são medidas, pois ele
+        resolve os métodos por ``getattr`` na instância.
+        """
+        for name in dir(type(db)):
+            if name.startswith('_') or name in _NOT_TIMED:
+                continue
+            attribute = getattr(type(db), name)
+            if not callable(attribute) or isinstance(attribute, type):
+                continue
+            setattr(db, name, self._wrap(name, getattr(db, name)))
+        pool = getattr(db, 'pool', None)  # só o motor SQLite tem pool de conexões
+        if wrap_pool_lock and pool is not None and not isinstance(pool._writer_lock, InstrumentedLock):
+            pool._writer_lock = self.wrap_lock(pool._writer_lock, 'pool.writer')
+        return db
+
+    def wrap_lock(self, lock, name: str) -> InstrumentedLock:
+        return InstrumentedLock(lock, self, name)
+
+    def snapshot(self, reset: bool = False) -> Dict:
+        """Resumo desde o início (ou desde o último ``reset``)"""
+        with self._lock:
+            methods = {
+                name: dict(stats.latency.summary(), errors=stats.errors, rows=stats.rows)
+                for name, stats in self._methods.items()
+            }
+            waits = {name: histogram.summary() for name, histogram in self._waits.items()}
+            snapshot = {'since_us': self._since_us, 'until_us': now_us(),
+                        'methods': methods, 'locks': waits}
+            if reset:
+                self._methods = {}
+                self._waits = {}
+                self._since_us = snapshot['until_us']
+        return snapshot
+
+    def format_report(self, snapshot: Optional[Dict] = None) -> str:
+        """Tabela em texto, métodos ordenados pelo tempo total"""
+        snapshot = snapshot or self.snapshot()
+        lines = [f"Métricas do banco ({format_us(snapshot['since_us'])} → {format_us(snapshot['until_us'])})",
+                 f"{'método':<28} {'chamadas':>9} {'erros':>6} {'linhas':>9} "
+                 f"{'total ms':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'máx ms':>8}"]
+        methods = sorted(snapshot['methods'].items(), key=lambda item: -item[1]['total_ms'])
+        for name, m in methods:
+            lines.append(f"{name:<28} {m['count']:>9} {m['errors']:>6} {m['rows']:>9} "
+                         f"{m['total_ms']:>10.1f} {m['p50_ms']:>8.3f} {m['p95_ms']:>8.3f} "
+                         f"{m['p99_ms']:>8.3f} {m['max_ms']:>8.3f}")
+        for name, w in sorted(snapshot['locks'].items()):
+            lines.append(f"{'espera ' + name:<28} {w['count']:>9} {'':>6} {'':>9} "
+                         f"{w['total_ms']:>10.1f} {w['p50_ms']:>8.3f} {w['p95_ms']:>8.3f} "
+                         f"{w['p99_ms']:>8.3f} {w['max_ms']:>8.3f}")
+        return '\n'.join(lines)
+
+    def dump(self, path: Optional[str] = None, reset: bool = False) -> str:
+        """Relatório sob demanda; se ``path`` for dado, acrescenta a linha JSON ao log"""
+        snapshot = self.snapshot(reset=reset)
+        if path:
+            append_metrics_log(path, snapshot)
+        return self.format_report(snapshot)
+
+
+def append_metrics_log(path: str, snapshot: Dict):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(snapshot, separators=(',', ':')) + '\n')
+
+
+def read_metrics_log(path: str) -> List[Dict]:
+    """Registros do log (linhas inválidas, ex.: gravação interrompida, são ignoradas)"""
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+class MetricsReporter:
+    """Thread que grava um resumo por intervalo (e zera os contadores) no log"""
+
+    def __init__(self, metrics: DatabaseMetrics, path: str, interval: float = 300.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = max(1.0, interval)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Inicia a thread de registro (idempotente)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='db-metrics', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Grava o intervalo em andamento e encerra a thread"""
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._write()
+        self._write()
+
+    def _write(self):
+        snapshot = self.metrics.snapshot(reset=True)
+        if not snapshot['methods'] and not snapshot['locks']:
+            return
+        try:
+            append_metrics_log(self.path, snapshot)
+        except OSError as e:
+            print(f"[AVISO] Falha ao gravar métricas do banco em {self.path}: {e}")
@@ -0,0 +1,285 @@
+"""
+Manutenção online do banco: backup incremental, integridade e vacuum incremental
+
+Tudo roda com o bot em execução, sem parar o PM2:
+
+    - ``backup``: API de backup do SQLite em passos de poucas páginas, com
+      pausa de ``step_sleep`` após cada passo (também nos que não esbarram
+      em lock), para não disputar disco com o loop do bot. A conexão de origem (fora do pool) mantém uma
+      transação de leitura aberta durante a cópia: no WAL isso fixa um
+      snapshot, então as escritas do bot não reiniciam o backup e o arquivo
+      gerado corresponde a um único ponto no tempo.
+    - ``quick_check``: ``PRAGMA quick_check`` em uma conexão somente leitura
+      própria (não ocupa os leitores do pool nem bloqueia o escritor).
+    - ``incremental_vacuum``: devolve páginas livres ao sistema em lotes
+      pequenos pela conexão de escrita. Exige ``auto_vacuum = INCREMENTAL``,
+      padrão dos bancos novos; ``enable_incremental_vacuum`` converte um banco
+      existente com um VACUUM completo (bloqueia escritas enquanto durar).
+
+``MaintenanceWorker`` agenda as três tarefas em uma thread própria. As
+partições arquivadas (``ARCHIVE_DIR``) são arquivos fechados e não entram
+no backup: copie o diretório junto.
+"""
+import glob
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+
+TASKS = ('backup', 'quick_check', 'vacuum')
+_AUTO_VACUUM_INCREMENTAL = 2
+_BACKUP_STAMP = '%Y%m%d-%H%M%S'
+
+
+class BackupCancelled(Exception):
+    """Backup interrompido a pedido (ex.: encerramento do bot)"""
+
+
+class DatabaseMaintenance:
+    """Tarefas de manutenção de um ``Database`` aberto pelo bot"""
+
+    def __init__(self, db, backup_dir: str = 'backups', backup_keep: int = 4,
+                 pages_per_step: int = 256, step_sleep: float = 0.05, vacuum_pages: int = 512):
+        self.db = db
+        self.backup_dir = backup_dir
+        self.backup_keep = max(1, backup_keep)
+        self.pages_per_step = max(1, pages_per_step)
+        self.step_sleep = max(0.0, step_sleep)
+        self.vacuum_pages = max(1, vacuum_pages)
+
+    def _connect(self, path: str, readonly: bool = False) -> sqlite3.Connection:
+        busy_timeout_ms = self.db.pool.busy_timeout_ms
+        conn = sqlite3.connect(path, timeout=busy_timeout_ms / 1000.0, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute(f'PRAGMA busy_timeout = {int(busy_timeout_ms)}')
+        if readonly:
+            conn.execute('PRAGMA query_only = 1')
+        return conn
+
+    # ===== Backup =====
+    def backup_path(self, moment: Optional[datetime] = None) -> str:
+        """``<dir>/<banco>.<AAAAMMDD-HHMMSS>.db``"""
+        name = os.path.splitext(os.path.basename(self.db.db_path))[0]
+        stamp = (moment or datetime.now()).strftime(_BACKUP_STAMP)
+        return os.path.join(self.backup_dir, f'{name}.{stamp}.db')
+
+    def list_backups(self) -> List[str]:
+        """Backups existentes, do mais antigo ao mais recente"""
+        name = os.path.splitext(os.path.basename(self.db.db_path))[0]
+        return sorted(glob.glob(os.path.join(self.backup_dir, f'{name}.????????-??????.db')))
+
+    def backup(self, dest_path: Optional[str] = None, verify: bool = True,
+               should_stop: Optional[Callable[[], bool]] = None,
+               progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """Copia o banco para ``dest_path`` (padrão: ``backup_path()``) sem parar as escritas
+
+        A cópia é gravada em ``<destino>.part`` e renomeada ao final, então um
+        backup interrompido nunca substitui um arquivo válido.
+
+        Args:
+            verify: Executa ``quick_check`` na cópia
+            should_stop: Consultada a cada passo; se verdadeira, cancela o backup
+                (a duração mínima é ``passos * step_sleep``)
+            progress: Recebe (páginas copiadas, total de páginas) a cada passo
+        """
+        if self.db.pool.in_memory:
+            raise RuntimeError("Backup online requer um banco em arquivo")
+        dest_path = dest_path or self.backup_path()
+        os.makedirs(os.path.dirname(dest_path) or '.', exist_ok=True)
+        partial = dest_path + '.part'
+        if os.path.exists(partial):
+            os.remove(partial)
+
+        counters = {'steps': 0, 'pages': 0}
+
+        def on_step(status, remaining, total):
+            counters['steps'] += 1
+            counters['pages'] = total
+            if progress:
+                progress(total - remaining, total)
+            if should_stop and should_stop():
+                raise BackupCancelled("Backup cancelado")
+            # O ``sleep`` de ``Connection.backup`` só vale para passos BUSY/LOCKED:
+            # a pausa entre passos normais é feita aqui
+            if remaining and self.step_sleep:
+                time.sleep(self.step_sleep)
+
+        start = time.perf_counter()
+        source = self._connect(self.db.db_path, readonly=True)
+        target = sqlite3.connect(partial, isolation_level=None)
+        try:
+            # Transação de leitura aberta durante toda a cópia: snapshot fixo do WAL
+            source.execute('BEGIN')
+            source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            page_size = source.execute('PRAGMA page_size').fetchone()[0]
+            source.backup(target, pages=self.pages_per_step, progress=on_step, sleep=self.step_sleep)
+            source.execute('COMMIT')
+            check = None
+            if verify:
+                check = [row[0] for row in target.execute('PRAGMA quick_check')]
+        except BaseException:
+            target.close()
+            source.close()
+            for leftover in (partial, partial + '-wal', partial + '-shm'):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            raise
+        target.close()
+        source.close()
+        os.replace(partial, dest_path)
+
+        result = {
+            'path': dest_path,
+            'pages': counters['pages'],
+            'steps': counters['steps'],
+            'bytes': counters['pages'] * page_size,
+            'elapsed': time.perf_counter() - start,
+            'ok': check is None or check == ['ok'],
+        }
+        if check is not None and check != ['ok']:
+            result['errors'] = check
+        return result
+
+    def prune_backups(self) -> List[str]:
+        """Apaga os backups além dos ``backup_keep`` mais recentes"""
+        removed = self.list_backups()[:-self.backup_keep]
+        for path in removed:
+            os.remove(path)
+        return removed
+
+    # ===== Integridade =====
+    def quick_check(self, max_errors: int = 10) -> Dict:
+        """``PRAGMA quick_check`` (estrutura das páginas e registros, sem índices x tabelas)"""
+        start = time.perf_counter()
+        conn = self._connect(self.db.db_path, readonly=True)
+        try:
+            rows = [row[0] for row in conn.execute(f'PRAGMA quick_check({int(max_errors)})')]
+            pages = conn.execute('PRAGMA page_count').fetchone()[0]
+        finally:
+            conn.close()
+        result = {'ok': rows == ['ok'], 'pages': pages, 'elapsed': time.perf_counter() - start}
+        if rows != ['ok']:
+            result['errors'] = rows
+        return result
+
+    # ===== Vacuum incremental =====
+    def incremental_vacuum(self, max_pages: Optional[int] = None) -> Dict:
+        """Libera até ``max_pages`` páginas livres (uma transação curta de escrita)"""
+        max_pages = max_pages or self.vacuum_pages
+        start = time.perf_counter()
+        with self.db.pool.write() as conn:
+            mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if mode == _AUTO_VACUUM_INCREMENTAL and before:
+                conn.execute(f'PRAGMA incremental_vacuum({int(max_pages)})').fetchall()
+                after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            else:
+                after = before
+        return {
+            'enabled': mode == _AUTO_VACUUM_INCREMENTAL,
+            'freed': before - after,
+            'free_pages': after,
+            'elapsed': time.perf_counter() - start,
+        }
+
+    def enable_incremental_vacuum(self) -> Dict:
+        """Converte o banco para ``auto_vacuum = INCREMENTAL`` (VACUUM completo, uma única vez)"""
+        start = time.perf_counter()
+        with self.db.pool.outside_transaction() as conn:
+            mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            if mode != _AUTO_VACUUM_INCREMENTAL:
+                conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                conn.execute('VACUUM')
+            pages = conn.execute('PRAGMA page_count').fetchone()[0]
+        return {'converted': mode != _AUTO_VACUUM_INCREMENTAL, 'pages': pages,
+                'elapsed': time.perf_counter() - start}
+
+
+def format_result(task: str, result: Dict) -> str:
+    """Resumo de uma linha para o log do bot"""
+    elapsed = f"{result['elapsed']:.2f} s"
+    if task == 'backup':
+        status = 'ok' if result['ok'] else f"FALHOU na verificação: {'; '.join(result['errors'])}"
+        return (f"backup {os.path.basename(result['path'])}: {result['pages']} páginas "
+                f"({result['bytes'] / 1024 / 1024:.1f} MB) em {result['steps']} passos, {elapsed} ({status})")
+    if task == 'quick_check':
+        status = 'ok' if result['ok'] else '; '.join(result['errors'])
+        return f"quick_check: {status} ({result['pages']} páginas em {elapsed})"
+    if not result['enabled']:
+        return (f"vacuum incremental desativado (auto_vacuum != INCREMENTAL, "
+                f"{result['free_pages']} páginas livres): use db_maintenance.py vacuum --enable")
+    return f"vacuum incremental: {result['freed']} páginas liberadas, {result['free_pages']} livres ({elapsed})"
+
+
+class MaintenanceWorker:
+    """Thread que executa backup, quick_check e vacuum incremental periodicamente
+
+    Intervalos em segundos; 0 desativa a tarefa. As tarefas vencidas rodam
+    uma de cada vez, então nunca há dois backups ou verificações simultâneos.
+    """
+
+    def __init__(self, maintenance: DatabaseMaintenance, backup_interval: float = 21600.0,
+                 check_interval: float = 3600.0, vacuum_interval: float = 3600.0,
+                 initial_delay: float = 60.0, log: Callable[[str], None] = print):
+        self.maintenance = maintenance
+        self.intervals = {'backup': backup_interval, 'quick_check': check_interval,
+                          'vacuum': vacuum_interval}
+        self.initial_delay = max(0.0, initial_delay)
+        self.log = log
+        self.last_results: Dict[str, Dict] = {}
+        self._next_run: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Inicia a thread de manutenção (idempotente)"""
+        if self._thread and self._thread.is_alive():
+            return
+        first = time.monotonic() + self.initial_delay
+        self._next_run = {task: first for task, interval in self.intervals.items() if interval > 0}
+        if not self._next_run:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='db-maintenance', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Encerra a thread (um backup em andamento é cancelado no próximo passo)"""
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(max(0.0, min(self._next_run.values()) - time.monotonic())):
+            for task in TASKS:
+                if task not in self._next_run or self._next_run[task] > time.monotonic():
+                    continue
+                self.run_task(task)
+                self._next_run[task] = time.monotonic() + self.intervals[task]
+                if self._stop.is_set():
+                    return
+
+    def run_task(self, task: str) -> Optional[Dict]:
+        """Executa uma tarefa agora e registra o resultado"""
+        try:
+            if task == 'backup':
+                result = self.maintenance.backup(should_stop=self._stop.is_set)
+                self.maintenance.prune_backups()
+            elif task == 'quick_check':
+                result = self.maintenance.quick_check()
+            else:
+                result = self.maintenance.incremental_vacuum()
+        except BackupCancelled:
+            return None
+        except (sqlite3.Error, OSError) as e:
+            self.log(f"[AVISO] Manutenção do banco ({task}) falhou: {e}")
+            return None
+        self.last_results[task] = result
+        ok = result.get('ok', True)
+        self.log(f"[{'MANUTENÇÃO' if ok else 'AVISO'}] {format_result(task, result)}")
+        return result
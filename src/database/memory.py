@@ -0,0 +1,436 @@
+"""
+Motor de armazenamento em memória para simulações e backtests
+
+Mesma interface de ``Database`` (ver ``StorageBackend``), sem disco e sem
+SQL. ``games`` é guardado em colunas paralelas ordenadas por timestamp:
+
+    - ``_timestamps``: ``array('q')`` em microssegundos (busca por ``bisect``)
+    - ``_codes``: ``bytearray`` com 1 byte por giro (``encode_spin``), de onde
+      saem cor e número sem um objeto por jogo
+    - ``_game_ids``: lista de chaves, com índice ``game_id -> posição``
+
+Apostas também são colunas (``array('d')`` para valores); padrões e
+sequências ficam em dicionários. As estatísticas são mantidas a cada
+escrita com as mesmas regras dos triggers do SQLite.
+
+Giros com cor inválida (que ``encode_spin`` rejeita) não são armazenados.
+"""
+import json
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.patterns import pattern_signature
+from src.utils.roulette import decode_spins, encode_spin
+from src.utils.timestamps import US_PER_HOUR, format_us, now_us
+
+from .database import _find_overlap, build_round_rows
+from .recent_history import RecentHistory, Spin
+from .storage import StorageBackend
+
+
+# Código do giro -> (cor, número)
+_DECODED = [(spin['color'], spin['number']) for spin in decode_spins(bytes(range(17)))]
+_LOAD_FETCH_SIZE = 8192
+
+
+class MemoryDatabase(StorageBackend):
+    """Histórico, apostas, padrões e sequências inteiramente em memória"""
+
+    def __init__(self, recent_cache_size: int = 500):
+        self._lock = threading.RLock()
+        self.db_path = ':memory:'
+
+        # games (ordenado por timestamp; ver _ensure_sorted)
+        self._game_ids: List[str] = []
+        self._codes = bytearray()
+        self._timestamps = array('q')
+        self._index: Dict[str, int] = {}
+        self._sorted = True
+        # rounds: round_id -> (game_id, created_at)
+        self._rounds: Dict[str, Tuple[str, Optional[str]]] = {}
+        self._identified: set = set()
+
+        # bets
+        self._bet_game_ids: List[Optional[str]] = []
+        self._bet_predicted: List[str] = []
+        self._bet_actual: List[Optional[str]] = []
+        self._bet_results: List[Optional[str]] = []
+        self._bet_amounts = array('d')
+        self._bet_confidences = array('d')
+        self._bet_timestamps = array('q')
+
+        # patterns: assinatura -> [tipo, dados, confiança, ocorrências, vitórias, derrotas,
+        #                          taxa de sucesso, visto por último, criado em]
+        self._patterns: Dict[str, list] = {}
+        # sequences: (tamanho, giros) únicos, na ordem de inserção
+        self._sequences: List[Tuple[int, bytes, int]] = []
+        self._sequence_keys: set = set()
+
+        self._stats = {'total_games': 0, 'total_bets': 0, 'wins': 0, 'losses': 0,
+                       'win_rate': 0.0, 'total_profit': 0.0}
+
+        self.recent_history = RecentHistory(maxlen=recent_cache_size)
+        self.recent_history.load(self._load_recent_spins)
+
+    @classmethod
+    def from_sqlite(cls, db_path: str, recent_cache_size: int = 500, archives: bool = True,
+                    busy_timeout_ms: int = 5000) -> 'MemoryDatabase':
+        """Carrega um banco SQLite (e suas partições arquivadas) em memória
+
+        A leitura usa um ``DatabaseSnapshot``: o arquivo nunca é aberto para
+        escrita e pode estar em uso pelo bot. Sem arquivo, retorna um banco vazio.
+        """
+        db = cls(recent_cache_size=recent_cache_size)
+        if not db_path or db_path == ':memory:' or not os.path.exists(db_path):
+            return db
+
+        from .snapshot import DatabaseSnapshot
+        with DatabaseSnapshot(db_path, busy_timeout_ms=busy_timeout_ms, archives=archives) as snapshot:
+            db.load_connection(snapshot.get_connection(),
+                               games_table='all_games' if archives else 'games',
+                               bets_table='all_bets' if archives else 'bets',
+                               rounds_table='all_rounds' if archives else 'rounds')
+        return db
+
+    def load_connection(self, conn, games_table: str = 'games', bets_table: str = 'bets',
+                        rounds_table: str = 'rounds'):
+        """Acrescenta as tabelas de uma conexão SQLite (esquema de ``Database``)"""
+        cursor = conn.cursor()
+        cursor.arraysize = _LOAD_FETCH_SIZE
+        with self._lock:
+            cursor.execute(f'''
+                SELECT g.game_id, g.color, g.number, g.timestamp, r.round_id, r.created_at
+                FROM {games_table} g
+                LEFT JOIN {rounds_table} r ON r.game_id = g.game_id
+                ORDER BY g.timestamp
+            ''')
+            for rows in iter(cursor.fetchmany, []):
+                for game_id, color, number, timestamp, round_id, created_at in rows:
+                    if self._append_game(game_id, color, number, timestamp) and round_id:
+                        self._add_round(round_id, game_id, created_at)
+
+            cursor.execute(f'''
+                SELECT game_id, predicted_color, actual_color, bet_amount, confidence, result, timestamp
+                FROM {bets_table}
+                ORDER BY id
+            ''')
+            for rows in iter(cursor.fetchmany, []):
+                for row in rows:
+                    self._append_bet(*row)
+
+            for row in cursor.execute('''
+                SELECT signature, pattern_type, pattern_data, confidence, occurrences,
+                       wins, losses, success_rate, last_seen, created_at
+                FROM patterns
+            '''):
+                self._patterns[row[0]] = list(row[1:])
+
+            for length, spins, timestamp in cursor.execute('''
+                SELECT sequence_length, spins, timestamp FROM sequences ORDER BY timestamp
+            '''):
+                self._add_sequence(length, bytes(spins), timestamp)
+        cursor.close()
+        self.rebuild_statistics()
+        self.recent_history.invalidate()
+
+    # ===== games (colunas) =====
+    def _append_game(self, game_id: str, color: str, number: Optional[int], timestamp: int) -> bool:
+        if game_id in self._index:
+            return False
+        try:
+            code = encode_spin(color, number)
+        except ValueError:
+            return False
+        if self._timestamps and timestamp < self._timestamps[-1]:
+            self._sorted = False
+        self._index[game_id] = len(self._game_ids)
+        self._game_ids.append(game_id)
+        self._codes.append(code)
+        self._timestamps.append(timestamp)
+        self._stats['total_games'] += 1
+        return True
+
+    def _add_round(self, round_id: str, game_id: str, created_at: Optional[str]):
+        if round_id not in self._rounds:
+            self._rounds[round_id] = (game_id, created_at)
+            self._identified.add(game_id)
+
+    def _ensure_sorted(self):
+        """Reordena as colunas por timestamp após importações fora de ordem"""
+        if self._sorted:
+            return
+        order = sorted(range(len(self._timestamps)), key=self._timestamps.__getitem__)
+        self._game_ids = [self._game_ids[i] for i in order]
+        self._codes = bytearray(self._codes[i] for i in order)
+        self._timestamps = array('q', (self._timestamps[i] for i in order))
+        self._index = {game_id: i for i, game_id in enumerate(self._game_ids)}
+        self._sorted = True
+
+    def _game(self, i: int) -> Dict:
+        color, number = _DECODED[self._codes[i]]
+        return {'game_id': self._game_ids[i], 'color': color, 'number': number,
+                'timestamp': format_us(self._timestamps[i]), 'result': None}
+
+    def _load_recent_spins(self, limit: int) -> List[Spin]:
+        with self._lock:
+            self._ensure_sorted()
+            first = max(0, len(self._game_ids) - limit)
+            return [Spin(self._game_ids[i], *_DECODED[self._codes[i]], self._timestamps[i])
+                    for i in range(len(self._game_ids) - 1, first - 1, -1)]
+
+    def _query_recent_games(self, limit: int) -> List[Dict]:
+        with self._lock:
+            self._ensure_sorted()
+            first = max(0, len(self._game_ids) - limit)
+            return [self._game(i) for i in range(len(self._game_ids) - 1, first - 1, -1)]
+
+    def save_game(self, game_id: str, color: str, number: Optional[int] = None):
+        """Salva um jogo (upsert pela chave game_id)"""
+        with self._lock:
+            position = self._index.get(game_id)
+            if position is None:
+                self._append_game(game_id, color, number, now_us())
+            else:
+                try:
+                    self._codes[position] = encode_spin(color, number)
+                except ValueError:
+                    return
+        self.recent_history.invalidate()
+
+    def save_games_bulk(self, results: List[Dict]) -> List[Dict]:
+        """Mesma deduplicação de ``Database.save_games_bulk``
+
+        A cauda usada no alinhamento (fallback sem ``round_id``) é a dos
+        jogos mais recentes por timestamp.
+        """
+        window = [r for r in reversed(results or []) if r.get('color')]
+        if not window:
+            return []
+
+        with self._lock:
+            self._ensure_sorted()
+            if all(r.get('round_id') for r in window):
+                new_rounds = self._filter_identified(window)
+            else:
+                first = max(0, len(self._codes) - len(window))
+                tail = [_DECODED[code] for code in self._codes[first:]]
+                overlap = _find_overlap(tail, [(r.get('color'), r.get('number')) for r in window])
+                new_rounds = window[overlap:]
+            if not new_rounds:
+                return []
+
+            rows, round_rows, inserted = build_round_rows(new_rounds, now_us())
+            for row in rows:
+                self._append_game(*row)
+            for round_id, game_id, created_at in round_rows:
+                self._add_round(round_id, game_id, created_at)
+
+        self.recent_history.extend(Spin(*row) for row in rows)
+        return inserted
+
+    def _filter_identified(self, window: List[Dict]) -> List[Dict]:
+        candidates = [r for r in window if str(r['round_id']) not in self._rounds]
+        if not candidates:
+            return []
+
+        # Cauda de jogos sem identidade (ingeridos via DOM) mais recente
+        unidentified = []
+        for i in range(len(self._game_ids) - 1, max(-1, len(self._game_ids) - 1 - len(candidates)), -1):
+            if self._game_ids[i] in self._identified:
+                break
+            unidentified.append((self._game_ids[i], *_DECODED[self._codes[i]]))
+        unidentified.reverse()
+
+        overlap = _find_overlap([(c, n) for _, c, n in unidentified],
+                                [(r.get('color'), r.get('number')) for r in candidates])
+        offset = len(unidentified) - overlap
+        for i in range(overlap):
+            self._add_round(str(candidates[i]['round_id']), unidentified[offset + i][0],
+                            candidates[i].get('created_at'))
+        return candidates[overlap:]
+
+    def import_games(self, games: List[tuple], rounds: List[tuple] = ()) -> int:
+        """Insere jogos históricos em lote (game_id repetido é ignorado)"""
+        with self._lock:
+            inserted = sum(self._append_game(*game) for game in games)
+            for round_id, game_id, created_at in rounds:
+                self._add_round(round_id, game_id, created_at)
+        self.recent_history.invalidate()
+        return inserted
+
+    def get_games_between(self, start_us: int, end_us: int) -> List[Dict]:
+        """Jogos com ``start_us <= timestamp < end_us`` (microssegundos), em ordem cronológica"""
+        with self._lock:
+            self._ensure_sorted()
+            first = bisect_left(self._timestamps, start_us)
+            last = bisect_left(self._timestamps, end_us)
+            return [self._game(i) for i in range(first, last)]
+
+    def get_hourly_counts(self, start_us: Optional[int] = None,
+                          end_us: Optional[int] = None) -> Dict[int, int]:
+        """Jogos por hora (UTC) no intervalo: {início da hora em µs: quantidade}"""
+        with self._lock:
+            self._ensure_sorted()
+            first = bisect_left(self._timestamps, start_us) if start_us is not None else 0
+            last = bisect_left(self._timestamps, end_us) if end_us is not None else len(self._timestamps)
+            hours = Counter(timestamp // US_PER_HOUR for timestamp in self._timestamps[first:last])
+        return {hour * US_PER_HOUR: hours[hour] for hour in sorted(hours)}
+
+    def get_spin_codes(self, limit: Optional[int] = None) -> bytes:
+        """Giros codificados (1 byte cada), do mais antigo ao mais recente"""
+        with self._lock:
+            self._ensure_sorted()
+            if limit is None:
+                return bytes(self._codes)
+            return bytes(self._codes[max(0, len(self._codes) - limit):])
+
+    # ===== bets =====
+    def _append_bet(self, game_id, predicted_color, actual_color, bet_amount, confidence, result, timestamp):
+        self._bet_game_ids.append(game_id)
+        self._bet_predicted.append(predicted_color)
+        self._bet_actual.append(actual_color)
+        self._bet_results.append(result)
+        self._bet_amounts.append(bet_amount or 0.0)
+        self._bet_confidences.append(confidence if confidence is not None else float('nan'))
+        self._bet_timestamps.append(timestamp)
+        self._count_bet(result, bet_amount or 0.0, 1)
+
+    def _count_bet(self, result: Optional[str], amount: float, sign: int):
+        """Mesma regra dos triggers: vitória paga 2x (lucro +valor), demais -valor"""
+        stats = self._stats
+        stats['total_bets'] += sign
+        stats['wins'] += sign * (result == 'WIN')
+        stats['losses'] += sign * (result == 'LOSS')
+        stats['total_profit'] += sign * (amount if result == 'WIN' else -amount)
+        stats['win_rate'] = stats['wins'] * 100.0 / stats['total_bets'] if stats['total_bets'] > 0 else 0.0
+
+    def save_bet(self, game_id: str, predicted_color: str, bet_amount: float,
+                 confidence: float, actual_color: Optional[str] = None,
+                 result: Optional[str] = None):
+        """Salva uma aposta"""
+        with self._lock:
+            self._append_bet(game_id, predicted_color, actual_color, bet_amount, confidence,
+                             result, now_us())
+
+    def update_bet_result(self, game_id: str, actual_color: str, result: str):
+        """Atualiza o resultado das apostas do jogo"""
+        with self._lock:
+            for i, bet_game_id in enumerate(self._bet_game_ids):
+                if bet_game_id != game_id:
+                    continue
+                amount = self._bet_amounts[i]
+                self._count_bet(self._bet_results[i], amount, -1)
+                self._bet_actual[i] = actual_color
+                self._bet_results[i] = result
+                self._count_bet(result, amount, 1)
+
+    def get_statistics(self) -> Dict:
+        """Retorna as estatísticas gerais (mantidas a cada escrita)"""
+        with self._lock:
+            return dict(self._stats)
+
+    def rebuild_statistics(self):
+        """Recalcula os contadores do zero a partir das colunas"""
+        with self._lock:
+            self._stats = {'total_games': len(self._game_ids), 'total_bets': 0, 'wins': 0,
+                           'losses': 0, 'win_rate': 0.0, 'total_profit': 0.0}
+            for result, amount in zip(self._bet_results, self._bet_amounts):
+                self._count_bet(result, amount, 1)
+
+    # ===== patterns =====
+    def _upsert_pattern(self, signature: str, pattern_type: str, pattern_data: str, confidence: float,
+                        occurrences: int, wins: int, losses: int, timestamp: int):
+        entry = self._patterns.get(signature)
+        if entry is None:
+            entry = self._patterns[signature] = [pattern_type, pattern_data, confidence, 0, 0, 0,
+                                                 None, timestamp, timestamp]
+        entry[1] = pattern_data
+        entry[2] = confidence
+        entry[3] += occurrences
+        entry[4] += wins
+        entry[5] += losses
+        entry[6] = entry[4] / (entry[4] + entry[5]) if entry[4] + entry[5] > 0 else None
+        entry[7] = timestamp
+
+    def save_patterns(self, patterns: List[Dict], result: Optional[str] = None):
+        """Acumula os padrões de uma rodada (upsert pela assinatura canônica)"""
+        timestamp = now_us()
+        win = 1 if result == 'WIN' else 0
+        loss = 1 if result == 'LOSS' else 0
+        with self._lock:
+            for pattern in patterns or []:
+                pattern_type = pattern.get('type', 'unknown')
+                self._upsert_pattern(pattern_signature(pattern_type, pattern), pattern_type,
+                                     json.dumps(pattern), pattern.get('confidence', 0), 1, win, loss,
+                                     timestamp)
+
+    def save_pattern(self, pattern_type: str, pattern_data: Dict,
+                     success_rate: float, occurrences: int = 1):
+        """Mantido por compatibilidade: registra uma observação"""
+        with self._lock:
+            self._upsert_pattern(pattern_signature(pattern_type, pattern_data), pattern_type,
+                                 json.dumps(pattern_data), success_rate, occurrences, 0, 0, now_us())
+
+    def get_pattern_stats(self, signatures: List[str]) -> Dict[str, Dict]:
+        """Contadores acumulados por assinatura"""
+        with self._lock:
+            return {
+                signature: {'occurrences': entry[3], 'wins': entry[4], 'losses': entry[5],
+                            'success_rate': entry[6]}
+                for signature, entry in ((s, self._patterns.get(s)) for s in signatures or [])
+                if entry is not None
+            }
+
+    # ===== sequences =====
+    def _add_sequence(self, length: int, spins: bytes, timestamp: int):
+        key = (length, spins)
+        if key in self._sequence_keys:
+            return
+        self._sequence_keys.add(key)
+        self._sequences.append((length, spins, timestamp))
+
+    def save_sequence_blobs(self, sequence_length: int, blobs: List[bytes]):
+        """Grava várias sequências já codificadas (duplicadas são ignoradas)"""
+        timestamp = now_us()
+        with self._lock:
+            for blob in blobs:
+                self._add_sequence(sequence_length, bytes(blob), timestamp)
+
+    def _recent_sequences(self, length: Optional[int], limit: int) -> List[Tuple[int, bytes, int]]:
+        with self._lock:
+            found = []
+            for sequence in reversed(self._sequences):
+                if len(found) >= limit:
+                    break
+                if length is None or sequence[0] == length:
+                    found.append(sequence)
+            return found
+
+    def get_sequence_blobs(self, length: Optional[int] = None, limit: int = 500) -> List[bytes]:
+        """Sequências mais recentes como ``bytes`` codificados"""
+        return [spins for _, spins, _ in self._recent_sequences(length, limit)]
+
+    def get_sequences_by_length(self, length: int, limit: int = 100) -> List[Dict]:
+        """Retorna sequências de um tamanho específico"""
+        return [
+            {'sequence': decode_spins(spins), 'length': length, 'timestamp': format_us(timestamp)}
+            for length, spins, timestamp in self._recent_sequences(length, limit)
+        ]
+
+    def get_all_sequences(self, limit: int = 500) -> List[Dict]:
+        """Retorna todas as sequências coletadas"""
+        return [
+            {'sequence': decode_spins(spins), 'length': length, 'timestamp': format_us(timestamp)}
+            for length, spins, timestamp in self._recent_sequences(None, limit)
+        ]
+
+    def get_sequence_statistics(self) -> Dict:
+        """Retorna estatísticas sobre sequências coletadas"""
+        with self._lock:
+            by_length = Counter(length for length, _, _ in self._sequences)
+            return {'total_sequences': len(self._sequences),
+                    'by_length': {length: by_length[length] for length in sorted(by_length)}}
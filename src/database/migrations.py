@@ -0,0 +1,415 @@
+"""
+Migrações versionadas do esquema do banco de dados
+
+Cada migração é aplicada uma única vez, em ordem, dentro de uma transação,
+e registrada na tabela ``schema_version``. Para alterar o esquema, adicione
+uma nova função ao final de ``MIGRATIONS`` (nunca edite uma já publicada).
+"""
+import json
+import sqlite3
+from typing import Callable, List, Tuple
+
+from src.utils.patterns import pattern_signature
+from src.utils.roulette import encode_spin
+from src.utils.timestamps import timestamp_to_us
+
+
+# Instante atual em microssegundos desde a época (mesma escala de ``now_us``)
+_NOW_US_SQL = "(CAST(strftime('%s', 'now') AS INTEGER) * 1000000 + CAST(substr(strftime('%f', 'now'), 4) AS INTEGER) * 1000)"
+
+# Contribuição de uma aposta no lucro: -valor apostado (+2x o valor em vitória)
+_BET_PROFIT = "(CASE WHEN {row}.result = 'WIN' THEN 1 ELSE -1 END * IFNULL({row}.bet_amount, 0))"
+_REFRESH_WIN_RATE = f'''
+    UPDATE statistics SET
+        win_rate = CASE WHEN total_bets > 0 THEN wins * 100.0 / total_bets ELSE 0.0 END,
+        last_updated = {_NOW_US_SQL}
+    WHERE id = 1;
+'''
+
+STATISTICS_TRIGGERS = {
+    'trg_stats_games_insert': '''
+        CREATE TRIGGER trg_stats_games_insert AFTER INSERT ON games
+        BEGIN
+            UPDATE statistics SET total_games = total_games + 1 WHERE id = 1;
+        END
+    ''',
+    'trg_stats_games_delete': '''
+        CREATE TRIGGER trg_stats_games_delete AFTER DELETE ON games
+        BEGIN
+            UPDATE statistics SET total_games = total_games - 1 WHERE id = 1;
+        END
+    ''',
+    'trg_stats_bets_insert': f'''
+        CREATE TRIGGER trg_stats_bets_insert AFTER INSERT ON bets
+        BEGIN
+            UPDATE statistics SET
+                total_bets = total_bets + 1,
+                wins = wins + (NEW.result IS 'WIN'),
+                losses = losses + (NEW.result IS 'LOSS'),
+                total_profit = total_profit + {_BET_PROFIT.format(row='NEW')}
+            WHERE id = 1;
+            {_REFRESH_WIN_RATE}
+        END
+    ''',
+    'trg_stats_bets_update': f'''
+        CREATE TRIGGER trg_stats_bets_update AFTER UPDATE OF result, bet_amount ON bets
+        BEGIN
+            UPDATE statistics SET
+                wins = wins - (OLD.result IS 'WIN') + (NEW.result IS 'WIN'),
+                losses = losses - (OLD.result IS 'LOSS') + (NEW.result IS 'LOSS'),
+                total_profit = total_profit - {_BET_PROFIT.format(row='OLD')} + {_BET_PROFIT.format(row='NEW')}
+            WHERE id = 1;
+            {_REFRESH_WIN_RATE}
+        END
+    ''',
+    'trg_stats_bets_delete': f'''
+        CREATE TRIGGER trg_stats_bets_delete AFTER DELETE ON bets
+        BEGIN
+            UPDATE statistics SET
+                total_bets = total_bets - 1,
+                wins = wins - (OLD.result IS 'WIN'),
+                losses = losses - (OLD.result IS 'LOSS'),
+                total_profit = total_profit - {_BET_PROFIT.format(row='OLD')}
+            WHERE id = 1;
+            {_REFRESH_WIN_RATE}
+        END
+    ''',
+}
+
+# Recalcula a linha de estatísticas do zero (lucro: vitória paga 2x o valor apostado)
+REBUILD_STATISTICS_SQL = f'''
+    INSERT OR REPLACE INTO statistics
+        (id, total_games, total_bets, wins, losses, win_rate, total_profit, last_updated)
+    SELECT
+        1,
+        (SELECT COUNT(*) FROM games),
+        COUNT(*),
+        IFNULL(SUM(result = 'WIN'), 0),
+        IFNULL(SUM(result = 'LOSS'), 0),
+        CASE WHEN COUNT(*) > 0 THEN IFNULL(SUM(result = 'WIN'), 0) * 100.0 / COUNT(*) ELSE 0.0 END,
+        IFNULL(SUM(CASE WHEN result = 'WIN' THEN bet_amount * 2 ELSE 0 END), 0.0)
+            - IFNULL(SUM(bet_amount), 0.0),
+        {_NOW_US_SQL}
+    FROM bets
+'''
+
+# Índices das consultas quentes (ver scripts/benchmark_database.py)
+HOT_PATH_INDEXES = {
+    # get_recent_games: ORDER BY timestamp DESC LIMIT ? (cobre todas as colunas lidas)
+    'idx_games_timestamp': 'CREATE INDEX IF NOT EXISTS idx_games_timestamp ON games(timestamp, game_id, color, number, result)',
+    # update_bet_result: WHERE game_id = ?
+    'idx_bets_game_id': 'CREATE INDEX IF NOT EXISTS idx_bets_game_id ON bets(game_id)',
+    # Contagens/somas por resultado (WIN/LOSS) sem tocar a tabela
+    'idx_bets_result': 'CREATE INDEX IF NOT EXISTS idx_bets_result ON bets(result, bet_amount)',
+    # Histórico de apostas mais recentes (relatórios)
+    'idx_bets_timestamp': 'CREATE INDEX IF NOT EXISTS idx_bets_timestamp ON bets(timestamp)',
+}
+
+
+def _format_us_sql(column: str) -> str:
+    """Expressão SQL que formata microssegundos como ``format_us`` (hora local)"""
+    return (f"strftime('%Y-%m-%d %H:%M:%S', {column} / 1000000, 'unixepoch', 'localtime')"
+            f" || printf('.%06d', {column} % 1000000)")
+
+
+# Views de compatibilidade: mesmas colunas das tabelas, timestamps em texto
+# (para consultas manuais e ferramentas que esperam o formato antigo)
+COMPATIBILITY_VIEWS = {
+    'v_games': f'''
+        CREATE VIEW v_games AS
+        SELECT id, game_id, color, number, {_format_us_sql('timestamp')} AS timestamp,
+               result, timestamp AS timestamp_us
+        FROM games
+    ''',
+    'v_bets': f'''
+        CREATE VIEW v_bets AS
+        SELECT id, game_id, predicted_color, actual_color, bet_amount, confidence, result,
+               {_format_us_sql('timestamp')} AS timestamp, timestamp AS timestamp_us
+        FROM bets
+    ''',
+    'v_patterns': f'''
+        CREATE VIEW v_patterns AS
+        SELECT signature, pattern_type, pattern_data, confidence, occurrences, wins, losses,
+               success_rate, {_format_us_sql('last_seen')} AS last_seen,
+               {_format_us_sql('created_at')} AS created_at
+        FROM patterns
+    ''',
+}
+
+# (tabela, coluna) com timestamps gravados em microssegundos desde a migração 7
+_TIMESTAMP_COLUMNS = (
+    ('games', 'timestamp'),
+    ('bets', 'timestamp'),
+    ('patterns', 'last_seen'),
+    ('patterns', 'created_at'),
+    ('sequences', 'timestamp'),
+    ('statistics', 'last_updated'),
+)
+
+
+def _baseline_schema(cursor: sqlite3.Cursor):
+    """Tabelas originais (idempotente para bancos criados antes das migrações)"""
+    # Tabela de jogos
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS games (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_id TEXT UNIQUE,
+            color TEXT NOT NULL,
+            number INTEGER,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            result TEXT
+        )
+    ''')
+
+    # Tabela de apostas
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_id TEXT,
+            predicted_color TEXT NOT NULL,
+            actual_color TEXT,
+            bet_amount REAL,
+            confidence REAL,
+            result TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (game_id) REFERENCES games(game_id)
+        )
+    ''')
+
+    # Tabela de padrões identificados
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS patterns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pattern_type TEXT NOT NULL,
+            pattern_data TEXT,
+            success_rate REAL,
+            occurrences INTEGER DEFAULT 0,
+            last_seen DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Tabela de estatísticas
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS statistics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            total_games INTEGER DEFAULT 0,
+            total_bets INTEGER DEFAULT 0,
+            wins INTEGER DEFAULT 0,
+            losses INTEGER DEFAULT 0,
+            win_rate REAL DEFAULT 0.0,
+            total_profit REAL DEFAULT 0.0,
+            last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Tabela de sequências coletadas (amostragens)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sequences (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sequence_length INTEGER NOT NULL,
+            sequence_data TEXT NOT NULL,
+            sequence_colors TEXT NOT NULL,
+            sequence_numbers TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(sequence_length, sequence_data)
+        )
+    ''')
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sequence_length ON sequences(sequence_length)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sequence_timestamp ON sequences(timestamp)')
+
+
+def _rounds_table(cursor: sqlite3.Cursor):
+    """Identidade das rodadas na plataforma (id da API) -> jogo armazenado"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rounds (
+            round_id TEXT PRIMARY KEY,
+            game_id TEXT NOT NULL,
+            created_at TEXT
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_rounds_game_id ON rounds(game_id)')
+
+
+def _statistics_triggers(cursor: sqlite3.Cursor):
+    """Contadores incrementais de estatísticas (mesma transação da escrita)"""
+    for name, sql in STATISTICS_TRIGGERS.items():
+        cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(sql)
+    # Ponto de partida dos triggers: recalcula uma vez a partir das tabelas
+    cursor.execute(REBUILD_STATISTICS_SQL)
+    cursor.execute('DELETE FROM statistics WHERE id <> 1')
+
+
+def _hot_path_indexes(cursor: sqlite3.Cursor):
+    """Índices cobrindo as consultas executadas a cada iteração do bot"""
+    for sql in HOT_PATH_INDEXES.values():
+        cursor.execute(sql)
+    cursor.execute('ANALYZE')
+
+
+def _compact_sequences(cursor: sqlite3.Cursor):
+    """Sequências como BLOB (1 byte por giro) no lugar de três colunas de texto"""
+    cursor.execute('''
+        CREATE TABLE sequences_compact (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sequence_length INTEGER NOT NULL,
+            spins BLOB NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(sequence_length, spins)
+        )
+    ''')
+
+    # Converte as amostras existentes ("red,black,..." + "3,9,...")
+    rows = cursor.execute('''
+        SELECT id, sequence_length, sequence_colors, sequence_numbers, timestamp
+        FROM sequences
+        ORDER BY id
+    ''').fetchall()
+    converted = []
+    for row_id, length, colors_str, numbers_str, timestamp in rows:
+        colors = colors_str.split(',') if colors_str else []
+        numbers = numbers_str.split(',') if numbers_str else []
+        try:
+            blob = bytes(
+                encode_spin(color, int(numbers[i]) if i < len(numbers) and numbers[i].isdigit() else None)
+                for i, color in enumerate(colors)
+            )
+        except ValueError:
+            continue  # amostra corrompida: descartada
+        converted.append((row_id, length, blob, timestamp))
+    cursor.executemany('''
+        INSERT OR IGNORE INTO sequences_compact (id, sequence_length, spins, timestamp)
+        VALUES (?, ?, ?, ?)
+    ''', converted)
+
+    cursor.execute('DROP TABLE sequences')
+    cursor.execute('ALTER TABLE sequences_compact RENAME TO sequences')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sequence_length ON sequences(sequence_length)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sequence_timestamp ON sequences(timestamp)')
+
+
+def _pattern_counters(cursor: sqlite3.Cursor):
+    """Uma linha por padrão (assinatura canônica) com contadores acumulados"""
+    cursor.execute('''
+        CREATE TABLE patterns_aggregated (
+            signature TEXT PRIMARY KEY,
+            pattern_type TEXT NOT NULL,
+            pattern_data TEXT,
+            confidence REAL,
+            occurrences INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            losses INTEGER NOT NULL DEFAULT 0,
+            success_rate REAL,
+            last_seen DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    ''')
+
+    # Agrega as linhas antigas (uma por observação; success_rate guardava a confiança)
+    rows = cursor.execute('''
+        SELECT pattern_type, pattern_data, success_rate, occurrences, last_seen, created_at
+        FROM patterns
+        ORDER BY id
+    ''').fetchall()
+    aggregated = {}
+    for pattern_type, pattern_json, confidence, occurrences, last_seen, created_at in rows:
+        try:
+            pattern_data = json.loads(pattern_json) if pattern_json else {}
+        except ValueError:
+            pattern_data = {}
+        if not isinstance(pattern_data, dict):
+            pattern_data = {}
+        signature = pattern_signature(pattern_type, pattern_data)
+        entry = aggregated.setdefault(signature, [signature, pattern_type, pattern_json, confidence, 0, last_seen, created_at])
+        entry[2], entry[3], entry[5] = pattern_json, confidence, last_seen
+        entry[4] += occurrences or 1
+    cursor.executemany('''
+        INSERT INTO patterns_aggregated
+            (signature, pattern_type, pattern_data, confidence, occurrences, last_seen, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', list(aggregated.values()))
+
+    cursor.execute('DROP TABLE patterns')
+    cursor.execute('ALTER TABLE patterns_aggregated RENAME TO patterns')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_patterns_type ON patterns(pattern_type)')
+
+
+def _stored_timestamp_to_us(value):
+    """Texto legado -> microssegundos.
+
+    O app gravava hora local com fração (``get_timestamp``); valores sem
+    fração vêm do ``DEFAULT CURRENT_TIMESTAMP`` do SQLite, que é UTC.
+    """
+    if isinstance(value, str) and len(value) == 19:
+        return timestamp_to_us(value + '+00:00')
+    return timestamp_to_us(value)
+
+
+def _integer_timestamps(cursor: sqlite3.Cursor):
+    """Timestamps como INTEGER (microssegundos, UTC) + views com o formato texto"""
+    cursor.connection.create_function('ts_to_us', 1, _stored_timestamp_to_us, deterministic=True)
+    for table, column in _TIMESTAMP_COLUMNS:
+        cursor.execute(f"UPDATE {table} SET {column} = ts_to_us({column}) WHERE typeof({column}) = 'text'")
+
+    # Triggers e rebuild passam a gravar last_updated em microssegundos
+    for name, sql in STATISTICS_TRIGGERS.items():
+        cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(sql)
+
+    for name, sql in COMPATIBILITY_VIEWS.items():
+        cursor.execute(f'DROP VIEW IF EXISTS {name}')
+        cursor.execute(sql)
+    cursor.execute('ANALYZE')
+
+
+def _archive_partitions(cursor: sqlite3.Cursor):
+    """Registro das partições movidas para arquivos (ver src/database/archive.py)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archive_partitions (
+            partition_key TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            start_us INTEGER NOT NULL,
+            end_us INTEGER NOT NULL,
+            games INTEGER NOT NULL DEFAULT 0,
+            bets INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            losses INTEGER NOT NULL DEFAULT 0,
+            profit REAL NOT NULL DEFAULT 0.0,
+            archived_at INTEGER
+        ) WITHOUT ROWID
+    ''')
+
+
+# (versão, descrição, função) - sempre em ordem crescente de versão
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, 'Esquema base (games, bets, patterns, statistics, sequences)', _baseline_schema),
+    (2, 'Tabela rounds (id da rodada na plataforma)', _rounds_table),
+    (3, 'Triggers de estatísticas incrementais', _statistics_triggers),
+    (4, 'Índices cobrindo consultas quentes', _hot_path_indexes),
+    (5, 'Sequências codificadas em BLOB (1 byte por giro)', _compact_sequences),
+    (6, 'Padrões agregados por assinatura (ocorrências, vitórias, derrotas)', _pattern_counters),
+    (7, 'Timestamps inteiros (microssegundos) e views de compatibilidade', _integer_timestamps),
+    (8, 'Registro de partições arquivadas (archive_partitions)', _archive_partitions),
+]
+
+
+def current_version(cursor: sqlite3.Cursor) -> int:
+    """Versão atual do esquema (0 = banco sem controle de versão)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT
+        )
+    ''')
+    cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+    return cursor.fetchone()[0]
+
+
+def record_version(cursor: sqlite3.Cursor, version: int, description: str):
+    cursor.execute('''
+        INSERT INTO schema_version (version, description, applied_at)
+        VALUES (?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+    ''', (version, description))
@@ -0,0 +1,190 @@
+"""
+Pool de conexões SQLite (um escritor, N leitores) com modo WAL
+"""
+import sqlite3
+import threading
+from contextlib import contextmanager
+from queue import LifoQueue, Empty
+from typing import Iterator
+
+
+class ConnectionPool:
+    """Mantém conexões SQLite abertas durante toda a vida do processo.
+
+    - Uma única conexão de escrita, protegida por um RLock. Escritas aninhadas
+      na mesma thread viram SAVEPOINTs dentro da transação externa.
+    - Até ``readers`` conexões somente leitura, emprestadas por thread. Em modo
+      WAL os leitores nunca bloqueiam o escritor (e vice-versa).
+    """
+
+    def __init__(self, db_path: str, readers: int = 4, busy_timeout_ms: int = 5000,
+                 cache_size_kb: int = 16384, mmap_size: int = 256 * 1024 * 1024):
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        # Banco em memória não é compartilhado entre conexões: leitores usam o escritor
+        self.in_memory = db_path == ':memory:' or db_path.startswith('file::memory:')
+
+        self._writer_lock = threading.RLock()
+        self._write_depth = 0
+        self._writer = self._open(readonly=False)
+
+        self._max_readers = max(0, readers) if not self.in_memory else 0
+        self._readers = LifoQueue()
+        self._readers_created = 0
+        self._readers_lock = threading.Lock()
+        self._closed = False
+
+    def _open(self, readonly: bool) -> sqlite3.Connection:
+        """Abre uma conexão já configurada com os PRAGMAs de desempenho"""
+        # isolation_level=None: transações controladas explicitamente (BEGIN/COMMIT)
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000.0,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        cursor = conn.cursor()
+        cursor.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        if not readonly and not self.in_memory:
+            # Só tem efeito em banco novo (antes da primeira tabela): permite o
+            # vacuum incremental sem parar o bot (ver maintenance.py)
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            cursor.execute('PRAGMA journal_mode = WAL')
+        # NORMAL é seguro em WAL (só perde a última transação em queda de energia)
+        cursor.execute('PRAGMA synchronous = NORMAL')
+        cursor.execute(f'PRAGMA cache_size = {-int(self.cache_size_kb)}')
+        cursor.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        cursor.execute('PRAGMA temp_store = MEMORY')
+        cursor.execute('PRAGMA foreign_keys = OFF')
+        if readonly:
+            cursor.execute('PRAGMA query_only = 1')
+        cursor.close()
+        return conn
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """Empresta a conexão de escrita dentro de uma transação.
+
+        Confirma ao sair do bloco mais externo; em caso de exceção desfaz
+        apenas o nível atual (SAVEPOINT) e propaga o erro.
+        """
+        with self._writer_lock:
+            conn = self._writer
+            depth = self._write_depth
+            savepoint = f'sp_{depth}'
+            if depth == 0:
+                conn.execute('BEGIN IMMEDIATE')
+            else:
+                conn.execute(f'SAVEPOINT {savepoint}')
+            self._write_depth += 1
+            try:
+                yield conn
+            except BaseException:
+                self._write_depth -= 1
+                if depth == 0:
+                    conn.execute('ROLLBACK')
+                else:
+                    conn.execute(f'ROLLBACK TO {savepoint}')
+                    conn.execute(f'RELEASE {savepoint}')
+                raise
+            else:
+                self._write_depth -= 1
+                if depth == 0:
+                    conn.execute('COMMIT')
+                else:
+                    conn.execute(f'RELEASE {savepoint}')
+
+    @contextmanager
+    def attached(self, path: str, alias: str) -> Iterator[sqlite3.Connection]:
+        """Anexa outro arquivo à conexão de escrita enquanto o bloco durar.
+
+        ATTACH não é permitido dentro de transação: deve ser chamado fora de
+        ``write()``; escritas dentro do bloco enxergam ``<alias>.<tabela>``.
+        """
+        with self._writer_lock:
+            if self._write_depth:
+                raise RuntimeError("ATTACH não é permitido dentro de uma transação de escrita")
+            conn = self._writer
+            conn.execute(f'ATTACH DATABASE ? AS {alias}', (path,))
+            try:
+                yield conn
+            finally:
+                conn.execute(f'DETACH DATABASE {alias}')
+
+    @contextmanager
+    def outside_transaction(self) -> Iterator[sqlite3.Connection]:
+        """Empresta a conexão de escrita sem abrir transação (ex.: VACUUM).
+
+        Como ``attached``, não pode ser chamado dentro de ``write()``.
+        """
+        with self._writer_lock:
+            if self._write_depth:
+                raise RuntimeError("Operação não permitida dentro de uma transação de escrita")
+            yield self._writer
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Empresta uma conexão de leitura (ou o escritor, se for a mesma thread em transação)"""
+        # Dentro de uma escrita na mesma thread, lê pela própria conexão para
+        # enxergar os dados ainda não confirmados
+        if self._max_readers == 0 or self._writer_owned_by_current_thread():
+            with self._writer_lock:
+                yield self._writer
+            return
+
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            # Garante que nenhuma transação de leitura fique aberta segurando o snapshot
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    def _writer_owned_by_current_thread(self) -> bool:
+        # RLock._is_owned é interno; usa acquire não bloqueante para descobrir o dono
+        if self._write_depth == 0:
+            return False
+        if self._writer_lock.acquire(blocking=False):
+            owned = self._write_depth > 0
+            self._writer_lock.release()
+            return owned
+        return False
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except Empty:
+            pass
+        with self._readers_lock:
+            if self._readers_created < self._max_readers:
+                self._readers_created += 1
+                return self._open(readonly=True)
+        # Pool esgotado: aguarda uma conexão ser devolvida
+        return self._readers.get()
+
+    def checkpoint(self, mode: str = 'PASSIVE'):
+        """Executa um checkpoint do WAL (PASSIVE não bloqueia leitores)"""
+        if self.in_memory:
+            return None
+        with self._writer_lock:
+            return self._writer.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+
+    def close(self):
+        """Fecha todas as conexões do pool"""
+        if self._closed:
+            return
+        self._closed = True
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except Empty:
+                break
+        with self._writer_lock:
+            try:
+                self._writer.execute('PRAGMA optimize')
+            except sqlite3.Error:
+                pass
+            self._writer.close()
@@ -0,0 +1,97 @@
+"""
+Cache em memória do histórico recente de giros
+"""
+import threading
+from collections import deque
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from src.utils.timestamps import format_us
+
+
+class Spin(NamedTuple):
+    """Registro compacto de um giro (tupla imutável, sem dict por item)"""
+    game_id: str
+    color: str
+    number: Optional[int]
+    timestamp: int  # microssegundos desde a época
+
+
+class RecentHistory:
+    """Buffer circular com os últimos ``maxlen`` giros, na ordem de inserção.
+
+    O caminho de ingestão chama ``extend`` após gravar; leitores usam
+    ``recent``/``colors``/``numbers`` sem tocar o SQLite. ``version`` é
+    incrementado a cada mudança, permitindo que consumidores pulem o
+    processamento quando nada mudou.
+    """
+
+    def __init__(self, maxlen: int = 500):
+        self.maxlen = maxlen
+        self._spins = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.version = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, loader: Callable[[int], Iterable[Spin]]):
+        """Carga fria: ``loader(maxlen)`` retorna giros do mais recente ao mais antigo"""
+        spins = list(loader(self.maxlen))
+        with self._lock:
+            self._spins.clear()
+            self._spins.extend(reversed(spins))
+            self._loaded = True
+            self.version += 1
+
+    def ensure_loaded(self, loader: Callable[[int], Iterable[Spin]]):
+        if not self._loaded:
+            self.load(loader)
+
+    def extend(self, spins: Iterable[Spin]):
+        """Acrescenta giros novos (do mais antigo ao mais recente)"""
+        spins = list(spins)
+        if not spins:
+            return
+        with self._lock:
+            # Antes da carga fria não há base para acrescentar: a carga trará os dados
+            if not self._loaded:
+                return
+            self._spins.extend(spins)
+            self.version += 1
+
+    def invalidate(self):
+        """Descarta o conteúdo; a próxima leitura recarrega do banco"""
+        with self._lock:
+            self._spins.clear()
+            self._loaded = False
+            self.version += 1
+
+    def snapshot(self, limit: Optional[int] = None) -> List[Spin]:
+        """Giros do mais recente ao mais antigo"""
+        with self._lock:
+            return list(islice(reversed(self._spins), limit))
+
+    def recent(self, limit: int = 50) -> List[Dict]:
+        """Mesmo formato de ``Database.get_recent_games``"""
+        return [
+            {
+                'game_id': spin.game_id,
+                'color': spin.color,
+                'number': spin.number,
+                'timestamp': format_us(spin.timestamp),
+                'result': None
+            }
+            for spin in self.snapshot(limit)
+        ]
+
+    def colors(self, limit: int = 50) -> List[str]:
+        return [spin.color for spin in self.snapshot(limit)]
+
+    def numbers(self, limit: int = 50) -> List[Optional[int]]:
+        return [spin.number for spin in self.snapshot(limit)]
+
+    def __len__(self) -> int:
+        return len(self._spins)
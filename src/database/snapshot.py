@@ -0,0 +1,111 @@
+"""
+Visão somente leitura e consistente do banco para relatórios
+"""
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+from .archive import attach_archives
+from .database import read_spin_codes
+
+
+class DatabaseSnapshot:
+    """Abre o banco em um ponto no tempo, sem disputar locks com o bot.
+
+    Modos:
+        - ``readonly``: conexão ``mode=ro`` com uma transação de leitura
+          aberta durante todo o relatório. Em WAL o leitor enxerga sempre o
+          mesmo snapshot e nunca bloqueia o escritor.
+        - ``backup``: copia o banco para a memória com ``sqlite3.backup`` e
+          solta o arquivo; as consultas do relatório rodam sobre a cópia.
+        - ``auto``: ``readonly`` se o banco estiver em WAL, senão ``backup``
+          (no modo rollback um leitor longo impediria o commit do bot).
+
+    Com ``archives=True`` as partições arquivadas são anexadas e as views
+    temporárias ``all_games``/``all_bets`` cobrem o histórico completo.
+
+    Não aplica migrações: o esquema é o que o bot deixou no arquivo.
+    """
+
+    MODES = ('auto', 'readonly', 'backup')
+
+    def __init__(self, db_path: str, mode: str = 'auto', busy_timeout_ms: int = 5000,
+                 backup_pages: int = -1, archives: bool = False):
+        if mode not in self.MODES:
+            raise ValueError(f"Modo de snapshot inválido: {mode!r} (use {', '.join(self.MODES)})")
+        self.db_path = db_path
+        self.mode = mode
+        self.busy_timeout_ms = busy_timeout_ms
+        self.backup_pages = backup_pages
+        self.archives = archives
+        self.partitions = []
+        self.conn: Optional[sqlite3.Connection] = None
+        self.taken_at: Optional[float] = None
+
+    def __enter__(self) -> 'DatabaseSnapshot':
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self) -> 'DatabaseSnapshot':
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"Banco de dados não encontrado: {self.db_path}")
+
+        source = self._connect_readonly()
+        mode = self.mode
+        if mode == 'auto':
+            journal = source.execute('PRAGMA journal_mode').fetchone()[0]
+            mode = 'readonly' if str(journal).lower() == 'wal' else 'backup'
+
+        if mode == 'readonly':
+            self._attach_archives(source)
+            # A primeira leitura dentro do BEGIN fixa o snapshot até o fim do relatório
+            source.execute('BEGIN')
+            source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            self.conn = source
+        else:
+            memory = sqlite3.connect(':memory:', isolation_level=None, check_same_thread=False)
+            try:
+                source.backup(memory, pages=self.backup_pages)
+            finally:
+                source.close()
+            self._attach_archives(memory)
+            self.conn = memory
+
+        self.mode = mode
+        self.taken_at = time.time()
+        return self
+
+    def close(self):
+        if self.conn is None:
+            return
+        if self.conn.in_transaction:
+            self.conn.rollback()
+        self.conn.close()
+        self.conn = None
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Conexão do snapshot (compartilhada: não deve ser fechada pelo chamador)"""
+        if self.conn is None:
+            raise RuntimeError("Snapshot não está aberto")
+        return self.conn
+
+    def _attach_archives(self, conn: sqlite3.Connection):
+        # Views temporárias precisam ser criadas antes de query_only
+        if self.archives:
+            self.partitions = attach_archives(conn)
+        conn.execute('PRAGMA query_only = 1')
+
+    def get_spin_codes(self, limit: Optional[int] = None) -> bytes:
+        """Mesmo contrato de ``Database.get_spin_codes``"""
+        return read_spin_codes(self.get_connection(), limit, 'all_games' if self.archives else 'games')
+
+    def _connect_readonly(self) -> sqlite3.Connection:
+        uri = Path(os.path.abspath(self.db_path)).as_uri() + '?mode=ro'
+        conn = sqlite3.connect(uri, uri=True, timeout=self.busy_timeout_ms / 1000.0,
+                               isolation_level=None, check_same_thread=False)
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        return conn
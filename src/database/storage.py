@@ -0,0 +1,198 @@
+"""
+Interface de armazenamento compartilhada pelos motores do banco
+
+``StorageBackend`` reúne os métodos públicos usados por ``BlazeBot``,
+``PatternAnalyzer``, ``SequenceWindows`` e ``WriteBehindWorker``.
+Implementações:
+
+    - ``Database`` (``'sqlite'``): arquivo SQLite em WAL, o padrão
+    - ``MemoryDatabase`` (``'memory'``): colunas em arrays na memória, para
+      simulações e backtests sem custo de disco
+    - ``AnalyticalDatabase`` (``'duckdb'``): cópia somente leitura em DuckDB
+      para relatórios (dependência opcional)
+
+Funcionalidades específicas do arquivo SQLite (``pool``, arquivamento,
+exportação, backfill, snapshots) continuam exigindo ``Database``.
+"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from src.utils.roulette import encode_spins
+
+from .recent_history import RecentHistory, Spin
+
+
+BACKENDS = ('sqlite', 'memory', 'duckdb')
+
+
+class StorageBackend(ABC):
+    """Operações de leitura e escrita do histórico, apostas, padrões e sequências.
+
+    O histórico recente fica em ``self.recent_history`` (ver ``RecentHistory``);
+    as subclasses só precisam informar como carregá-lo.
+    """
+
+    recent_history: RecentHistory
+
+    # ===== Histórico recente (comum a todos os motores) =====
+    @abstractmethod
+    def _load_recent_spins(self, limit: int) -> List[Spin]:
+        """Giros do mais recente ao mais antigo (carga fria do ``RecentHistory``)"""
+
+    @abstractmethod
+    def _query_recent_games(self, limit: int) -> List[Dict]:
+        """``get_recent_games`` além da capacidade do cache em memória"""
+
+    def get_recent_games(self, limit: int = 50) -> List[Dict]:
+        """Retorna os jogos mais recentes (do cache em memória quando possível)"""
+        if limit <= self.recent_history.maxlen:
+            self.recent_history.ensure_loaded(self._load_recent_spins)
+            return self.recent_history.recent(limit)
+        return self._query_recent_games(limit)
+
+    def get_history_version(self) -> int:
+        """Versão do histórico recente (muda a cada giro ingerido)"""
+        self.recent_history.ensure_loaded(self._load_recent_spins)
+        return self.recent_history.version
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Agrupa várias escritas (commit em grupo do ``WriteBehindWorker``)
+
+        Padrão dos motores em memória: segura o ``_lock`` do motor enquanto o
+        grupo executa (sem rollback: cada método já é atômico). ``Database``
+        usa uma transação do SQLite.
+        """
+        with self._lock:
+            yield
+
+    def invalidate_caches(self):
+        """Descarta caches em memória (ex.: após falha no commit de um lote)"""
+        self.recent_history.invalidate()
+
+    def get_game_history_colors(self, limit: int = 50) -> List[str]:
+        """Retorna apenas as cores dos jogos mais recentes"""
+        if limit <= self.recent_history.maxlen:
+            self.recent_history.ensure_loaded(self._load_recent_spins)
+            return self.recent_history.colors(limit)
+        games = self.get_recent_games(limit)
+        return [game['color'] for game in games]
+
+    # ===== Jogos =====
+    @abstractmethod
+    def save_game(self, game_id: str, color: str, number: Optional[int] = None):
+        """Salva um jogo (upsert pela chave game_id)"""
+
+    @abstractmethod
+    def save_games_bulk(self, results: List[Dict]) -> List[Dict]:
+        """Salva apenas as rodadas novas de uma janela (mais recente no índice 0)"""
+
+    @abstractmethod
+    def import_games(self, games: List[tuple], rounds: List[tuple] = ()) -> int:
+        """Insere jogos históricos ``(game_id, color, number, timestamp_us)`` em lote"""
+
+    @abstractmethod
+    def get_games_between(self, start_us: int, end_us: int) -> List[Dict]:
+        """Jogos com ``start_us <= timestamp < end_us``, em ordem cronológica"""
+
+    @abstractmethod
+    def get_hourly_counts(self, start_us: Optional[int] = None,
+                          end_us: Optional[int] = None) -> Dict[int, int]:
+        """Jogos por hora (UTC): {início da hora em µs: quantidade}"""
+
+    @abstractmethod
+    def get_spin_codes(self, limit: Optional[int] = None) -> bytes:
+        """Giros codificados (1 byte cada), do mais antigo ao mais recente"""
+
+    # ===== Apostas e estatísticas =====
+    @abstractmethod
+    def save_bet(self, game_id: str, predicted_color: str, bet_amount: float,
+                 confidence: float, actual_color: Optional[str] = None,
+                 result: Optional[str] = None):
+        """Salva uma aposta"""
+
+    @abstractmethod
+    def update_bet_result(self, game_id: str, actual_color: str, result: str):
+        """Atualiza o resultado de uma aposta"""
+
+    @abstractmethod
+    def get_statistics(self) -> Dict:
+        """total_games, total_bets, wins, losses, win_rate, total_profit"""
+
+    @abstractmethod
+    def rebuild_statistics(self):
+        """Recalcula os contadores do zero"""
+
+    def update_statistics(self):
+        """Mantido por compatibilidade: equivale a ``rebuild_statistics()``"""
+        self.rebuild_statistics()
+
+    # ===== Padrões =====
+    @abstractmethod
+    def save_patterns(self, patterns: List[Dict], result: Optional[str] = None):
+        """Acumula os padrões de uma rodada (upsert pela assinatura canônica)"""
+
+    @abstractmethod
+    def save_pattern(self, pattern_type: str, pattern_data: Dict,
+                     success_rate: float, occurrences: int = 1):
+        """Mantido por compatibilidade: registra uma observação"""
+
+    @abstractmethod
+    def get_pattern_stats(self, signatures: List[str]) -> Dict[str, Dict]:
+        """Contadores acumulados por assinatura"""
+
+    # ===== Sequências =====
+    def save_sequence(self, sequence_length: int, sequence_data: List[Dict]):
+        """Salva uma sequência de jogos para análise (1 byte por giro, mesma ordem)"""
+        try:
+            self.save_sequence_blobs(sequence_length, [encode_spins(sequence_data)])
+        except Exception:
+            # Em caso de erro, apenas ignora para não bloquear
+            pass
+
+    @abstractmethod
+    def save_sequence_blobs(self, sequence_length: int, blobs: List[bytes]):
+        """Grava várias sequências já codificadas (duplicadas são ignoradas)"""
+
+    @abstractmethod
+    def get_sequence_blobs(self, length: Optional[int] = None, limit: int = 500) -> List[bytes]:
+        """Sequências mais recentes como ``bytes`` codificados"""
+
+    @abstractmethod
+    def get_sequences_by_length(self, length: int, limit: int = 100) -> List[Dict]:
+        """Sequências de um tamanho específico (decodificadas)"""
+
+    @abstractmethod
+    def get_all_sequences(self, limit: int = 500) -> List[Dict]:
+        """Sequências de todos os tamanhos (decodificadas)"""
+
+    @abstractmethod
+    def get_sequence_statistics(self) -> Dict:
+        """{'total_sequences': int, 'by_length': {tamanho: quantidade}}"""
+
+    def close(self):
+        """Libera os recursos do motor"""
+
+
+def open_storage(backend: str = 'sqlite', db_path: str = 'blaze_data.db', **options) -> StorageBackend:
+    """Abre o motor de armazenamento pelo nome (ver ``BACKENDS``)
+
+    Args:
+        backend: 'sqlite', 'memory' ou 'duckdb'
+        db_path: Arquivo SQLite; para 'memory' e 'duckdb' é a origem dos
+            dados carregados (ignorado pelo 'memory' se não existir)
+        options: Repassadas ao construtor (ex.: ``recent_cache_size``)
+    """
+    if backend == 'sqlite':
+        from .database import Database
+        return Database(db_path, **options)
+    # Opções do pool de conexões só se aplicam ao arquivo SQLite
+    options.pop('reader_pool_size', None)
+    if backend == 'memory':
+        from .memory import MemoryDatabase
+        return MemoryDatabase.from_sqlite(db_path, **options)
+    if backend == 'duckdb':
+        from .analytical import AnalyticalDatabase
+        return AnalyticalDatabase.from_sqlite(db_path, **options)
+    raise ValueError(f"Motor de armazenamento inválido: {backend!r} (use {', '.join(BACKENDS)})")
@@ -0,0 +1,128 @@
+"""
+Persistência assíncrona (write-behind) para o banco de dados
+"""
+import threading
+from concurrent.futures import Future
+from queue import Queue, Empty
+from typing import Optional
+
+
+class _Barrier:
+    """Marcador na fila: sinaliza quando tudo que veio antes foi confirmado"""
+    __slots__ = ('event',)
+
+    def __init__(self):
+        self.event = threading.Event()
+
+
+class WriteBehindWorker:
+    """Thread dedicada que consome comandos de escrita e os confirma em grupo.
+
+    Cada comando é o nome de um método público do motor de armazenamento
+    (qualquer ``StorageBackend``) com seus argumentos (``save_games_bulk``,
+    ``save_bet``, ``save_pattern``, ...). Os comandos disponíveis na fila são
+    executados na mesma transação (``db.transaction()``: commit em grupo no
+    SQLite); um comando que falhar é desfeito sozinho (SAVEPOINT) sem afetar
+    os demais.
+
+    ``submit`` retorna um ``Future`` resolvido após o commit, e ``flush``
+    funciona como barreira para leituras que precisam ver as escritas
+    anteriores (ex.: estatísticas enviadas ao Telegram após o resultado).
+    """
+
+    def __init__(self, db, max_queue: int = 1000, batch_size: int = 64):
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self._queue = Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self):
+        """Inicia a thread de escrita (idempotente)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Confirma o que estiver pendente e encerra a thread"""
+        if not self._thread:
+            return
+        self.flush(timeout=timeout)
+        self._running = False
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def submit(self, method: str, *args, **kwargs) -> Future:
+        """Enfileira uma escrita; bloqueia apenas se a fila estiver cheia"""
+        future = Future()
+        if not self._thread:
+            # Sem thread ativa (ex.: scripts): executa de forma síncrona
+            try:
+                future.set_result(getattr(self.db, method)(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self._queue.put((method, args, kwargs, future))
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda a confirmação de todas as escritas enfileiradas até agora"""
+        if not self._thread:
+            return True
+        barrier = _Barrier()
+        self._queue.put(barrier)
+        return barrier.event.wait(timeout)
+
+    def pending(self) -> int:
+        """Quantidade aproximada de comandos aguardando na fila"""
+        return self._queue.qsize()
+
+    def _next_batch(self) -> list:
+        try:
+            first = self._queue.get(timeout=0.5)
+        except Empty:
+            return []
+        batch = [first]
+        # Uma barreira encerra o lote: o que vem depois aguarda o próximo commit
+        while not isinstance(batch[-1], _Barrier) and len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except Empty:
+                break
+        return batch
+
+    def _run(self):
+        while self._running or not self._queue.empty():
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            commands = [item for item in batch if not isinstance(item, _Barrier)]
+            done = []
+            try:
+                if commands:
+                    with self.db.transaction():
+                        for method, args, kwargs, future in commands:
+                            try:
+                                done.append((future, getattr(self.db, method)(*args, **kwargs)))
+                            except Exception as e:
+                                future.set_exception(e)
+            except Exception as e:
+                # Falha no commit do grupo: nada foi persistido (caches podem estar à frente)
+                if hasattr(self.db, 'invalidate_caches'):
+                    self.db.invalidate_caches()
+                # Inclui os comandos que nem chegaram a executar (ex.: BEGIN com SQLITE_BUSY)
+                for _, _, _, future in commands:
+                    if not future.done():
+                        future.set_exception(e)
+                done = []
+                print(f"[AVISO] Falha ao gravar lote no banco: {e}")
+
+            # Resultados só são publicados depois do commit (leitores já enxergam os dados)
+            for future, result in done:
+                future.set_result(result)
+            for item in batch:
+                if isinstance(item, _Barrier):
+                    item.event.set()
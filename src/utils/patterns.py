@@ -0,0 +1,15 @@
+"""
+Identidade canônica dos padrões detectados pelo analisador
+
+O mesmo padrão (tipo + descrição + cor prevista) sempre gera a mesma
+assinatura, usada como chave da tabela ``patterns``.
+"""
+
+from typing import Dict
+
+
+def pattern_signature(pattern_type: str, pattern_data: Dict) -> str:
+    """Assinatura canônica: ``tipo|descrição normalizada|previsão``"""
+    description = ' '.join(str(pattern_data.get('pattern', '')).lower().split())
+    prediction = (pattern_data.get('prediction') or '').lower()
+    return f"{pattern_type or 'unknown'}|{description}|{prediction}"
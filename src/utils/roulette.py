@@ -38,6 +38,8 @@ def normalize_result(result: Dict) -> Dict:
     - Se cor = white e número vazio, define número=0
     - Se número está presente e cor vazia, infere cor pelo número
     - Mantém chaves 'color' e 'number'
+    - Preserva a identidade da rodada na plataforma ('round_id', 'created_at')
+      quando disponível (resultados vindos da API)
     """
     color = (result.get('color') or '').lower() if isinstance(result, dict) else ''
     number = result.get('number') if isinstance(result, dict) else None
@@ -54,6 +56,69 @@ def normalize_result(result: Dict) -> Dict:
         if inferred and inferred != color:
             color = inferred
 
-    return {'color': color if color else None, 'number': number}
+    normalized = {'color': color if color else None, 'number': number}
 
+    if isinstance(result, dict):
+        if result.get('round_id') is not None and result.get('round_id') != '':
+            normalized['round_id'] = str(result['round_id'])
+        if result.get('created_at'):
+            normalized['created_at'] = result['created_at']
 
+    return normalized
+
+
+
+
+# ===== Codificação compacta de giros (1 byte por giro) =====
+# 0..14 => número conhecido (a cor deriva de number_to_color)
+# 15/16 => vermelho/preto sem número (resultado lido apenas pela cor, ex.: DOM)
+SPIN_RED_UNKNOWN = 15
+SPIN_BLACK_UNKNOWN = 16
+
+# Códigos de cor no mesmo padrão da API da Blaze: 0=white, 1=red, 2=black
+COLOR_NAMES = ('white', 'red', 'black')
+COLOR_CODES = {name: code for code, name in enumerate(COLOR_NAMES)}
+
+# Tabela de tradução byte do giro -> código de cor (usada com bytes.translate)
+_SPIN_TO_COLOR = bytes(
+    [COLOR_CODES[number_to_color(n)] for n in range(15)]
+    + [COLOR_CODES['red'], COLOR_CODES['black']]
+    + [255] * (256 - 17)
+)
+
+
+def encode_spin(color: Optional[str], number: Optional[int]) -> int:
+    """Codifica um giro em um byte (ver SPIN_*). Lança ValueError se inválido."""
+    if number is not None and 0 <= int(number) <= 14:
+        return int(number)
+    c = (color or '').lower()
+    if c == 'white':
+        return 0
+    if c == 'red':
+        return SPIN_RED_UNKNOWN
+    if c == 'black':
+        return SPIN_BLACK_UNKNOWN
+    raise ValueError(f"Giro inválido: color={color!r} number={number!r}")
+
+
+def encode_spins(spins: List[Dict]) -> bytes:
+    """Codifica uma lista de giros ({'color', 'number'}) preservando a ordem"""
+    return bytes(encode_spin(s.get('color'), s.get('number')) for s in spins)
+
+
+def spin_numbers(blob: bytes) -> memoryview:
+    """Visão sem cópia dos bytes dos giros (valores 0..14, 15/16 = sem número)"""
+    return memoryview(blob)
+
+
+def spin_colors(blob: bytes) -> bytes:
+    """Códigos de cor (0=white, 1=red, 2=black) de cada giro, em uma única alocação"""
+    return bytes(blob).translate(_SPIN_TO_COLOR)
+
+
+def decode_spins(blob: bytes) -> List[Dict]:
+    """Reconstrói a lista de dicts {'color', 'number'} (compatibilidade)"""
+    return [
+        {'color': COLOR_NAMES[_SPIN_TO_COLOR[b]], 'number': b if b <= 14 else None}
+        for b in blob
+    ]
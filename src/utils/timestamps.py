@@ -0,0 +1,61 @@
+"""
+Timestamps armazenados como inteiros (microssegundos desde a época, UTC)
+
+O banco guarda ``INTEGER`` para que ordenação, intervalos e agrupamentos
+por hora sejam comparações numéricas sobre o índice. A forma texto
+``'%Y-%m-%d %H:%M:%S.%f'`` em hora local (ver docs/FORMATO_TIMESTAMP.md)
+continua disponível via ``format_us`` e pelas views ``v_games``/``v_bets``.
+"""
+import calendar
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+
+US_PER_SECOND = 1_000_000
+US_PER_HOUR = 3600 * US_PER_SECOND
+# Todos os fusos têm deslocamento múltiplo de 15 minutos
+_US_PER_QUARTER = 900 * US_PER_SECOND
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+
+def now_us() -> int:
+    """Instante atual em microssegundos desde a época"""
+    return time.time_ns() // 1000
+
+
+def timestamp_to_us(value) -> Optional[int]:
+    """Converte um timestamp (inteiro, ``datetime`` ou texto em hora local) em microssegundos"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    # Sem fuso explícito, astimezone assume a hora local (formato de get_timestamp)
+    utc = dt.astimezone(timezone.utc)
+    return calendar.timegm(utc.timetuple()) * US_PER_SECOND + utc.microsecond
+
+
+def format_us(value) -> Optional[str]:
+    """Formata microssegundos como ``'%Y-%m-%d %H:%M:%S.%f'`` em hora local"""
+    if value is None or isinstance(value, str):
+        return value
+    seconds, micros = divmod(int(value), US_PER_SECOND)
+    return datetime.fromtimestamp(seconds).replace(microsecond=micros).strftime(TIMESTAMP_FORMAT)
+
+
+@lru_cache(maxsize=8192)
+def _local_hour_of_quarter(quarter: int) -> int:
+    return datetime.fromtimestamp(quarter * 900).hour
+
+
+def local_hour(value: int) -> int:
+    """Hora local (0-23) de um timestamp em microssegundos, sem formatar texto"""
+    return _local_hour_of_quarter(int(value) // _US_PER_QUARTER)